@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('assets', 'assets')],
-    hiddenimports=['pantheon', 'obswebsocket', 'pynput'],
+    hiddenimports=['requests', 'websocket', 'pynput'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
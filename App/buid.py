@@ -14,8 +14,8 @@ def build_exe():
         '--clean',  # clean cache before building
         '--noconsole',  # no console window
         # Add any additional python packages that need to be included
-        '--hidden-import=pantheon',
-        '--hidden-import=obswebsocket',
+        '--hidden-import=requests',
+        '--hidden-import=websocket',
         '--hidden-import=pynput',
     ])
 
@@ -17,6 +17,14 @@ class PlayerConfig:
     priority: int = 0
     enabled: bool = True
     summoner_info: Optional[Dict[str, Any]] = None
+    # Préemption : ce stream peut-il être coupé pour une partie plus prioritaire,
+    # après combien de secondes au minimum, et pour quel écart de priorité
+    allow_preempt: bool = True
+    min_dwell: int = 300
+    preempt_gap: int = 2
+    # Scène et profil OBS préparés pour ce joueur (vide : ceux en cours)
+    obs_scene: str = ""
+    obs_profile: str = ""
 
     def to_dict(self):
         return {
@@ -26,7 +34,12 @@ class PlayerConfig:
             "region": self.region,
             "priority": self.priority,
             "enabled": self.enabled,
-            "summoner_info": self.summoner_info
+            "summoner_info": self.summoner_info,
+            "allow_preempt": self.allow_preempt,
+            "min_dwell": self.min_dwell,
+            "preempt_gap": self.preempt_gap,
+            "obs_scene": self.obs_scene,
+            "obs_profile": self.obs_profile
         }
 
 
@@ -44,6 +57,32 @@ class Config:
         self.league_path = "C:\\Riot Games\\League of Legends\\Game"
         self.players: Dict[str, PlayerConfig] = {}
         
+        # Ordonnancement des polls (secondes) et budget de requêtes Riot
+        self.poll_base_interval = 30
+        self.poll_max_interval = 600
+        self.riot_requests_per_second = 0.8
+        # Choix de la partie à streamer : "priority" ou "most_players"
+        self.stream_preference = "priority"
+        # URL d'un serveur Riot de substitution (App/tools/riot_standin.py), vide = API réelle
+        self.riot_base_url = ""
+        # Trafic Riot : "live", "record" (enregistre dans riot_cassette) ou "replay"
+        self.riot_transport = "live"
+        self.riot_cassette = ""
+        # Vitesse du rejeu ; 1 seulement donne des chiffres comparables à la session enregistrée
+        self.riot_replay_speed = 1.0
+        # Rafraîchissement en tâche de fond des stats classées et du compte (secondes)
+        self.stats_max_age = 3600
+        self.summoner_info_max_age = 86400
+        self.stats_batch_size = 10
+        self.stats_batch_interval = 120
+        # Santé du stream OBS (échantillonnage, débit adaptatif)
+        self.health_sample_interval = 2
+        self.adaptive_bitrate = True
+        self.min_bitrate = 2500
+        # Sources texte OBS mises à jour pour le joueur streamé (vide : aucune)
+        self.overlay_name_input = ""
+        self.overlay_rank_input = ""
+        
         # Tenter de charger, mais sans erreur si impossible
         try:
             self.load()
@@ -53,7 +92,8 @@ class Config:
 
     def add_player(self, name: str, summoner_id: str, stream_key: str, 
                   channel_name: str, region: str = "euw1", priority: int = 0,
-                  summoner_info: Optional[Dict[str, Any]] = None):
+                  summoner_info: Optional[Dict[str, Any]] = None, allow_preempt: bool = True,
+                  min_dwell: int = 300, preempt_gap: int = 2, obs_scene: str = "", obs_profile: str = ""):
         self.players[name] = PlayerConfig(
             summoner_id=summoner_id,
             stream_key=stream_key,
@@ -61,7 +101,12 @@ class Config:
             region=region,
             priority=priority,
             enabled=True,
-            summoner_info=summoner_info
+            summoner_info=summoner_info,
+            allow_preempt=allow_preempt,
+            min_dwell=min_dwell,
+            preempt_gap=preempt_gap,
+            obs_scene=obs_scene,
+            obs_profile=obs_profile
         )
         self.save()
 
@@ -85,6 +130,23 @@ class Config:
                 "obs_password": self.obs_password,
                 "riot_api_key": self.riot_api_key,
                 "league_path": self.league_path,
+                "poll_base_interval": self.poll_base_interval,
+                "poll_max_interval": self.poll_max_interval,
+                "riot_requests_per_second": self.riot_requests_per_second,
+                "stream_preference": self.stream_preference,
+                "riot_base_url": self.riot_base_url,
+                "riot_transport": self.riot_transport,
+                "riot_cassette": self.riot_cassette,
+                "riot_replay_speed": self.riot_replay_speed,
+                "stats_max_age": self.stats_max_age,
+                "summoner_info_max_age": self.summoner_info_max_age,
+                "stats_batch_size": self.stats_batch_size,
+                "stats_batch_interval": self.stats_batch_interval,
+                "health_sample_interval": self.health_sample_interval,
+                "adaptive_bitrate": self.adaptive_bitrate,
+                "min_bitrate": self.min_bitrate,
+                "overlay_name_input": self.overlay_name_input,
+                "overlay_rank_input": self.overlay_rank_input,
                 "players": {
                     name: player.to_dict()
                     for name, player in self.players.items()
@@ -116,6 +178,23 @@ class Config:
                 self.obs_password = data.get("obs_password", self.obs_password)
                 self.riot_api_key = data.get("riot_api_key", self.riot_api_key)
                 self.league_path = data.get("league_path", self.league_path)
+                self.poll_base_interval = data.get("poll_base_interval", self.poll_base_interval)
+                self.poll_max_interval = data.get("poll_max_interval", self.poll_max_interval)
+                self.riot_requests_per_second = data.get("riot_requests_per_second", self.riot_requests_per_second)
+                self.stream_preference = data.get("stream_preference", self.stream_preference)
+                self.riot_base_url = data.get("riot_base_url", self.riot_base_url)
+                self.riot_transport = data.get("riot_transport", self.riot_transport)
+                self.riot_cassette = data.get("riot_cassette", self.riot_cassette)
+                self.riot_replay_speed = data.get("riot_replay_speed", self.riot_replay_speed)
+                self.stats_max_age = data.get("stats_max_age", self.stats_max_age)
+                self.summoner_info_max_age = data.get("summoner_info_max_age", self.summoner_info_max_age)
+                self.stats_batch_size = data.get("stats_batch_size", self.stats_batch_size)
+                self.stats_batch_interval = data.get("stats_batch_interval", self.stats_batch_interval)
+                self.health_sample_interval = data.get("health_sample_interval", self.health_sample_interval)
+                self.adaptive_bitrate = data.get("adaptive_bitrate", self.adaptive_bitrate)
+                self.min_bitrate = data.get("min_bitrate", self.min_bitrate)
+                self.overlay_name_input = data.get("overlay_name_input", self.overlay_name_input)
+                self.overlay_rank_input = data.get("overlay_rank_input", self.overlay_rank_input)
                 
                 self.players = {}
                 for name, player_data in data.get("players", {}).items():
@@ -126,7 +205,12 @@ class Config:
                         region=player_data.get("region", "euw1"),
                         priority=player_data.get("priority", 0),
                         enabled=player_data.get("enabled", True),
-                        summoner_info=player_data.get("summoner_info")
+                        summoner_info=player_data.get("summoner_info"),
+                        allow_preempt=player_data.get("allow_preempt", True),
+                        min_dwell=player_data.get("min_dwell", 300),
+                        preempt_gap=player_data.get("preempt_gap", 2),
+                        obs_scene=player_data.get("obs_scene", ""),
+                        obs_profile=player_data.get("obs_profile", "")
                     )
                 
                 return True
@@ -143,6 +227,23 @@ class Config:
             "obs_password": self.obs_password,
             "riot_api_key": self.riot_api_key,
             "league_path": self.league_path,
+            "poll_base_interval": self.poll_base_interval,
+            "poll_max_interval": self.poll_max_interval,
+            "riot_requests_per_second": self.riot_requests_per_second,
+            "stream_preference": self.stream_preference,
+            "riot_base_url": self.riot_base_url,
+            "riot_transport": self.riot_transport,
+            "riot_cassette": self.riot_cassette,
+            "riot_replay_speed": self.riot_replay_speed,
+            "stats_max_age": self.stats_max_age,
+            "summoner_info_max_age": self.summoner_info_max_age,
+            "stats_batch_size": self.stats_batch_size,
+            "stats_batch_interval": self.stats_batch_interval,
+            "health_sample_interval": self.health_sample_interval,
+            "adaptive_bitrate": self.adaptive_bitrate,
+            "min_bitrate": self.min_bitrate,
+            "overlay_name_input": self.overlay_name_input,
+            "overlay_rank_input": self.overlay_rank_input,
             "players": {
                 name: player.to_dict() 
                 for name, player in self.players.items()
@@ -0,0 +1,120 @@
+# game_monitor.py
+import time
+from concurrent.futures import Future
+from typing import Callable, Iterable, Optional
+
+import requests
+import urllib3
+
+from process_watcher import GAME_CLIENT_NAME, get_process_watcher
+
+# API locale du client de jeu (aussi disponible en mode spectateur)
+LIVE_CLIENT_EVENTS_URL = "https://127.0.0.1:2999/liveclientdata/eventdata"
+LIVE_CLIENT_CHECK_INTERVAL = 2
+
+# Vérification Spectator-V5 de la partie streamée (servie par ActiveGameCache)
+SPECTATOR_CHECK_INTERVAL = 30
+
+# Retard du flux spectateur sur la partie réelle : après un 404, il reste environ
+# ce temps de jeu à diffuser avant que le client n'atteigne la fin
+SPECTATOR_DELAY = 3 * 60 + 30
+
+
+def find_game_client_pid(exclude: Iterable[int] = ()) -> Optional[int]:
+    """PID of a running League of Legends.exe not in `exclude`, if any"""
+    exclude = set(exclude)
+    try:
+        for pid in get_process_watcher().pids(GAME_CLIENT_NAME):
+            if pid not in exclude:
+                return pid
+    except Exception:
+        pass
+    return None
+
+
+class GameEndMonitor:
+    """Detect the end of the streamed game from three signals.
+
+    - the tracked League of Legends.exe PID exits (immediate, seen by the
+      process watcher);
+    - the client's Live Client Data API reports a GameEnd event (immediate);
+    - Spectator-V5 no longer returns the game: the real game is over, the
+      spectator feed ends about SPECTATOR_DELAY later (fallback when the
+      client gives no end-of-game signal).
+
+    `poll` is cheap and non-blocking: the Spectator-V5 check runs on the async
+    runtime through `check_spectator`, a callable returning a Future of the
+    player's current game ({} when not in game, None on error).
+    """
+
+    def __init__(self, game_id: int, pid: Optional[int],
+                 check_spectator: Callable[[], Future],
+                 log: Callable[[str, str], None] = lambda message, level="INFO": print(message)):
+        self.game_id = game_id
+        self.pid = pid
+        self.check_spectator = check_spectator
+        self.log = log
+        self.processes = get_process_watcher()
+        if pid is not None:
+            self.processes.track(pid)
+        self.upstream_ended_at: Optional[float] = None
+        self._spectator_future: Optional[Future] = None
+        self._next_spectator_check = time.monotonic() + SPECTATOR_CHECK_INTERVAL
+        self._next_client_check = 0.0
+        self._session = requests.Session()
+        self._session.verify = False  # certificat auto-signé du client
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    def client_exited(self) -> bool:
+        if self.pid is None:
+            return False
+        return not self.processes.is_alive(self.pid)
+
+    def client_game_ended(self) -> bool:
+        """True when the Live Client Data API lists a GameEnd event"""
+        try:
+            response = self._session.get(LIVE_CLIENT_EVENTS_URL, timeout=1)
+            if response.status_code != 200:
+                return False
+            events = response.json().get("Events", [])
+            return any(event.get("EventName") == "GameEnd" for event in events)
+        except (requests.RequestException, ValueError, AttributeError):
+            # Client en chargement, ou API désactivée
+            return False
+
+    def _poll_spectator(self, now: float):
+        future = self._spectator_future
+        if future is not None and future.done():
+            self._spectator_future = None
+            try:
+                game_info = future.result()
+            except Exception as e:
+                self.log(f"Spectator check failed: {str(e)}", "DEBUG")
+                game_info = None
+            if game_info is not None and game_info.get("gameId") != self.game_id and self.upstream_ended_at is None:
+                # {} ou une autre partie : la partie streamée est terminée côté serveur
+                self.upstream_ended_at = now
+                self.log(f"Game {self.game_id} is over on the server, the spectator feed "
+                         f"ends in about {SPECTATOR_DELAY // 60} min", "INFO")
+        if self._spectator_future is None and self.upstream_ended_at is None and now >= self._next_spectator_check:
+            self._next_spectator_check = now + SPECTATOR_CHECK_INTERVAL
+            self._spectator_future = self.check_spectator()
+
+    def poll(self, now: Optional[float] = None) -> Optional[str]:
+        """Reason why the streamed game is over, or None while it goes on"""
+        now = time.monotonic() if now is None else now
+        if self.client_exited():
+            return "game client exited"
+        if now >= self._next_client_check:
+            self._next_client_check = now + LIVE_CLIENT_CHECK_INTERVAL
+            if self.client_game_ended():
+                return "game client reported the end of the game"
+        self._poll_spectator(now)
+        if self.upstream_ended_at is not None and now - self.upstream_ended_at >= SPECTATOR_DELAY:
+            return "game over on Spectator-V5"
+        return None
+
+    def close(self):
+        if self._spectator_future is not None:
+            self._spectator_future.cancel()
+        self._session.close()
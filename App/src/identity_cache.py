@@ -0,0 +1,169 @@
+# identity_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import APP_DIR
+
+# Fichier du cache, à côté de settings.json
+IDENTITY_CACHE_FILE = os.path.join(APP_DIR, "identity_cache.json")
+
+# Un Riot ID peut changer de propriétaire : on revalide au bout d'une semaine
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class IdentityCache:
+    """Persistent Riot ID -> PUUID -> encrypted summoner ID cache.
+
+    Entries are keyed by (region, Riot ID) and by PUUID. Stale entries are
+    still served, and a background revalidation is scheduled for them.
+    """
+
+    def __init__(self, file_path: str = IDENTITY_CACHE_FILE, ttl: float = DEFAULT_TTL):
+        self.file_path = file_path
+        self.ttl = ttl
+        self._by_riot_id: Dict[str, Dict[str, Any]] = {}
+        self._by_puuid: Dict[str, Dict[str, Any]] = {}
+        self._revalidating = set()
+        self._lock = threading.RLock()
+        self.load()
+
+    @staticmethod
+    def riot_id_key(riot_id: str, region: str) -> str:
+        # Les Riot ID ne sont pas sensibles à la casse
+        return f"{region.lower()}:{riot_id.strip().lower()}"
+
+    def get(self, riot_id: str, region: str) -> Optional[Dict[str, Any]]:
+        """Return the cached identity for a Riot ID, stale or not"""
+        with self._lock:
+            return self._by_riot_id.get(self.riot_id_key(riot_id, region))
+
+    def get_by_puuid(self, puuid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._by_puuid.get(puuid)
+
+    def is_stale(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get("resolved_at", 0) > self.ttl
+
+    def put(self, riot_id: str, region: str, puuid: str, summoner_id: Optional[str],
+            resolved_at: Optional[float] = None, save: bool = True) -> Dict[str, Any]:
+        """Store an identity and persist the cache"""
+        entry = {
+            "riot_id": riot_id,
+            "region": region,
+            "puuid": puuid,
+            "summoner_id": summoner_id,
+            "resolved_at": time.time() if resolved_at is None else resolved_at
+        }
+        with self._lock:
+            key = self.riot_id_key(riot_id, region)
+            previous = self._by_riot_id.get(key)
+            if previous and previous["puuid"] != puuid:
+                # Le Riot ID a changé de compte
+                self._by_puuid.pop(previous["puuid"], None)
+            self._by_riot_id[key] = entry
+            self._by_puuid[puuid] = entry
+        if save:
+            self.save()
+        return entry
+
+    def seed_from_config(self, config) -> int:
+        """Seed the cache from the summoner_info.accountInfo stored in settings.json.
+
+        Seeded entries are marked as stale so that they are served immediately
+        and revalidated in the background on first use.
+        """
+        seeded = 0
+        for player in config.players.values():
+            info = player.summoner_info or {}
+            account = info.get("accountInfo") or {}
+            puuid = account.get("puuid")
+            if not puuid or "#" not in player.summoner_id:
+                continue
+            if self.get(player.summoner_id, player.region):
+                continue
+            self.put(player.summoner_id, player.region, puuid, account.get("id"),
+                     resolved_at=0, save=False)
+            seeded += 1
+        if seeded:
+            self.save()
+        return seeded
+
+    def revalidate_async(self, riot_id: str, region: str,
+                         resolver: Callable[[], Optional[Dict[str, Any]]]):
+        """Refresh an entry in a daemon thread (at most one refresh per entry at a time).
+
+        `resolver` returns the Summoner-V4 payload (with "puuid" and "id"), or None.
+        """
+        key = self.riot_id_key(riot_id, region)
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def revalidate():
+            try:
+                summoner = resolver()
+                if summoner and "puuid" in summoner:
+                    self.put(riot_id, region, summoner["puuid"], summoner.get("id"))
+            except Exception as e:
+                print(f"[DEBUG] Identity revalidation failed for {riot_id}: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=revalidate, name="identity-revalidate", daemon=True).start()
+
+    def load(self):
+        try:
+            if os.path.exists(self.file_path) and os.path.getsize(self.file_path) > 0:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                with self._lock:
+                    for entry in data.get("entries", []):
+                        if not entry.get("puuid") or not entry.get("riot_id"):
+                            continue
+                        key = self.riot_id_key(entry["riot_id"], entry.get("region", ""))
+                        self._by_riot_id[key] = entry
+                        self._by_puuid[entry["puuid"]] = entry
+        except Exception as e:
+            print(f"Erreur de chargement du cache d'identités: {e}")
+
+    def save(self):
+        try:
+            with self._lock:
+                data = {"entries": list(self._by_riot_id.values())}
+            # Écriture atomique pour ne jamais laisser un fichier tronqué
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_path, self.file_path)
+            return True
+        except Exception as e:
+            print(f"Erreur de sauvegarde du cache d'identités: {e}")
+            return False
+
+
+_identity_caches: Dict[Optional[str], IdentityCache] = {}
+_identity_cache_lock = threading.Lock()
+
+
+def get_identity_cache(base_url: Optional[str] = None) -> IdentityCache:
+    """Return the process-wide identity cache.
+
+    A local stand-in server (`base_url`) gets its own file so that its
+    PUUIDs never end up in the cache used against the real Riot API.
+    """
+    with _identity_cache_lock:
+        cache = _identity_caches.get(base_url)
+        if cache is None:
+            file_path = IDENTITY_CACHE_FILE
+            if base_url:
+                suffix = hashlib.sha1(base_url.encode("utf-8")).hexdigest()[:8]
+                file_path = IDENTITY_CACHE_FILE.replace(".json", f".standin-{suffix}.json")
+            cache = IdentityCache(file_path)
+            _identity_caches[base_url] = cache
+        return cache
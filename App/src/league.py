@@ -1,145 +1,831 @@
 # league.py
-from pantheon import pantheon
 import asyncio
-from typing import Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Awaitable, Callable, Iterable, List, Tuple
 import os
 import sys
 
+import requests
+from requests.adapters import HTTPAdapter
+
+from identity_cache import get_identity_cache
+from runtime import get_runtime
+
+# Routing cluster (Account-V1) associé à chaque plateforme
+REGION_ROUTING = {
+    'euw1': 'europe',
+    'eun1': 'europe',
+    'tr1': 'europe',
+    'ru': 'europe',
+    'na1': 'americas',
+    'br1': 'americas',
+    'la1': 'americas',
+    'la2': 'americas',
+    'kr': 'asia',
+    'jp1': 'asia',
+    'oc1': 'asia'
+}
+
+ROUTING_CLUSTERS = ("europe", "americas", "asia")
+
+
+def platform_host(region: str) -> str:
+    """Host of the platform API (Summoner-V4, Spectator-V5, League-V4...)"""
+    return f"{region}.api.riotgames.com"
+
+
+def routing_host(region: str) -> str:
+    """Host of the regional routing API (Account-V1) for a platform"""
+    return f"{REGION_ROUTING.get(region, 'europe')}.api.riotgames.com"
+
+
+class RiotHttpClient:
+    """Keep-alive HTTP connection pool for a single Riot API host"""
+
+    def __init__(self, api_key: str, host: str, pool_size: int = 10, timeout: float = 10,
+                 base_url: Optional[str] = None):
+        self.host = host
+        self.timeout = timeout
+        # Avec un serveur de substitution, l'hôte Riot devient le premier segment du chemin
+        self.url_prefix = f"{base_url.rstrip('/')}/{host}" if base_url else f"https://{host}"
+        self.session = requests.Session()
+        # Un seul hôte par client : un pool de connexions réutilisées (keep-alive)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "X-Riot-Token": api_key,
+            "Accept": "application/json"
+        })
+
+    def get(self, path: str) -> requests.Response:
+        """GET a path on this host, reusing a pooled connection"""
+        url = f"{self.url_prefix}{path}"
+        transport = _transport
+        if transport is not None:
+            # Enregistrement ou rejeu (riot_vcr)
+            return transport.send(self.host, path, lambda: self.session.get(url, timeout=self.timeout))
+        return self.session.get(url, timeout=self.timeout)
+
+    def prewarm(self):
+        """Open a pooled connection (DNS + TCP + TLS) before the first real call"""
+        if _transport is not None and not _transport.uses_network:
+            return
+        try:
+            self.session.head(f"{self.url_prefix}/", timeout=self.timeout)
+        except Exception as e:
+            print(f"[DEBUG] Prewarm failed for {self.host}: {e}")
+
+    def close(self):
+        self.session.close()
+
+
+# Registre global des clients HTTP, partagé par tout le processus
+_clients: Dict[Tuple[str, str, Optional[str]], RiotHttpClient] = {}
+_clients_lock = threading.Lock()
+
+# Exécuteur partagé pour les appels HTTP bloquants faits depuis les coroutines
+_io_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="riot-io")
+# Les actions de l'utilisateur ne font jamais la queue derrière les balayages
+_interactive_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="riot-io-ui")
+
+# URL de base par défaut (serveur local de substitution), None = vrais hôtes Riot
+_default_base_url: Optional[str] = os.environ.get("RIOT_API_BASE_URL") or None
+
+
+# Transport d'enregistrement / rejeu (riot_vcr), None = trafic réel direct
+_transport = None
+
+
+def set_riot_transport(transport):
+    """Route every Riot call through a riot_vcr transport (None for live traffic)"""
+    global _transport
+    previous, _transport = _transport, transport
+    if previous is not None and previous is not transport:
+        previous.close()
+
+
+def set_riot_base_url(base_url: Optional[str]):
+    """Send every Riot call to `base_url`/<host>/<path> (None restores the real hosts)"""
+    global _default_base_url
+    _default_base_url = base_url or None
+
+
+def get_riot_base_url() -> Optional[str]:
+    return _default_base_url
+
+
+def get_riot_client(api_key: str, host: str, base_url: Optional[str] = None) -> RiotHttpClient:
+    """Return the shared client for (api_key, host, base_url), creating it on first use"""
+    base_url = base_url or _default_base_url
+    key = (api_key, host, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = RiotHttpClient(api_key, host, base_url=base_url)
+            _clients[key] = client
+        return client
+
+
+def prewarm_riot_clients(api_key: str, regions: Iterable[str]) -> threading.Thread:
+    """Warm DNS/TLS for the platform hosts of `regions` and every routing cluster.
+
+    Runs in a daemon thread so that service start is not delayed.
+    """
+    hosts = {platform_host(region) for region in regions}
+    hosts.update(f"{cluster}.api.riotgames.com" for cluster in ROUTING_CLUSTERS)
+
+    def warm():
+        for host in sorted(hosts):
+            get_riot_client(api_key, host).prewarm()
+
+    thread = threading.Thread(target=warm, name="riot-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def close_riot_clients():
+    """Close every pooled connection (used on shutdown)"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+# Limites d'une clé de développement, utilisées tant qu'aucun en-tête n'a été reçu
+DEFAULT_APP_RATE_LIMITS = [(20, 1), (100, 120)]
+
+# Nombre de nouvelles tentatives après un 429 avant d'abandonner
+MAX_RATE_LIMIT_RETRIES = 3
+
+# Voies de priorité des requêtes, de la plus prioritaire à la moins prioritaire
+LANE_INTERACTIVE = "interactive"  # actions de l'utilisateur dans l'interface
+LANE_DETECTION = "detection"  # balayage des parties actives
+LANE_MAINTENANCE = "maintenance"  # rafraîchissements de fond (stats, identités)
+LANES = (LANE_INTERACTIVE, LANE_DETECTION, LANE_MAINTENANCE)
+
+# Part de chaque fenêtre de limite qu'une voie doit laisser aux voies plus prioritaires
+LANE_RESERVES = {
+    LANE_INTERACTIVE: 0.0,
+    LANE_DETECTION: 0.2,
+    LANE_MAINTENANCE: 0.5
+}
+
+# Attente d'une voie basse tant qu'une voie plus prioritaire attend sur le même hôte
+LANE_YIELD_DELAY = 0.05
+
+# Cache des parties actives : "pas en partie" expire vite, "en partie" est gardé
+# jusqu'à la fin la plus précoce possible (surrender), puis revérifié par pas
+NOT_IN_GAME_TTL = 10
+EARLIEST_GAME_END = 15 * 60
+IN_GAME_VERIFY_INTERVAL = 60
+
+# Durée de réutilisation maximale de la liste des featured games (plafonne clientRefreshInterval)
+FEATURED_GAMES_MAX_AGE = 60
+
+# Disjoncteur par (hôte, endpoint) : ouvert après N échecs consécutifs (réseau, timeout, 5xx),
+# puis une seule requête de test une fois le délai écoulé (doublé à chaque test raté)
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_OPEN_TIME = 15
+BREAKER_MAX_OPEN_TIME = 240
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half-open"
+
+
+@dataclass
+class RiotResult:
+    """Typed outcome of a Riot API call"""
+    status: int  # HTTP status, 0 when no response was received
+    data: Any = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    error: str = ""
+    elapsed: float = 0.0
+    # Requête non envoyée : le disjoncteur de l'hôte / endpoint est ouvert
+    circuit_open: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def not_found(self) -> bool:
+        return self.status == 404
+
+    @property
+    def unauthorized(self) -> bool:
+        return self.status in (401, 403)
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status == 429
+
+    @property
+    def server_failure(self) -> bool:
+        """No response (network error, timeout) or a 5xx: counts against the circuit breaker"""
+        return self.status == 0 or self.status >= 500
+
+    @property
+    def retry_after(self) -> Optional[float]:
+        value = self.headers.get("Retry-After")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+
+class RiotAPIError(Exception):
+    """Raised by the public wrappers when a call cannot be answered (bad key...)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_rate_limits(header: Optional[str]) -> List[Tuple[int, int]]:
+    """Parse "20:1,100:120" into [(20, 1), (100, 120)]"""
+    limits = []
+    if not header:
+        return limits
+    for part in header.split(","):
+        try:
+            count, window = part.strip().split(":")
+            limits.append((int(count), int(window)))
+        except ValueError:
+            continue
+    return limits
+
+
+class TokenBucket:
+    """At most `limit` requests per `window` seconds, refilled continuously"""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.window)
+        self.updated = now
+
+    def delay(self, now: float, reserve: float = 0.0) -> float:
+        """Seconds to wait before one token is available above the reserved share"""
+        self._refill(now)
+        needed = 1 + min(reserve * self.limit, self.limit - 1)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) * self.window / self.limit
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def sync(self, count: int, now: float):
+        """Align with the count reported by Riot (other clients may share the key)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, float(self.limit - count))
+
+    def headroom(self, now: float) -> int:
+        self._refill(now)
+        return max(0, int(self.tokens))
+
+
+class RateLimiter:
+    """Riot rate-limit scheduler for one API key.
+
+    Application limits are tracked per routing value (host) and method limits
+    per (host, endpoint), both from the X-App-Rate-Limit / X-Method-Rate-Limit
+    headers. Callers wait in `acquire` until every bucket has a token instead
+    of firing and failing; a 429 blocks the bucket for Retry-After seconds.
+
+    Requests go through priority lanes: a lane may only take a token while
+    the share reserved for the lanes above it (LANE_RESERVES) stays free, and
+    it yields while a higher lane is waiting on the same host.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._app_buckets: Dict[str, List[TokenBucket]] = {}
+        self._method_buckets: Dict[Tuple[str, str], List[TokenBucket]] = {}
+        self._blocked_until: Dict[Any, float] = {}
+        self._waiting: Dict[Tuple[str, str], int] = {}
+
+    def _buckets(self, host: str, endpoint: str) -> List[TokenBucket]:
+        if host not in self._app_buckets:
+            self._app_buckets[host] = [TokenBucket(*limit) for limit in DEFAULT_APP_RATE_LIMITS]
+        return self._app_buckets[host] + self._method_buckets.get((host, endpoint), [])
+
+    def reserve(self, host: str, endpoint: str, lane: str = LANE_DETECTION) -> float:
+        """Take a token from every bucket, or return how long to wait first"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._blocked_until.get(host, 0), self._blocked_until.get((host, endpoint), 0)) - now
+            if any(self._waiting.get((host, higher)) for higher in LANES[:LANES.index(lane)]):
+                wait = max(wait, LANE_YIELD_DELAY)
+            buckets = self._buckets(host, endpoint)
+            for bucket in buckets:
+                wait = max(wait, bucket.delay(now, LANE_RESERVES[lane]))
+            if wait > 0:
+                return wait
+            for bucket in buckets:
+                bucket.consume(now)
+            return 0.0
+
+    async def acquire(self, host: str, endpoint: str, lane: str = LANE_DETECTION):
+        """Wait (queued in its lane) until the request fits in the rate limits"""
+        key = (host, lane)
+        waiting = False
+        try:
+            while True:
+                wait = self.reserve(host, endpoint, lane)
+                if wait <= 0:
+                    return
+                if not waiting:
+                    with self._lock:
+                        self._waiting[key] = self._waiting.get(key, 0) + 1
+                    waiting = True
+                await asyncio.sleep(wait)
+        finally:
+            if waiting:
+                with self._lock:
+                    self._waiting[key] -= 1
+
+    @staticmethod
+    def _update_buckets(buckets: Optional[List[TokenBucket]], limits_header: Optional[str],
+                        count_header: Optional[str], now: float) -> Optional[List[TokenBucket]]:
+        limits = parse_rate_limits(limits_header)
+        if limits and (buckets is None or [(b.limit, b.window) for b in buckets] != limits):
+            buckets = [TokenBucket(*limit) for limit in limits]
+        if buckets:
+            counts = dict((window, count) for count, window in parse_rate_limits(count_header))
+            for bucket in buckets:
+                if bucket.window in counts:
+                    bucket.sync(counts[bucket.window], now)
+        return buckets
+
+    def update(self, host: str, endpoint: str, result: RiotResult):
+        """Learn limits and counts from a response, and honor Retry-After on 429"""
+        headers = result.headers
+        with self._lock:
+            now = time.monotonic()
+            app = self._update_buckets(self._app_buckets.get(host), headers.get("X-App-Rate-Limit"),
+                                       headers.get("X-App-Rate-Limit-Count"), now)
+            if app:
+                self._app_buckets[host] = app
+            method = self._update_buckets(self._method_buckets.get((host, endpoint)),
+                                          headers.get("X-Method-Rate-Limit"),
+                                          headers.get("X-Method-Rate-Limit-Count"), now)
+            if method:
+                self._method_buckets[(host, endpoint)] = method
+
+            if result.rate_limited:
+                retry_after = result.retry_after or 1.0
+                key = host if headers.get("X-Rate-Limit-Type") == "application" else (host, endpoint)
+                self._blocked_until[key] = max(self._blocked_until.get(key, 0), now + retry_after)
+
+    def headroom(self, host: str, endpoint: str) -> int:
+        """Requests that can be sent right now for this endpoint"""
+        with self._lock:
+            now = time.monotonic()
+            if max(self._blocked_until.get(host, 0), self._blocked_until.get((host, endpoint), 0)) > now:
+                return 0
+            return min(bucket.headroom(now) for bucket in self._buckets(host, endpoint))
+
+
+# Un limiteur par clé API (les limites Riot sont attachées à la clé)
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(api_key: str) -> RateLimiter:
+    with _clients_lock:
+        limiter = _rate_limiters.get(api_key)
+        if limiter is None:
+            limiter = RateLimiter()
+            _rate_limiters[api_key] = limiter
+        return limiter
+
+
+class CircuitBreaker:
+    """Circuit breaker for one (host, endpoint).
+
+    Closed: requests go through. After BREAKER_FAILURE_THRESHOLD consecutive
+    server failures it opens and requests fail immediately, so a degraded
+    host no longer costs a full timeout per player. Once the open time has
+    elapsed a single request is let through as a half-open probe: its
+    success closes the breaker, its failure reopens it for twice as long.
+    """
+
+    def __init__(self, host: str, endpoint: str):
+        self.host = host
+        self.endpoint = endpoint
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.open_time = BREAKER_OPEN_TIME
+        self.open_until = 0.0
+        self.last_error = ""
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def admit(self, now: Optional[float] = None) -> str:
+        """State under which a request is admitted: closed, half-open (the probe) or open (rejected)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == BREAKER_OPEN and now >= self.open_until:
+                self.state = BREAKER_HALF_OPEN
+                self._probing = False
+            if self.state == BREAKER_HALF_OPEN:
+                if self._probing:
+                    return BREAKER_OPEN
+                self._probing = True
+            return self.state
+
+    def record_success(self) -> bool:
+        """The host answered; True when this closed the breaker"""
+        with self._lock:
+            reopened = self.state != BREAKER_CLOSED
+            self.state = BREAKER_CLOSED
+            self.failures = 0
+            self.open_time = BREAKER_OPEN_TIME
+            self._probing = False
+            return reopened
+
+    def record_failure(self, error: str, now: Optional[float] = None) -> bool:
+        """The host failed; True when this opened the breaker"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == BREAKER_HALF_OPEN:
+                self.open_time = min(self.open_time * 2, BREAKER_MAX_OPEN_TIME)
+            elif self.state == BREAKER_OPEN or self.failures < BREAKER_FAILURE_THRESHOLD:
+                return False
+            self.state = BREAKER_OPEN
+            self.open_until = now + self.open_time
+            self._probing = False
+            return True
+
+    def release_probe(self):
+        """The probe ended without an answer (cancelled): let the next request probe"""
+        with self._lock:
+            if self.state == BREAKER_HALF_OPEN:
+                self._probing = False
+
+    def status(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return {
+                "host": self.host,
+                "endpoint": self.endpoint,
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in": max(0.0, self.open_until - now) if self.state == BREAKER_OPEN else 0.0,
+                "last_error": self.last_error,
+            }
+
+
+# Disjoncteurs partagés par tout le processus (l'état d'un hôte ne dépend pas de la clé)
+_circuit_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+
+def get_circuit_breaker(host: str, endpoint: str) -> CircuitBreaker:
+    with _clients_lock:
+        breaker = _circuit_breakers.get((host, endpoint))
+        if breaker is None:
+            breaker = CircuitBreaker(host, endpoint)
+            _circuit_breakers[(host, endpoint)] = breaker
+        return breaker
+
+
+def circuit_breaker_status() -> List[Dict[str, Any]]:
+    """Status of every breaker that is not closed (for the UI)"""
+    with _clients_lock:
+        breakers = list(_circuit_breakers.values())
+    return [status for status in (breaker.status() for breaker in breakers) if status["state"] != BREAKER_CLOSED]
+
+
+class ActiveGameCache:
+    """Spectator-V5 result cache shared by every LeagueAPI of the process.
+
+    "In game" entries are kept until the estimated earliest end of the game,
+    after which each lookup is a verification call. "Not in game" entries
+    expire after NOT_IN_GAME_TTL. Concurrent identical lookups, from any
+    thread or event loop, share a single request.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def ttl_for(game: Dict[str, Any]) -> float:
+        if not game:
+            return NOT_IN_GAME_TTL
+        start_ms = game.get("gameStartTime") or 0
+        if start_ms > 0:
+            elapsed = time.time() - start_ms / 1000
+        else:
+            # Partie encore en chargement : gameStartTime vaut 0
+            elapsed = max(0, game.get("gameLength", 0))
+        return max(IN_GAME_VERIFY_INTERVAL, EARLIEST_GAME_END - elapsed)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """Cached game ({} = not in game), or None when there is no fresh entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            return None
+
+    def invalidate(self, key: Tuple[str, str]):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def lookup(self, key: Tuple[str, str],
+                     fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Dict[str, Any]:
+        """Return the cached result or run `fetch` once for all concurrent callers.
+
+        `fetch` returns the game, {} when not in game, or None on error
+        (errors are not cached).
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._inflight[key] = future
+            
+            if not owner:
+                try:
+                    # shield : l'annulation d'un appelant ne doit pas annuler la requête partagée
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except asyncio.CancelledError:
+                    if future.cancelled():
+                        # Le propriétaire a été annulé : reprendre la main
+                        continue
+                    raise
+            
+            try:
+                game = await fetch()
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+            
+            if game is not None:
+                with self._lock:
+                    self._entries[key] = (time.monotonic() + self.ttl_for(game), game)
+            future.set_result(game or {})
+            return game or {}
+
+
+_active_game_cache = ActiveGameCache()
+
+
+def get_active_game_cache() -> ActiveGameCache:
+    return _active_game_cache
+
+
 class LeagueAPI:
-    def __init__(self, api_key: str, region: str = "euw1"):
+    def __init__(self, api_key: str, region: str = "euw1", base_url: Optional[str] = None,
+                 lane: str = LANE_DETECTION):
         self.api_key = api_key
         self.region = region
+        self.base_url = base_url
+        # Voie de priorité de toutes les requêtes de cette instance
+        self.lane = lane
         self.log_callback = print  # Default logger
         
-        # Créer une nouvelle boucle pour le thread actuel au lieu d'utiliser get_event_loop()
-        try:
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-        except Exception as e:
-            print(f"Error creating event loop: {str(e)}")
+        # Boucle asyncio unique du process : les wrappers synchrones y soumettent leurs coroutines
+        self.runtime = get_runtime()
 
-        self.panth = pantheon.Pantheon(
-            server=region,
-            api_key=api_key,
-            auto_retry=True
-        )
+        # Clients HTTP partagés (pool keep-alive par hôte)
+        self.platform_client = get_riot_client(api_key, platform_host(region), base_url)
+        self.routing_client = get_riot_client(api_key, routing_host(region), base_url)
 
-    def set_logger(self, logger):
-        """Set a custom logger function"""
-        self.log_callback = logger
+        # Cache Riot ID -> PUUID -> summoner ID partagé et persistant
+        self.identity_cache = get_identity_cache(base_url or _default_base_url)
 
-    async def _get_active_game(self, summoner_id: str) -> Dict[str, Any]:
-        """Get active game data for a summoner"""
+        # Ordonnanceur de limites partagé par tous les appels de cette clé
+        self.rate_limiter = get_rate_limiter(api_key)
+
+        # Résultats Spectator-V5 partagés entre threads (TTL + single-flight)
+        self.game_cache = get_active_game_cache()
+
+        # Dernière liste des featured games de la région
+        self._featured_games: List[Dict[str, Any]] = []
+        self._featured_expires = 0.0
+
+    async def _request(self, client: RiotHttpClient, path: str, endpoint: str,
+                       lane: Optional[str] = None) -> RiotResult:
+        """Send a GET through the circuit breaker, the rate limiter and a pooled client"""
+        breaker = get_circuit_breaker(client.host, endpoint)
+        admitted = breaker.admit()
+        if admitted == BREAKER_OPEN:
+            return RiotResult(status=0, error=f"circuit open for {endpoint} ({client.host})", circuit_open=True)
+        
+        result = None
         try:
-            # First get the PUUID from summoner ID
-            summoner_url = f"https://{self.region}.api.riotgames.com/lol/summoner/v4/summoners/{summoner_id}"
-            summoner_data = await self.panth.fetch(summoner_url)
-            summoner = await summoner_data.json()
-            
-            if "puuid" not in summoner:
-                self.log_callback(f"Could not get PUUID for summoner ID: {summoner_id}", "ERROR")
-                return {}
+            result = await self._send(client, path, endpoint, lane or self.lane)
+        finally:
+            if result is None:
+                # Annulée avant la réponse : ni succès ni échec
+                if admitted == BREAKER_HALF_OPEN:
+                    breaker.release_probe()
+        
+        if result.server_failure:
+            if breaker.record_failure(result.error or f"status {result.status}"):
+                self.log_callback(f"Circuit breaker opened for {endpoint} ({client.host}) after "
+                                  f"{breaker.failures} failure(s): {breaker.last_error}", "WARNING")
+        elif breaker.record_success():
+            self.log_callback(f"Circuit breaker closed for {endpoint} ({client.host})", "SUCCESS")
+        return result
+
+    async def _send(self, client: RiotHttpClient, path: str, endpoint: str, lane: str) -> RiotResult:
+        loop = asyncio.get_running_loop()
+        executor = _interactive_executor if lane == LANE_INTERACTIVE else _io_executor
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            await self.rate_limiter.acquire(client.host, endpoint, lane)
             
-            puuid = summoner["puuid"]
+            started = time.monotonic()
+            try:
+                response = await loop.run_in_executor(executor, client.get, path)
+            except requests.RequestException as e:
+                return RiotResult(status=0, error=str(e), elapsed=time.monotonic() - started)
             
-            # Now get active game using PUUID
-            data = await self.panth.fetch(
-                (self.panth.BASE_URL_LOL + "spectator/v5/active-games/by-summoner/{puuid}")
-                .format(server=self.region, puuid=puuid)
+            result = RiotResult(
+                status=response.status_code,
+                headers=dict(response.headers),
+                elapsed=time.monotonic() - started
             )
-            match = await data.json()
+            try:
+                result.data = response.json() if response.content else None
+            except ValueError:
+                result.error = "Invalid JSON body"
             
-            if "status" in match and "message" in match["status"]:
-                # This means there's no active game
-                self.log_callback(f"No active game found: {match['status']['message']}", "INFO")
-                return {}
-                
-            if "gameId" not in match:
-                self.log_callback("Invalid game data received - no gameId found", "ERROR")
-                return {}
-                
-            self.log_callback(f"Found active game: Game ID={match['gameId']}", "INFO")
-            return match
+            self.rate_limiter.update(client.host, endpoint, result)
             
-        except Exception as e:
-            error_msg = str(e)
-            if "404" in error_msg:
-                # This is normal - means no active game
-                self.log_callback("No active game found", "INFO")
-                return {}
-            self.log_callback(f"Error getting active game: {error_msg}", "ERROR")
+            if result.rate_limited and attempt < MAX_RATE_LIMIT_RETRIES:
+                # La requête est remise en file : acquire attendra Retry-After
+                self.log_callback(
+                    f"Rate limited on {endpoint} ({client.host}), retrying after {result.retry_after or 1.0}s",
+                    "WARNING"
+                )
+                continue
+            return result
+        return result
+
+    def set_logger(self, logger):
+        """Set a custom logger function"""
+        self.log_callback = logger
+
+    async def _get_active_game(self, summoner_id: str) -> Dict[str, Any]:
+        """Get active game data for an encrypted summoner ID"""
+        # First get the PUUID from summoner ID
+        result = await self._request(self.platform_client, f"/lol/summoner/v4/summoners/{summoner_id}",
+                                     "summoner-v4.by-id")
+        if result.unauthorized:
+            raise RiotAPIError(result.status, "API Key expired or invalid. Please update in settings.")
+        if not result.ok or not result.data or "puuid" not in result.data:
+            self.log_callback(f"Could not get PUUID for summoner ID: {summoner_id} (status {result.status})", "ERROR")
             return {}
+        
+        return await self._get_active_game_by_puuid(result.data["puuid"])
 
-    async def _get_summoner_stats(self, summoner_id: str) -> Dict[str, Any]:
-        """Get ranked stats for a summoner"""
-        try:
-            data = await self.panth.get_league_position(summoner_id)
-            for queue in data:
-                if queue["queueType"] == "RANKED_SOLO_5x5":
-                    return {
-                        "rank": f"{queue['tier']} {queue['rank']}",
-                        "lp": queue["leaguePoints"],
-                        "wins": queue["wins"],
-                        "losses": queue["losses"]
-                    }
+    async def _get_active_game_by_puuid(self, puuid: str) -> Dict[str, Any]:
+        """Get active game data for a PUUID (cached, single Spectator-V5 call)"""
+        return await self.game_cache.lookup(
+            (self.platform_client.url_prefix, puuid),
+            lambda: self._fetch_active_game_by_puuid(puuid)
+        )
+
+    async def _fetch_active_game_by_puuid(self, puuid: str) -> Optional[Dict[str, Any]]:
+        """Spectator-V5 call: the game, {} when not in game, None on error"""
+        result = await self._request(self.platform_client, f"/lol/spectator/v5/active-games/by-summoner/{puuid}",
+                                     "spectator-v5.active-games")
+        
+        if result.not_found:
+            # This is normal - means no active game
+            self.log_callback("No active game found", "INFO")
+            return {}
+        if result.unauthorized:
+            raise RiotAPIError(result.status, "API Key expired or invalid. Please update in settings.")
+        if result.circuit_open:
+            self.log_callback(f"Skipped active game lookup: {result.error}", "DEBUG")
             return None
-        except Exception as e:
-            print(f"[DEBUG] Error getting summoner stats: {e}")
+        if not result.ok:
+            self.log_callback(f"Error getting active game: status {result.status} {result.error}", "ERROR")
             return None
+        
+        match = result.data or {}
+        if "gameId" not in match:
+            self.log_callback("Invalid game data received - no gameId found", "ERROR")
+            return None
+            
+        self.log_callback(f"Found active game: Game ID={match['gameId']}", "INFO")
+        return match
+
+    async def _get_featured_games(self) -> List[Dict[str, Any]]:
+        """Get the featured games of the region, reused until the refresh interval elapses"""
+        now = time.monotonic()
+        if now < self._featured_expires:
+            return self._featured_games
+        
+        result = await self._request(self.platform_client, "/lol/spectator/v5/featured-games",
+                                     "spectator-v5.featured-games")
+        if result.unauthorized:
+            raise RiotAPIError(result.status, "API Key expired or invalid. Please update in settings.")
+        if not result.ok:
+            self.log_callback(f"Error getting featured games: status {result.status} {result.error}", "WARNING")
+            return []
+        
+        data = result.data or {}
+        refresh = data.get("clientRefreshInterval") or FEATURED_GAMES_MAX_AGE
+        self._featured_games = [game for game in data.get("gameList", []) if "gameId" in game]
+        self._featured_expires = now + min(refresh, FEATURED_GAMES_MAX_AGE)
+        return self._featured_games
+
+    async def _get_summoner_stats(self, summoner_id: str, strict: bool = False) -> Dict[str, Any]:
+        """Get ranked stats for a summoner (None when unranked).
+
+        With `strict`, a failed call raises RiotAPIError instead of looking unranked.
+        """
+        result = await self._request(self.platform_client, f"/lol/league/v4/entries/by-summoner/{summoner_id}",
+                                     "league-v4.entries")
+        if not result.ok:
+            print(f"[DEBUG] Error getting summoner stats: status {result.status} {result.error}")
+            if strict:
+                raise RiotAPIError(result.status, f"Error getting summoner stats: status {result.status}")
+            return None
+        for queue in result.data or []:
+            if queue["queueType"] == "RANKED_SOLO_5x5":
+                return {
+                    "rank": f"{queue['tier']} {queue['rank']}",
+                    "lp": queue["leaguePoints"],
+                    "wins": queue["wins"],
+                    "losses": queue["losses"]
+                }
+        return None
 
     def get_active_game(self, summoner_id: str) -> Dict[str, Any]:
         """Synchronous wrapper for getting active game"""
-        return self.loop.run_until_complete(self._get_active_game(summoner_id))
+        return self.runtime.run(self._get_active_game(summoner_id))
 
     def get_summoner_stats(self, summoner_id: str) -> Optional[Dict[str, Any]]:
         """Synchronous wrapper for getting summoner stats"""
-        return self.loop.run_until_complete(self._get_summoner_stats(summoner_id))
+        return self.runtime.run(self._get_summoner_stats(summoner_id))
 
     def verify_api_key(self) -> bool:
         """Test if the API key is valid"""
-        try:
-            # Try to get the free champion rotation - this endpoint is lightweight
-            url = f"https://{self.region}.api.riotgames.com/lol/platform/v3/champion-rotations"
-            future = self.panth.fetch(url)
-            
-            try:
-                response = self.loop.run_until_complete(future)
-                data = self.loop.run_until_complete(response.json())
-                return "freeChampionIds" in data
-                
-            except Exception as e:
-                error_msg = str(e)
-                if "403" in error_msg:
-                    raise Exception("API Key is invalid or expired")
-                elif "401" in error_msg:
-                    raise Exception("Unauthorized API key")
-                else:
-                    raise Exception(f"API Error: {error_msg}")
-                
-        except Exception as e:
-            print(f"[DEBUG] API Key verification error: {str(e)}")
-            raise e  # Propagate the error instead of returning False
+        return self.runtime.run(self._verify_api_key())
+
+    async def _verify_api_key(self) -> bool:
+        """Test if the API key is valid (RiotAPIError when it is rejected)"""
+        # Try to get the free champion rotation - this endpoint is lightweight
+        result = await self._request(self.platform_client, "/lol/platform/v3/champion-rotations",
+                                     "champion-v3.rotations")
+        if result.ok:
+            return "freeChampionIds" in (result.data or {})
+        
+        print(f"[DEBUG] API Key verification error: status {result.status} {result.error}")
+        if result.status == 403:
+            raise RiotAPIError(result.status, "API Key is invalid or expired")
+        elif result.status == 401:
+            raise RiotAPIError(result.status, "Unauthorized API key")
+        else:
+            raise RiotAPIError(result.status, f"API Error: status {result.status} {result.error}")
 
     async def _get_summoner_by_name(self, summoner_name: str) -> Dict[str, Any]:
         """Get summoner info by summoner name"""
-        try:
-            # Construct the API URL
-            api_url = f"https://{self.region}.api.riotgames.com/lol/summoner/v4/summoners/by-name/{summoner_name}"
-            
-            # Log the API call
-            print(f"[DEBUG] Making API call to: {api_url}")
-            
-            data = await self.panth.fetch(api_url)
-            summoner = await data.json()
-            return summoner
-        except Exception as e:
-            print(f"[DEBUG] Error getting summoner by name: {e}")
+        # Construct the API path
+        api_path = f"/lol/summoner/v4/summoners/by-name/{summoner_name}"
+        
+        # Log the API call
+        print(f"[DEBUG] Making API call to: {self.platform_client.host}{api_path}")
+        
+        result = await self._request(self.platform_client, api_path, "summoner-v4.by-name")
+        if not result.ok:
+            print(f"[DEBUG] Error getting summoner by name: status {result.status} {result.error}")
             return None
+        return result.data
 
     def get_summoner_by_name(self, summoner_name: str) -> Dict[str, Any]:
         """Synchronous wrapper for getting summoner by name"""
         try:
-            result = self.loop.run_until_complete(self._get_summoner_by_name(summoner_name))
+            result = self.runtime.run(self._get_summoner_by_name(summoner_name))
             if not result:
                 raise Exception("Failed to get summoner data")
             return result
@@ -149,78 +835,95 @@ class LeagueAPI:
 
     async def _get_summoner_by_riot_id(self, game_name: str, tag_line: str) -> Dict[str, Any]:
         """Get account info by Riot ID (name#tag format)"""
-        try:
-            # Map region to routing value
-            routing = {
-                'euw1': 'europe',
-                'eun1': 'europe',
-                'tr1': 'europe',
-                'ru': 'europe',
-                'na1': 'americas',
-                'br1': 'americas',
-                'la1': 'americas',
-                'la2': 'americas',
-                'kr': 'asia',
-                'jp1': 'asia',
-                'oc1': 'asia'
-            }.get(self.region, 'europe')
+        # Construct the API path for Account-V1 (routing cluster host)
+        api_path = f"/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
+        print(f"[DEBUG] Making Account-V1 API call to: {self.routing_client.host}{api_path}")
+        
+        # Get account info
+        result = await self._request(self.routing_client, api_path, "account-v1.by-riot-id")
+        if result.unauthorized:
+            raise RiotAPIError(result.status, "API Key expired or invalid. Please update in settings.")
+        account = result.data if result.ok else None
+        
+        if account and "puuid" in account:
+            # Now get summoner by PUUID
+            summoner_path = f"/lol/summoner/v4/summoners/by-puuid/{account['puuid']}"
+            print(f"[DEBUG] Making Summoner-V4 API call to: {self.platform_client.host}{summoner_path}")
             
-            # Construct the API URL for Account-V1
-            api_url = f"https://{routing}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-            print(f"[DEBUG] Making Account-V1 API call to: {api_url}")
+            result = await self._request(self.platform_client, summoner_path, "summoner-v4.by-puuid")
+            if not result.ok or not result.data:
+                print(f"[DEBUG] Error getting summoner by PUUID: status {result.status} {result.error}")
+                return None
+            summoner = result.data
             
-            # Get account info
-            data = await self.panth.fetch(api_url)
-            account = await data.json()
+            # Combine the data
+            summoner['riotId'] = {
+                'gameName': game_name,
+                'tagLine': tag_line,
+                'puuid': account['puuid']
+            }
             
-            if account and "puuid" in account:
-                # Now get summoner by PUUID
-                summoner_url = f"https://{self.region}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{account['puuid']}"
-                print(f"[DEBUG] Making Summoner-V4 API call to: {summoner_url}")
-                
-                summoner_data = await self.panth.fetch(summoner_url)
-                summoner = await summoner_data.json()
-                
-                # Combine the data
-                summoner['riotId'] = {
-                    'gameName': game_name,
-                    'tagLine': tag_line,
-                    'puuid': account['puuid']
-                }
-                return summoner
-                
-            return None
-        except Exception as e:
-            print(f"[DEBUG] Error getting account/summoner by Riot ID: {e}")
+            # Mémoriser la résolution pour les prochains polls
+            self.identity_cache.put(f"{game_name}#{tag_line}", self.region,
+                                    account['puuid'], summoner.get('id'))
+            return summoner
+        
+        print(f"[DEBUG] Error getting account by Riot ID: status {result.status} {result.error}")
+        return None
+
+    async def _resolve_puuid(self, riot_id: str) -> Optional[str]:
+        """Resolve a Riot ID to a PUUID, from the identity cache when possible"""
+        entry = self.identity_cache.get(riot_id, self.region)
+        game_name, tag_line = riot_id.split("#", 1)
+        
+        if entry:
+            if self.identity_cache.is_stale(entry):
+                # Servir l'entrée périmée et la revalider en arrière-plan
+                api_key, region, base_url = self.api_key, self.region, self.base_url
+                self.identity_cache.revalidate_async(
+                    riot_id, region,
+                    lambda: LeagueAPI(api_key, region, base_url, lane=LANE_MAINTENANCE)
+                    .get_summoner_by_riot_id(game_name, tag_line)
+                )
+            return entry["puuid"]
+        
+        summoner = await self._get_summoner_by_riot_id(game_name, tag_line)
+        if not summoner or "puuid" not in summoner:
             return None
+        return summoner["puuid"]
+
+    def get_summoner_by_riot_id(self, game_name: str, tag_line: str) -> Optional[Dict[str, Any]]:
+        """Synchronous wrapper for getting summoner by Riot ID"""
+        return self.runtime.run(self._get_summoner_by_riot_id(game_name, tag_line))
+
+    async def _get_active_game_by_summoner(self, summoner_id: str) -> Dict[str, Any]:
+        """Get active game data for a Riot ID (name#tag) or an encrypted summoner ID"""
+        # Parse Riot ID
+        if "#" in summoner_id:
+            # Resolve the PUUID (cached), then a single Spectator-V5 call
+            puuid = await self._resolve_puuid(summoner_id)
+            if not puuid:
+                self.log_callback(f"Could not find summoner with Riot ID: {summoner_id}", "ERROR")
+                return {}
+            return await self._get_active_game_by_puuid(puuid)
+        
+        # Get active game using encrypted summoner ID
+        return await self._get_active_game(summoner_id)
 
     def get_active_game_by_summoner(self, summoner_id: str) -> Dict[str, Any]:
         """Synchronous wrapper for getting active game"""
         try:
-            # Parse Riot ID
-            if "#" in summoner_id:
-                game_name, tag_line = summoner_id.split("#")
-                # Get account info using Riot ID
-                summoner = self.loop.run_until_complete(self._get_summoner_by_riot_id(game_name, tag_line))
-                if not summoner or "id" not in summoner:
-                    self.log_callback(f"Could not find summoner with Riot ID: {summoner_id}", "ERROR")
-                    return {}
-                summoner_id = summoner["id"]  # Use the encrypted summoner ID
-
-            # Get active game using encrypted summoner ID
-            game_info = self.loop.run_until_complete(self._get_active_game(summoner_id))
-            
-            if game_info:
-                self.log_callback(f"Found active game: Game ID={game_info.get('gameId')}", "INFO")
-            
-            return game_info
+            return self.runtime.run(self._get_active_game_by_summoner(summoner_id))
+        except RiotAPIError:
+            raise
         except Exception as e:
-            error_msg = str(e)
-            if "403" in error_msg:
-                raise Exception("API Key expired or invalid. Please update in settings.")
-            self.log_callback(f"Error getting active game: {error_msg}", "ERROR")
+            self.log_callback(f"Error getting active game: {str(e)}", "ERROR")
             return {}
 
+    def get_active_game_id(self, summoner_id: str) -> Optional[int]:
+        """Return the ID of the player's active game, or None"""
+        return self.get_active_game_by_summoner(summoner_id).get("gameId")
+
     def create_spectate_command(self, game_id: str, league_path: str, encryption_key: str = None):
         """
         Crée la commande pour lancer le client spectateur de LoL - version compatible
@@ -0,0 +1,144 @@
+# obs_bundles.py
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from config import Config, PlayerConfig
+from stats_refresher import format_rank
+
+# Requête obs-websocket : (requestType, requestData)
+Request = Tuple[str, Optional[Dict[str, Any]]]
+
+# Lecture du service de diffusion configuré dans OBS (Twitch, YouTube, serveur RTMP...)
+STREAM_SERVICE_READ: Request = ("GetStreamServiceSettings", None)
+
+
+class OBSInventory(NamedTuple):
+    """Scenes, profiles and inputs that exist in the connected OBS"""
+    scenes: Set[str]
+    profiles: Set[str]
+    inputs: Set[str]
+    current_profile: str
+
+
+class OBSBundle(NamedTuple):
+    """Precompiled OBS requests that put a player on air.
+
+    `output_requests` (profile) can only be applied while the stream output
+    is stopped; `scene_requests` (program scene, overlay texts) are applied
+    live. `stream_key` is merged into the stream service configured in OBS
+    when the output starts (`stream_service_request`).
+    """
+    player_name: str
+    fingerprint: str
+    profile: str
+    stream_key: str
+    output_requests: List[Request]
+    scene_requests: List[Request]
+
+    def requires_restart(self, current: Optional["OBSBundle"]) -> bool:
+        """True when going live with this bundle after `current` needs the output stopped"""
+        return current is None or (current.profile, current.stream_key) != (self.profile, self.stream_key)
+
+
+def stream_service_request(service: Dict[str, Any], stream_key: str) -> Optional[Request]:
+    """Request putting `stream_key` into `service` (a GetStreamServiceSettings answer), None when already set.
+
+    Only the key changes: the service type, service and server chosen in
+    OBS are sent back as they are.
+    """
+    settings = dict(service.get("streamServiceSettings") or {})
+    if settings.get("key") == stream_key:
+        return None
+    settings["key"] = stream_key
+    return ("SetStreamServiceSettings", {"streamServiceType": service.get("streamServiceType") or "rtmp_common",
+                                         "streamServiceSettings": settings})
+
+
+class BundleCache:
+    """Per-player OBS bundles, validated against the OBS inventory and cached.
+
+    A bundle is rebuilt when anything it was built from changes (player
+    settings, rank, overlay source names), so editing a player invalidates
+    it without any explicit call; a new OBS inventory clears the cache.
+    """
+
+    def __init__(self, config: Config, log: Callable[[str, str], None] = lambda message, level="INFO": print(message)):
+        self.config = config
+        self.log = log
+        self.inventory: Optional[OBSInventory] = None
+        self._bundles: Dict[str, OBSBundle] = {}
+        # Problèmes déjà signalés, pour ne pas répéter l'avertissement à chaque reconstruction
+        self._warned: Set[Tuple[str, str]] = set()
+
+    def set_inventory(self, inventory: Optional[OBSInventory]):
+        self.inventory = inventory
+        self._bundles.clear()
+
+    def invalidate(self, player_name: Optional[str] = None):
+        if player_name is None:
+            self._bundles.clear()
+        else:
+            self._bundles.pop(player_name, None)
+
+    def _fingerprint(self, player_name: str, player: PlayerConfig) -> str:
+        key = [player_name, player.stream_key, player.channel_name, player.obs_scene, player.obs_profile,
+               format_rank(player), self.config.overlay_name_input, self.config.overlay_rank_input]
+        return hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+
+    def _missing(self, player_name: str, kind: str, name: str):
+        if (player_name, f"{kind}:{name}") not in self._warned:
+            self._warned.add((player_name, f"{kind}:{name}"))
+            self.log(f"OBS {kind} '{name}' configured for {player_name} does not exist in OBS, ignored", "WARNING")
+
+    def build(self, player_name: str, player: PlayerConfig) -> OBSBundle:
+        inventory = self.inventory
+        output: List[Request] = []
+        scene: List[Request] = []
+
+        profile = player.obs_profile
+        if profile and inventory is not None and profile not in inventory.profiles:
+            self._missing(player_name, "profile", profile)
+            profile = ""
+        if profile:
+            # Le profil porte son propre service de diffusion : seule la clé y sera mise
+            output.append(("SetCurrentProfile", {"profileName": profile}))
+
+        if player.obs_scene:
+            if inventory is None or player.obs_scene in inventory.scenes:
+                scene.append(("SetCurrentProgramScene", {"sceneName": player.obs_scene}))
+            else:
+                self._missing(player_name, "scene", player.obs_scene)
+
+        overlays = [(self.config.overlay_name_input, player_name),
+                    (self.config.overlay_rank_input, format_rank(player))]
+        for input_name, text in overlays:
+            if not input_name:
+                continue
+            if inventory is None or input_name in inventory.inputs:
+                scene.append(("SetInputSettings", {"inputName": input_name, "inputSettings": {"text": text}}))
+            else:
+                self._missing(player_name, "source", input_name)
+
+        return OBSBundle(player_name, self._fingerprint(player_name, player), profile or "",
+                         player.stream_key, output, scene)
+
+    def get(self, player_name: str, player: PlayerConfig) -> OBSBundle:
+        """Cached bundle of a player, rebuilt when its inputs changed"""
+        bundle = self._bundles.get(player_name)
+        if bundle is None or bundle.fingerprint != self._fingerprint(player_name, player):
+            bundle = self.build(player_name, player)
+            self._bundles[player_name] = bundle
+        return bundle
+
+    def prepare_all(self) -> int:
+        """Build and cache the bundle of every enabled player; number of bundles ready"""
+        for name in list(self._bundles):
+            if name not in self.config.players:
+                del self._bundles[name]
+        count = 0
+        for name, player in list(self.config.players.items()):
+            if player.enabled:
+                self.get(name, player)
+                count += 1
+        return count
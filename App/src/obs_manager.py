@@ -1,11 +1,245 @@
+import base64
+import hashlib
+import itertools
+import json
 import os
 import subprocess
-import psutil
+import threading
 import time
-from obswebsocket import obsws, requests
-from typing import Callable
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import websocket
+
+from obs_bundles import STREAM_SERVICE_READ, OBSBundle, OBSInventory, stream_service_request
+from process_watcher import OBS_PROCESS_NAME, get_process_watcher
+from stream_health import StreamHealth
+
+# Vérification périodique de la connexion websocket persistante
+HEARTBEAT_INTERVAL = 10
+
+# Attente entre deux tentatives de reconnexion (doublée à chaque échec)
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 30
+
+# Opcodes du protocole obs-websocket v5
+OP_HELLO = 0
+OP_IDENTIFY = 1
+OP_IDENTIFIED = 2
+OP_EVENT = 5
+OP_REQUEST = 6
+OP_REQUEST_RESPONSE = 7
+OP_REQUEST_BATCH = 8
+OP_REQUEST_BATCH_RESPONSE = 9
+
+RPC_VERSION = 1
+
+# Catégories d'événements reçues : General, Scenes et Outputs (StreamStateChanged)
+EVENT_SUBSCRIPTIONS = (1 << 0) | (1 << 2) | (1 << 6)
+
+# Code de statut "la sortie n'est pas en cours" (StopStream sur un stream arrêté)
+STATUS_OUTPUT_NOT_RUNNING = 501
+
+# Attente de l'événement StreamStateChanged après StartStream / StopStream
+STREAM_STATE_TIMEOUT = 15
+
+# Période d'échantillonnage de la santé du stream (secondes)
+HEALTH_SAMPLE_INTERVAL = 2
+
+# Sondes du websocket après le lancement d'OBS : intervalle doublé à chaque essai, délai maximal
+READY_PROBE_MIN_INTERVAL = 0.1
+READY_PROBE_MAX_INTERVAL = 0.5
+READY_DEADLINE = 25
+
+
+class OBSAuthenticationError(Exception):
+    """OBS closed the connection at Identify: wrong websocket password"""
+
+
+class OBSRequestError(Exception):
+    """An obs-websocket request answered with a failed requestStatus"""
+
+    def __init__(self, request_type: str, code: int, comment: str = ""):
+        super().__init__(f"{request_type} failed ({code}){': ' + comment if comment else ''}")
+        self.request_type = request_type
+        self.code = code
+
+
+class OBSWebSocket:
+    """Minimal obs-websocket v5 client (websocket-client).
+
+    Requests and request batches are sent from any thread and matched to
+    their responses by a reader thread, which also dispatches events to
+    `on_event(event_type, event_data)`. A batch goes out as a single
+    RequestBatch message, i.e. one round trip for several requests.
+
+    websocket-client is blocking (connect, recv), hence a reader thread
+    rather than a task on the AsyncRuntime loop: there a blocked recv would
+    stall the Riot requests sharing that loop.
+    """
+
+    def __init__(self, host: str, port: int, password: str = "", timeout: float = 3,
+                 event_subscriptions: int = EVENT_SUBSCRIPTIONS,
+                 on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.event_subscriptions = event_subscriptions
+        self.on_event = on_event
+        self.on_close = on_close
+        self.ws: Optional[websocket.WebSocket] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.ws is not None and self.ws.connected
+
+    def _auth_string(self, salt: str, challenge: str) -> str:
+        secret = base64.b64encode(hashlib.sha256((self.password + salt).encode()).digest())
+        return base64.b64encode(hashlib.sha256(secret + challenge.encode()).digest()).decode()
+
+    def connect(self):
+        """Open the websocket and go through Hello / Identify / Identified"""
+        ws = websocket.create_connection(f"ws://{self.host}:{self.port}", timeout=self.timeout,
+                                         subprotocols=["obswebsocket.json"])
+        try:
+            hello = json.loads(ws.recv())
+            if hello.get("op") != OP_HELLO:
+                raise Exception(f"Unexpected message from OBS: {hello}")
+            identify = {"rpcVersion": RPC_VERSION, "eventSubscriptions": self.event_subscriptions}
+            auth = hello["d"].get("authentication")
+            if auth:
+                identify["authentication"] = self._auth_string(auth["salt"], auth["challenge"])
+            ws.send(json.dumps({"op": OP_IDENTIFY, "d": identify}))
+            try:
+                identified = json.loads(ws.recv())
+            except (websocket.WebSocketConnectionClosedException, ValueError):
+                # OBS ferme la connexion (code 4009) quand le mot de passe est faux
+                raise OBSAuthenticationError("Authentication failed (check the OBS websocket password)")
+            if identified.get("op") != OP_IDENTIFIED:
+                raise Exception(f"Unexpected message from OBS: {identified}")
+        except Exception:
+            ws.close()
+            raise
+        # Le lecteur attend sans limite ; les requêtes ont leur propre délai
+        ws.settimeout(None)
+        self.ws = ws
+        self._reader = threading.Thread(target=self._read, name="obs-websocket", daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        ws = self.ws
+        try:
+            while True:
+                message = json.loads(ws.recv())
+                op, data = message.get("op"), message.get("d") or {}
+                if op == OP_EVENT:
+                    if self.on_event:
+                        try:
+                            self.on_event(data.get("eventType"), data.get("eventData") or {})
+                        except Exception:
+                            pass
+                elif op in (OP_REQUEST_RESPONSE, OP_REQUEST_BATCH_RESPONSE):
+                    with self._pending_lock:
+                        future = self._pending.pop(data.get("requestId"), None)
+                    if future is not None:
+                        future.set_result(data)
+        except Exception as e:
+            error = e
+        else:
+            error = None
+        finally:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                future.set_exception(ConnectionError(f"OBS connection closed: {error}"))
+            try:
+                ws.close()
+            except Exception:
+                pass
+            if self.on_close:
+                self.on_close()
+
+    def _send(self, op: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.connected:
+            raise ConnectionError("Not connected to OBS")
+        request_id = str(next(self._ids))
+        future = Future()
+        with self._pending_lock:
+            self._pending[request_id] = future
+        try:
+            self.ws.send(json.dumps({"op": op, "d": dict(data, requestId=request_id)}))
+            return future.result(self.timeout)
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+
+    @staticmethod
+    def _check(request_type: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        status = response.get("requestStatus") or {}
+        if not status.get("result"):
+            raise OBSRequestError(request_type, status.get("code", 0), status.get("comment", ""))
+        return response.get("responseData") or {}
+
+    def call(self, request_type: str, request_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send one request and return its responseData (OBSRequestError on failure)"""
+        data = {"requestType": request_type}
+        if request_data:
+            data["requestData"] = request_data
+        return self._check(request_type, self._send(OP_REQUEST, data))
+
+    def call_batch(self, requests: List[Tuple[str, Optional[Dict[str, Any]]]],
+                   halt_on_failure: bool = True) -> List[Dict[str, Any]]:
+        """Send requests as one RequestBatch (executed in order); responseData of each.
+
+        With `halt_on_failure`, OBS stops at the first failed request and the
+        OBSRequestError of that request is raised.
+        """
+        batch = []
+        for request_type, request_data in requests:
+            request = {"requestType": request_type}
+            if request_data:
+                request["requestData"] = request_data
+            batch.append(request)
+        response = self._send(OP_REQUEST_BATCH, {"haltOnFailure": halt_on_failure, "requests": batch})
+        results = response.get("results") or []
+        if batch and not results:
+            raise OBSRequestError("RequestBatch", 0, "no results")
+        return [self._check(result.get("requestType", ""), result) for result in results]
+
+    def disconnect(self):
+        ws = self.ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
 
 class OBSManager:
+    """OBS process and websocket control.
+
+    `start_session` keeps one authenticated websocket connection open for the
+    whole service run: a background thread checks it every
+    HEARTBEAT_INTERVAL seconds and reconnects with exponential backoff when
+    OBS goes away, so starting a stream is a single request batch on a
+    warm connection. `ready` is set while the connection is usable.
+
+    The stream output state comes from StreamStateChanged events:
+    `stream_active` follows them and `on_stream_state(active, state)` is
+    called on every change. While the output is active, a sampler thread
+    feeds GetStreamStatus / GetStats (one batch per sample) to `health`.
+
+    Like the client, the session and sampler threads make blocking calls
+    (connect with a timeout, request round trips) and stay off the
+    AsyncRuntime loop, which is kept for the Riot I/O.
+    """
+
     def __init__(self, obs_path: str, obs_host: str, obs_port: int, obs_password: str, log_callback: Callable = print):
         self.obs_path = obs_path
         self.obs_host = obs_host
@@ -13,70 +247,403 @@ class OBSManager:
         self.obs_password = obs_password
         self.obs = None
         self.log = log_callback
+        self.ready = threading.Event()
+        self._lock = threading.RLock()
+        self._keeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self.on_stream_state: Optional[Callable[[bool, str], None]] = None
+        self.stream_active = False
+        self.stream_state = ""
+        self._stream_condition = threading.Condition()
+        self.health = StreamHealth(self.get_profile_parameter, self.set_profile_parameter, log=log_callback)
+        self.health_interval = HEALTH_SAMPLE_INTERVAL
+        self._sampler: Optional[threading.Thread] = None
+        # Appelé après chaque (re)connexion, depuis le thread qui s'est connecté
+        self.on_connected: Optional[Callable[[], None]] = None
+        # Bundle du joueur actuellement à l'antenne
+        self.current_bundle: Optional[OBSBundle] = None
 
     def is_obs_running(self) -> bool:
         """Check if OBS is running"""
         try:
-            return "obs64.exe" in (p.name() for p in psutil.process_iter())
+            return get_process_watcher().running(OBS_PROCESS_NAME)
         except:
             return False
 
-    def launch_obs(self):
-        """Launch OBS"""
-        if not os.path.exists(self.obs_path):
-            raise Exception("OBS path not found")
-            
-        try:
-            # Get OBS directory from the executable path
-            obs_dir = os.path.dirname(self.obs_path)
-            
-            # Store current directory
-            current_dir = os.getcwd()
-            
+    def launch_obs(self, deadline: float = READY_DEADLINE) -> Future:
+        """Launch OBS if it is not running; Future resolving to True once its websocket is ready.
+
+        Readiness is an authenticated Identify on the websocket (which also
+        opens the persistent connection), probed at exponential intervals.
+        The future fails as soon as OBS exits or rejects the password, and
+        after `deadline` seconds at the latest.
+        """
+        future = Future()
+        if self.is_connected():
+            future.set_result(True)
+            return future
+        process = None
+        if not self.is_obs_running():
+            if not os.path.exists(self.obs_path):
+                future.set_exception(Exception("OBS path not found"))
+                return future
             try:
-                # Change to OBS directory before launching
-                os.chdir(obs_dir)
-                subprocess.Popen([self.obs_path])
+                # OBS cherche ses fichiers depuis son dossier ; cwd plutôt que os.chdir,
+                # qui changerait le dossier courant de tous les threads
+                process = subprocess.Popen([self.obs_path], cwd=os.path.dirname(self.obs_path))
+                # Indexé tout de suite : is_obs_running le voit avant le prochain rafraîchissement
+                get_process_watcher().track(process.pid)
                 self.log("Launching OBS...", "INFO")
-            finally:
-                # Change back to original directory
-                os.chdir(current_dir)
-            
-            # Wait for OBS to start
-            for _ in range(10):  # Wait up to 10 seconds
-                if self.is_obs_running():
-                    self.log("OBS launched successfully", "SUCCESS")
-                    time.sleep(2)  # Give OBS a moment to fully initialize
-                    return
-                time.sleep(1)
-                
-            raise Exception("OBS failed to start within timeout")
-        except Exception as e:
-            raise Exception(f"Failed to launch OBS: {str(e)}")
+            except Exception as e:
+                future.set_exception(Exception(f"Failed to launch OBS: {str(e)}"))
+                return future
+        # Sonde bloquante (connect websocket-client) : thread dédié, pas la boucle AsyncRuntime
+        threading.Thread(target=self._probe_ready, args=(future, process, deadline),
+                         name="obs-ready-probe", daemon=True).start()
+        return future
+
+    def _probe_ready(self, future: Future, process: Optional[subprocess.Popen], deadline: float):
+        started = time.monotonic()
+        interval = READY_PROBE_MIN_INTERVAL
+        error: Optional[Exception] = None
+        while not self._stop.is_set():
+            try:
+                self.connect()
+                self.log(f"OBS websocket ready after {time.monotonic() - started:.1f}s", "SUCCESS")
+                future.set_result(True)
+                return
+            except OBSAuthenticationError as e:
+                # Inutile d'insister : le mot de passe ne changera pas tout seul
+                future.set_exception(e)
+                return
+            except Exception as e:
+                error = e
+            if process is not None and process.poll() is not None:
+                future.set_exception(Exception(f"OBS exited during startup (code {process.returncode})"))
+                return
+            remaining = started + deadline - time.monotonic()
+            if remaining <= 0:
+                future.set_exception(TimeoutError(f"OBS websocket not ready after {deadline:.0f}s: {str(error)}"))
+                return
+            self._stop.wait(min(interval, remaining))
+            interval = min(interval * 2, READY_PROBE_MAX_INTERVAL)
+        future.set_exception(Exception("OBS session stopped"))
 
     def connect(self):
-        """Connect to OBS websocket"""
-        try:
-            # Create OBS websocket connection
-            self.obs = obsws(
-                host=self.obs_host,
-                port=self.obs_port,
-                password=self.obs_password,
-                timeout=3
-            )
-            self.obs.connect()
+        """Connect to OBS websocket (no-op when the connection is already up)"""
+        with self._lock:
+            if self.is_connected():
+                return
+            self._drop()
+            try:
+                # Create OBS websocket connection
+                obs = OBSWebSocket(
+                    host=self.obs_host,
+                    port=self.obs_port,
+                    password=self.obs_password,
+                    timeout=3,
+                    on_event=self._on_event,
+                    on_close=self.wake
+                )
+                obs.connect()
+                status = obs.call("GetStreamStatus")
+            except OBSAuthenticationError:
+                raise
+            except Exception as e:
+                raise Exception(f"Failed to connect to OBS: {str(e)}")
+            self.obs = obs
+            active = bool(status.get("outputActive"))
+            self._set_stream_state(active, "OBS_WEBSOCKET_OUTPUT_STARTED" if active else "")
             self.log("Connected to OBS successfully", "SUCCESS")
-        except Exception as e:
-            raise Exception(f"Failed to connect to OBS: {str(e)}")
+            # Préparation (bundles...) avant de déclarer la connexion prête
+            if self.on_connected:
+                try:
+                    self.on_connected()
+                except Exception as e:
+                    self.log(f"Error preparing OBS after connection: {str(e)}", "ERROR")
+            self.ready.set()
+
+    def set_connection(self, obs_host: str, obs_port: int, obs_password: str):
+        """Use new websocket settings, reconnecting if they changed"""
+        with self._lock:
+            if (obs_host, obs_port, obs_password) == (self.obs_host, self.obs_port, self.obs_password):
+                return
+            self.obs_host, self.obs_port, self.obs_password = obs_host, obs_port, obs_password
+            self._drop()
+        self.wake()
+
+    def is_connected(self) -> bool:
+        """True while the websocket connection is open"""
+        obs = self.obs
+        return bool(obs and obs.connected)
+
+    def wake(self):
+        """Retry the connection now instead of at the end of the backoff (OBS was just launched)"""
+        self._wake.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the persistent connection; True when it is usable"""
+        self.wake()
+        return self.ready.wait(timeout) and self.is_connected()
+
+    def heartbeat(self) -> bool:
+        """Check the connection with a cheap request; drop it when OBS does not answer"""
+        with self._lock:
+            if not self.is_connected():
+                if self.ready.is_set():
+                    self.log("Lost connection to OBS, reconnecting", "WARNING")
+                self._drop()
+                return False
+            try:
+                self.obs.call("GetVersion")
+                return True
+            except Exception as e:
+                self.log(f"OBS heartbeat failed: {str(e)}", "WARNING")
+                self._drop()
+                return False
+
+    def _drop(self):
+        """Forget the current connection (closing it if still open)"""
+        self.ready.clear()
+        obs, self.obs = self.obs, None
+        if obs is None:
+            return
+        obs.on_close = None
+        obs.disconnect()
+
+    def start_session(self):
+        """Keep a websocket connection open in the background until stop_session"""
+        if self._keeper is not None and self._keeper.is_alive():
+            return
+        self._stop.clear()
+        self._keeper = threading.Thread(target=self._keep_session, name="obs-session", daemon=True)
+        self._keeper.start()
+        self._sampler = threading.Thread(target=self._sample_health, name="obs-health", daemon=True)
+        self._sampler.start()
+
+    def stop_session(self):
+        self._stop.set()
+        self.wake()
+        with self._stream_condition:
+            self._stream_condition.notify_all()
+        for thread in (self._keeper, self._sampler):
+            if thread is not None:
+                thread.join(5)
+        self._keeper = self._sampler = None
+
+    def configure_health(self, interval: float, adaptive: bool, min_bitrate: int):
+        self.health_interval = max(0.5, interval)
+        self.health.adaptive = adaptive
+        self.health.min_bitrate = min_bitrate
+
+    def _sample_health(self):
+        # start/stop_streaming bornent eux-mêmes la mesure ; ici seulement une sortie
+        # démarrée ou arrêtée depuis OBS
+        while not self._stop.is_set():
+            if self.stream_active and self.is_connected():
+                if not self.health.active:
+                    self.health.begin()
+                try:
+                    status, stats = self.obs.call_batch([("GetStreamStatus", None), ("GetStats", None)])
+                    self.health.record(status, stats)
+                except Exception as e:
+                    self.log(f"Stream health sample failed: {str(e)}", "DEBUG")
+                self._stop.wait(self.health_interval)
+                continue
+            if self.health.active and not self.stream_active and self.is_connected():
+                self.health.end(if_active=True)
+            if self.stream_active:
+                # Connexion perdue pendant le stream : réessayer au prochain échantillon
+                self._stop.wait(self.health_interval)
+                continue
+            # Rien à mesurer : attendre le début du stream
+            with self._stream_condition:
+                self._stream_condition.wait_for(lambda: self.stream_active or self._stop.is_set(), 5)
+
+    def _keep_session(self):
+        delay = RECONNECT_MIN_DELAY
+        lost = False
+        while not self._stop.is_set():
+            if self.heartbeat():
+                delay = RECONNECT_MIN_DELAY
+                wait = HEARTBEAT_INTERVAL
+            else:
+                try:
+                    self.connect()
+                    delay = RECONNECT_MIN_DELAY
+                    lost = False
+                    wait = HEARTBEAT_INTERVAL
+                except Exception as e:
+                    # OBS pas encore lancé : journaliser une seule fois par coupure
+                    if not lost:
+                        self.log(f"OBS websocket unavailable, retrying in background: {str(e)}", "DEBUG")
+                        lost = True
+                    wait = delay
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            # Réveil anticipé : OBS vient d'être lancé, ou nouveaux paramètres
+            if self._wake.wait(wait):
+                self._wake.clear()
+                delay = RECONNECT_MIN_DELAY
+
+    def _on_event(self, event_type: str, data: Dict[str, Any]):
+        if event_type == "StreamStateChanged":
+            self._set_stream_state(bool(data.get("outputActive")), data.get("outputState", ""))
+
+    def _set_stream_state(self, active: bool, state: str):
+        with self._stream_condition:
+            changed = active != self.stream_active
+            self.stream_active = active
+            self.stream_state = state
+            self._stream_condition.notify_all()
+        if changed and self.on_stream_state:
+            self.on_stream_state(active, state)
+
+    def wait_stream_state(self, active: bool, timeout: float = STREAM_STATE_TIMEOUT) -> bool:
+        """Wait for StreamStateChanged to report the output (in)active; False on timeout"""
+        with self._stream_condition:
+            return self._stream_condition.wait_for(lambda: self.stream_active == active, timeout)
+
+    def _require_connection(self) -> OBSWebSocket:
+        obs = self.obs
+        if obs is None or not obs.connected:
+            if not self.wait_ready(3):
+                raise Exception("Not connected to OBS")
+            obs = self.obs
+        return obs
+
+    def set_stream_key(self, stream_key: str):
+        """Put `stream_key` into the streaming service configured in OBS"""
+        obs = self._require_connection()
+        request = stream_service_request(obs.call(*STREAM_SERVICE_READ), stream_key)
+        if request is not None:
+            obs.call(*request)
+        self.current_bundle = None
+
+    def fetch_inventory(self) -> OBSInventory:
+        """Scenes, profiles and inputs of the connected OBS (one request batch)"""
+        scenes, profiles, inputs = self._require_connection().call_batch(
+            [("GetSceneList", None), ("GetProfileList", None), ("GetInputList", None)])
+        return OBSInventory(
+            scenes={scene["sceneName"] for scene in scenes.get("scenes", [])},
+            profiles=set(profiles.get("profiles", [])),
+            inputs={item["inputName"] for item in inputs.get("inputs", [])},
+            current_profile=profiles.get("currentProfileName", ""),
+        )
+
+    def start_streaming(self, stream_key: Optional[str] = None, scene: Optional[str] = None,
+                        wait: float = STREAM_STATE_TIMEOUT, bundle: Optional[OBSBundle] = None):
+        """Start the stream output, setting the stream key and scene in the same round trip.
+
+        With a `bundle`, its profile, stream key, scene and overlay requests
+        replace `stream_key` / `scene`. Returns once OBS reports the output
+        active through StreamStateChanged (no polling); raises when it does
+        not within `wait` seconds.
+
+        The stream service is stored in the profile: it is read in a first
+        batch, right after the bundle's profile switch, and the stream key is
+        merged into it so the service and server of that profile stay as
+        they are. Encoder settings scheduled by `health` go in the
+        StartStream batch (the profile's own values are read in that first
+        batch too), and `health.begin` puts the profile back once the output
+        is live. A failed start restores the profile through `health.end`.
+        """
+        output_requests, scene_requests = [], []
+        if bundle is not None:
+            output_requests, scene_requests = list(bundle.output_requests), list(bundle.scene_requests)
+            stream_key = bundle.stream_key
+        elif scene:
+            scene_requests.append(("SetCurrentProgramScene", {"sceneName": scene}))
+        starting = not self.stream_active
+        profile_known = False
+        try:
+            # Lus après le changement de profil : service et réglages du profil choisi
+            reads = [STREAM_SERVICE_READ] if stream_key else []
+            if starting and self.health.scheduled():
+                reads += self.health.profile_requests()
+            if reads:
+                answers = self._require_connection().call_batch(output_requests + reads)[len(output_requests):]
+                output_requests = []
+                if stream_key:
+                    request = stream_service_request(answers.pop(0), stream_key)
+                    if request is not None:
+                        output_requests.append(request)
+                if answers:
+                    self.health.set_profile(answers)
+                    profile_known = True
+                    output_requests += self.health.override_requests()
+            batch = output_requests + scene_requests
+            if starting:
+                batch.append(("StartStream", None))
+            if batch:
+                self._require_connection().call_batch(batch)
+            self.current_bundle = bundle
+            if wait and not self.wait_stream_state(True, wait):
+                raise Exception(f"OBS did not report the stream as started within {wait}s")
+        except Exception:
+            if starting:
+                self.health.end()
+            raise
+        if starting and self.stream_active:
+            self.health.begin(profile_known)
+        self.log("OBS stream output is live", "SUCCESS")
+
+    def switch_streaming(self, bundle: OBSBundle):
+        """Put another player on air.
+
+        When the profile and stream key are unchanged the output keeps
+        running and the switch is one request batch (scene and overlays);
+        otherwise the output is stopped and restarted with the bundle. A
+        change of player is also the safe point to restart for encoder
+        settings scheduled by `health`: the viewers see a new game anyway.
+        `stop_streaming` ends the health run of the old output and
+        `start_streaming` begins the one of the new output.
+        """
+        requires_restart = bundle.requires_restart(self.current_bundle)
+        if self.stream_active and not requires_restart and not self.health.restart_pending():
+            if bundle.scene_requests:
+                self._require_connection().call_batch(bundle.scene_requests)
+            self.current_bundle = bundle
+            return
+        if self.stream_active:
+            if not requires_restart:
+                self.log("Restarting the stream output to apply the scheduled encoder settings", "INFO")
+            self.stop_streaming()
+        self.start_streaming(bundle=bundle)
+
+    def stop_streaming(self, wait: float = STREAM_STATE_TIMEOUT):
+        """Stop the stream output and wait for OBS to report it stopped"""
+        try:
+            self._require_connection().call("StopStream")
+        except OBSRequestError as e:
+            if e.code != STATUS_OUTPUT_NOT_RUNNING:
+                raise
+            self._set_stream_state(False, "OBS_WEBSOCKET_OUTPUT_STOPPED")
+        if wait and not self.wait_stream_state(False, wait):
+            raise Exception(f"OBS did not report the stream as stopped within {wait}s")
+        self.health.end()
+
+    def get_profile_parameter(self, category: str, name: str) -> Optional[str]:
+        return self._require_connection().call("GetProfileParameter", {
+            "parameterCategory": category, "parameterName": name}).get("parameterValue")
+
+    def set_profile_parameter(self, category: str, name: str, value: Optional[str]):
+        self._require_connection().call("SetProfileParameter", {
+            "parameterCategory": category, "parameterName": name, "parameterValue": value})
+
+    def get_scene_names(self) -> List[str]:
+        """Names of the scenes of the current scene collection"""
+        return [scene["sceneName"] for scene in self._require_connection().call("GetSceneList").get("scenes", [])]
 
     def disconnect(self):
         """Disconnect from OBS websocket"""
         try:
-            if self.obs and hasattr(self.obs, 'ws') and self.obs.ws is not None and self.obs.ws.connected:
-                self.obs.disconnect()
-                self.log("Disconnected from OBS", "INFO")
-            else:
-                self.log("OBS wasn't connected, nothing to disconnect", "INFO")
-            self.obs = None
+            with self._lock:
+                if self.is_connected():
+                    self._drop()
+                    self.log("Disconnected from OBS", "INFO")
+                else:
+                    self.log("OBS wasn't connected, nothing to disconnect", "INFO")
+                self._drop()
         except Exception as e:
             self.log(f"Error disconnecting from OBS: {str(e)}", "ERROR") 
\ No newline at end of file
@@ -0,0 +1,297 @@
+# player_tracker.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from config import PlayerConfig
+
+# Après une partie, les joueurs relancent souvent une file : on les surveille de près
+REQUEUE_INTERVAL = 15
+REQUEUE_WINDOW = 15 * 60
+
+# Nombre de polls à vide avant de commencer le backoff exponentiel
+IDLE_GRACE_POLLS = 10
+IDLE_BACKOFF = 1.5
+
+# Allongement de l'intervalle par point de priorité (0 = plus haute priorité)
+PRIORITY_INTERVAL_FACTOR = 0.05
+
+# Délai minimal entre deux polls d'un même joueur, quel que soit le budget
+MIN_INTERVAL = 5
+
+# Pendant un stream, les joueurs hors partie sont pollés moins souvent
+# (préemption et relais n'ont pas besoin d'une détection immédiate)
+STREAMING_INTERVAL_FACTOR = 2
+
+# Durée maximale estimée d'une partie : au-delà, les joueurs couverts sont revérifiés
+MAX_GAME_DURATION = 45 * 60
+
+
+@dataclass
+class PlayerPollState:
+    name: str
+    priority: int = 0
+    next_due: float = 0.0
+    interval: float = 0.0
+    idle_streak: int = 0
+    error_streak: int = 0
+    in_game: bool = False
+    last_game_end: Optional[float] = None
+    game_id: Optional[int] = None
+    # Joueur dont le poll couvre cette partie (None si le joueur est pollé lui-même)
+    covered_by: Optional[str] = None
+
+
+class PollScheduler:
+    """Per-player polling schedule.
+
+    Each player has its own next-due time. Intervals shorten right after a
+    game ends, back off exponentially during long inactivity and grow with the
+    priority number. A global budget (requests per second) is shared between
+    players in a weighted-fair way, so a large roster slows everyone down
+    proportionally instead of starving low-priority players.
+
+    The budget split is computed once per sweep (`begin_sweep`) and every
+    result of that sweep is scheduled from it: recomputing it per result
+    made a sweep quadratic in the roster size.
+    """
+
+    def __init__(self, base_interval: float = 30, max_interval: float = 600,
+                 requests_per_second: float = 0.8):
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.requests_per_second = requests_per_second
+        self.states: Dict[str, PlayerPollState] = {}
+        self.streaming = False
+        # Répartition du budget (polls par seconde) calculée pour le balayage en cours
+        self._allocation: Optional[Dict[str, float]] = None
+        self._lock = threading.Lock()
+
+    def sync_roster(self, players: Dict[str, PlayerConfig]):
+        """Track enabled players, drop removed or disabled ones"""
+        with self._lock:
+            enabled = {name: player for name, player in players.items() if player.enabled}
+            for name in list(self.states):
+                if name not in enabled:
+                    del self.states[name]
+                    self._allocation = None
+            for name, player in enabled.items():
+                state = self.states.get(name)
+                if state is None:
+                    # Nouveau joueur : à vérifier immédiatement
+                    self.states[name] = PlayerPollState(name=name, priority=player.priority)
+                    self._allocation = None
+                elif state.priority != player.priority:
+                    state.priority = player.priority
+                    self._allocation = None
+
+    def set_streaming(self, streaming: bool):
+        """Slow down the idle players' polls while a stream is live"""
+        with self._lock:
+            self.streaming = streaming
+
+    def _desired_interval(self, state: PlayerPollState, now: float) -> float:
+        if state.in_game:
+            interval = self.base_interval
+        elif state.last_game_end is not None and now - state.last_game_end < REQUEUE_WINDOW:
+            interval = REQUEUE_INTERVAL
+        else:
+            backoff = IDLE_BACKOFF ** max(0, state.idle_streak - IDLE_GRACE_POLLS)
+            interval = self.base_interval * backoff
+        if state.error_streak:
+            interval *= 2 ** min(state.error_streak, 5)
+        if self.streaming and not state.in_game:
+            interval *= STREAMING_INTERVAL_FACTOR
+        interval *= 1 + state.priority * PRIORITY_INTERVAL_FACTOR
+        return max(MIN_INTERVAL, min(self.max_interval, interval))
+
+    @staticmethod
+    def _weight(state: PlayerPollState) -> float:
+        return 1.0 / (1 + state.priority * PRIORITY_INTERVAL_FACTOR)
+
+    def _allocate(self, now: float) -> Dict[str, float]:
+        """Weighted max-min fair split of the request budget (polls per second)"""
+        demands = [(1.0 / self._desired_interval(state, now), self._weight(state), name)
+                   for name, state in self.states.items()]
+        # Water-filling : les joueurs qui demandent le moins par unité de poids sont servis
+        # d'abord, le reste du budget est redistribué aux autres selon leur poids
+        demands.sort(key=lambda demand: demand[0] / demand[1])
+        allocation = {}
+        budget = self.requests_per_second
+        total_weight = sum(weight for _, weight, _ in demands)
+        for index, (rate, weight, name) in enumerate(demands):
+            if rate > budget * weight / total_weight:
+                for _, weight, name in demands[index:]:
+                    allocation[name] = max(0.0, budget) * weight / total_weight
+                break
+            allocation[name] = rate
+            budget -= rate
+            total_weight -= weight
+        return allocation
+
+    def begin_sweep(self, now: Optional[float] = None):
+        """Split the request budget once for the sweep about to run"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._allocation = self._allocate(now)
+
+    def _sweep_allocation(self, now: float) -> Dict[str, float]:
+        if self._allocation is None:
+            self._allocation = self._allocate(now)
+        return self._allocation
+
+    def _schedule(self, state: PlayerPollState, now: float, allocation: Dict[str, float]):
+        rate = allocation.get(state.name, 0.0)
+        budget_interval = 1.0 / rate if rate > 0 else self.max_interval
+        state.interval = min(self.max_interval, max(self._desired_interval(state, now), budget_interval))
+        state.next_due = now + state.interval
+
+    def due_players(self, now: Optional[float] = None) -> List[str]:
+        """Players whose poll is due, by priority"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = [state for state in self.states.values() if state.next_due <= now]
+            due.sort(key=lambda state: state.priority)
+            return [state.name for state in due]
+
+    def record_result(self, name: str, in_game: bool, now: Optional[float] = None,
+                      game_id: Optional[int] = None):
+        """Update a player's schedule after a successful lookup"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self.states.get(name)
+            if state is None:
+                return
+            if state.in_game and (not in_game or game_id != state.game_id):
+                state.last_game_end = now
+                self._release_covered(name, now)
+            state.in_game = in_game
+            state.game_id = game_id if in_game else None
+            state.covered_by = None
+            state.idle_streak = 0 if in_game else state.idle_streak + 1
+            state.error_streak = 0
+            self._schedule(state, now, self._sweep_allocation(now))
+
+    def record_game(self, owner: str, game_info: Dict, participants: List[str],
+                    now: Optional[float] = None):
+        """Mark the tracked participants of a game found through `owner`.
+
+        Their polls are skipped until `owner` sees the game end, or until the
+        estimated end of the game as a safety net.
+        """
+        now = time.monotonic() if now is None else now
+        start_ms = game_info.get("gameStartTime") or 0
+        elapsed = time.time() - start_ms / 1000 if start_ms > 0 else game_info.get("gameLength", 0)
+        remaining = max(self.base_interval, MAX_GAME_DURATION - max(0, elapsed))
+        with self._lock:
+            for name in participants:
+                state = self.states.get(name)
+                if state is None or name == owner:
+                    continue
+                state.in_game = True
+                state.game_id = game_info.get("gameId")
+                state.covered_by = owner
+                state.idle_streak = 0
+                state.next_due = now + remaining
+
+    def _release_covered(self, owner: str, now: float):
+        """The game of `owner` ended: poll its other participants right away"""
+        for state in self.states.values():
+            if state.covered_by == owner:
+                state.covered_by = None
+                state.in_game = False
+                state.game_id = None
+                state.last_game_end = now
+                state.next_due = now
+
+    def record_game_end(self, game_id: int, now: Optional[float] = None):
+        """The streamed game ended: every player in it is back to the requeue cadence"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for state in self.states.values():
+                if state.in_game and state.game_id == game_id:
+                    state.in_game = False
+                    state.game_id = None
+                    state.covered_by = None
+                    state.last_game_end = now
+                    state.next_due = now + REQUEUE_INTERVAL
+
+    def games_in_progress(self) -> Dict[int, List[str]]:
+        """Game ID -> tracked players currently known to be in it, by priority"""
+        with self._lock:
+            games: Dict[int, List[PlayerPollState]] = {}
+            for state in self.states.values():
+                if state.in_game and state.game_id:
+                    games.setdefault(state.game_id, []).append(state)
+            return {game_id: [state.name for state in sorted(states, key=lambda state: state.priority)]
+                    for game_id, states in games.items()}
+
+    def record_error(self, name: str, now: Optional[float] = None):
+        """Back off a player whose lookup failed"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self.states.get(name)
+            if state is None:
+                return
+            state.error_streak += 1
+            self._schedule(state, now, self._sweep_allocation(now))
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Seconds until the earliest due poll"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self.states:
+                return self.base_interval
+            return max(0.0, min(state.next_due for state in self.states.values()) - now)
+
+
+class RosterIndex:
+    """PUUID / Riot ID -> tracked player reverse index, built from Config.players"""
+
+    def __init__(self):
+        self.by_puuid: Dict[str, str] = {}
+        self.by_riot_id: Dict[Tuple[str, str], str] = {}
+
+    def rebuild(self, players: Dict[str, PlayerConfig], identity_cache=None):
+        by_puuid = {}
+        by_riot_id = {}
+        for name, player in players.items():
+            if not player.enabled:
+                continue
+            if "#" in player.summoner_id:
+                by_riot_id[(player.region, player.summoner_id.strip().lower())] = name
+            # Le cache d'identités est plus récent que le summoner_info enregistré
+            puuid = None
+            if identity_cache is not None and "#" in player.summoner_id:
+                entry = identity_cache.get(player.summoner_id, player.region)
+                puuid = entry["puuid"] if entry else None
+            if not puuid:
+                account = (player.summoner_info or {}).get("accountInfo") or {}
+                puuid = account.get("puuid")
+            if puuid:
+                by_puuid[puuid] = name
+        self.by_puuid = by_puuid
+        self.by_riot_id = by_riot_id
+
+    def tracked_participants(self, game_info: Dict, region: Optional[str] = None) -> List[str]:
+        """Tracked players taking part in an active game.
+
+        Participants are matched by PUUID, and by Riot ID when `region` is given.
+        """
+        names = []
+        for participant in game_info.get("participants", []):
+            name = self.by_puuid.get(participant.get("puuid"))
+            if name is None and region and participant.get("riotId"):
+                name = self.by_riot_id.get((region, participant["riotId"].strip().lower()))
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    def match_featured(self, games: List[Dict], region: str) -> Dict[str, Dict]:
+        """Map each tracked player found in a region's featured games to its game"""
+        found = {}
+        for game_info in games:
+            for name in self.tracked_participants(game_info, region):
+                found.setdefault(name, game_info)
+        return found
@@ -0,0 +1,49 @@
+# preemption.py
+import time
+from typing import Any, Dict, Optional
+
+from config import PlayerConfig
+
+# Partie streamée proche de sa fin : le relais automatique arrivera bientôt, pas de coupure
+CURRENT_GAME_LATE = 25 * 60
+
+# Partie candidate déjà trop avancée : elle ne vaut pas de couper le stream en cours
+CANDIDATE_GAME_LATE = 20 * 60
+
+
+def game_elapsed(game_info: Optional[Dict[str, Any]], now: Optional[float] = None) -> float:
+    """Seconds since the game started (0 when unknown)"""
+    if not game_info:
+        return 0.0
+    now = time.time() if now is None else now
+    start_ms = game_info.get("gameStartTime") or 0
+    if start_ms > 0:
+        return max(0.0, now - start_ms / 1000)
+    return float(game_info.get("gameLength") or 0)
+
+
+def preemption_reason(current: PlayerConfig, live_for: float, current_game: Optional[Dict[str, Any]],
+                      candidate: PlayerConfig, candidate_game: Dict[str, Any],
+                      now: Optional[float] = None) -> Optional[str]:
+    """Why the stream of `current` should switch to `candidate`, or None to stay.
+
+    Hysteresis comes from the streamed player's settings: the candidate must
+    be at least `preempt_gap` priority points better, and the current stream
+    must have lasted `min_dwell` seconds. A game close to its end is left to
+    the automatic handoff, and a candidate game already well advanced is not
+    worth the switch.
+    """
+    if not current.allow_preempt:
+        return None
+    gap = current.priority - candidate.priority
+    if gap < max(1, current.preempt_gap):
+        return None
+    if live_for < current.min_dwell:
+        return None
+    if game_elapsed(current_game, now) >= CURRENT_GAME_LATE:
+        return None
+    candidate_elapsed = game_elapsed(candidate_game, now)
+    if candidate_elapsed >= CANDIDATE_GAME_LATE:
+        return None
+    return (f"priority {candidate.priority} vs {current.priority}, live for {live_for / 60:.0f} min, "
+            f"candidate game at {candidate_elapsed / 60:.0f} min")
@@ -0,0 +1,254 @@
+# process_watcher.py
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import psutil
+
+# Processus surveillés par nom
+GAME_CLIENT_NAME = "League of Legends.exe"
+OBS_PROCESS_NAME = "obs64.exe"
+
+# Période de rafraîchissement de l'index (secondes)
+WATCH_INTERVAL = 0.5
+
+# Âge au-delà duquel une lecture rafraîchit elle-même l'index (thread non démarré)
+STALE_AFTER = 2.0
+
+
+def _process_name(pid: int) -> Optional[str]:
+    """Name of `pid`, "" when it cannot be read, None when the process is gone"""
+    try:
+        return psutil.Process(pid).name()
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+        return None
+    except psutil.AccessDenied:
+        return ""
+
+
+def _create_time(pid: int) -> Optional[float]:
+    try:
+        return psutil.Process(pid).create_time()
+    except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+        return None
+
+
+class ProcessWatcher:
+    """Incrementally updated index of the running processes by name.
+
+    Each refresh diffs `psutil.pids()` against the PIDs already known: only
+    new PIDs are asked for their name and exited ones are dropped, instead
+    of reading the name of every process on every check. Liveness and name
+    queries are then dictionary lookups.
+
+    `track(pid, on_exit)` follows a process we spawned or stream from and
+    calls `on_exit(pid)` once it is gone (a reused PID counts as an exit).
+    Listeners (`add_listener`) are called when a watched name gains or
+    loses a process, or a tracked process exits, so that waits can re-check
+    at once. Without the background thread (`start`), queries refresh a
+    stale index themselves.
+    """
+
+    def __init__(self, interval: float = WATCH_INTERVAL,
+                 log: Callable[[str, str], None] = lambda message, level="INFO": print(message)):
+        self.interval = interval
+        self.log = log
+        self._names: Dict[int, str] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._watched: Set[str] = {GAME_CLIENT_NAME, OBS_PROCESS_NAME}
+        # PID suivi -> heure de création (détecte la réutilisation d'un PID)
+        self._tracked: Dict[int, Optional[float]] = {}
+        self._exit_callbacks: Dict[int, List[Callable[[int], None]]] = {}
+        # Processus suivis terminés mais encore présents dans la table (zombies)
+        self._defunct: Set[int] = set()
+        self._listeners: List[Callable[[], None]] = []
+        self._refreshed_at = 0.0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Index ---
+
+    def _add(self, pid: int, name: str):
+        self._names[pid] = name
+        self._by_name.setdefault(name, set()).add(pid)
+
+    def _forget(self, pid: int):
+        name = self._names.pop(pid, None)
+        if name is not None:
+            pids = self._by_name.get(name)
+            if pids is not None:
+                pids.discard(pid)
+                if not pids:
+                    del self._by_name[name]
+
+    def refresh(self) -> Tuple[Set[int], Set[int]]:
+        """Update the index; (started, exited) PIDs since the previous refresh"""
+        exits: List[Tuple[int, Callable[[int], None]]] = []
+        with self._lock:
+            # Sous le verrou : deux rafraîchissements concurrents ne s'appliquent pas dans le désordre
+            pids = set(psutil.pids())
+            self._defunct &= pids
+            pids -= self._defunct
+            known = set(self._names)
+            started = pids - known
+            exited = known - pids
+            changed = False
+            for pid, created in self._tracked.items():
+                if pid not in pids or pid in started:
+                    continue
+                try:
+                    proc = psutil.Process(pid)
+                    if proc.status() == psutil.STATUS_ZOMBIE:
+                        # Enfant terminé mais pas encore récupéré (POSIX) : il ne tourne plus
+                        self._defunct.add(pid)
+                        exited.add(pid)
+                        continue
+                    if created is not None and proc.create_time() != created:
+                        # PID repris par un autre processus entre deux rafraîchissements
+                        exited.add(pid)
+                        started.add(pid)
+                        continue
+                    name = proc.name()
+                except psutil.NoSuchProcess:
+                    exited.add(pid)
+                    continue
+                except psutil.AccessDenied:
+                    continue
+                # Un processus suivi dès son lancement peut encore porter le nom de son parent
+                if name != self._names.get(pid):
+                    changed = changed or name in self._watched
+                    self._forget(pid)
+                    self._add(pid, name)
+            for pid in exited:
+                changed = changed or self._names.get(pid) in self._watched or pid in self._tracked
+                self._forget(pid)
+                self._tracked.pop(pid, None)
+                exits.extend((pid, callback) for callback in self._exit_callbacks.pop(pid, []))
+            for pid in started:
+                name = _process_name(pid)
+                if name is None:
+                    continue
+                self._add(pid, name)
+                changed = changed or name in self._watched
+            self._refreshed_at = time.monotonic()
+            listeners = list(self._listeners) if changed else []
+        for pid, callback in exits:
+            try:
+                callback(pid)
+            except Exception as e:
+                self.log(f"Error in process exit callback for PID {pid}: {str(e)}", "ERROR")
+        for listener in listeners:
+            try:
+                listener()
+            except Exception as e:
+                self.log(f"Error in process watcher listener: {str(e)}", "ERROR")
+        return started, exited
+
+    def _ensure_fresh(self):
+        if time.monotonic() - self._refreshed_at > STALE_AFTER:
+            self.refresh()
+
+    # --- Requêtes ---
+
+    def watch(self, name: str):
+        """Notify the listeners when processes named `name` start or exit"""
+        with self._lock:
+            self._watched.add(name)
+
+    def add_listener(self, callback: Callable[[], None]):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def pids(self, name: str) -> List[int]:
+        """PIDs of the running processes named `name`, in PID order"""
+        self._ensure_fresh()
+        with self._lock:
+            return sorted(self._by_name.get(name, ()))
+
+    def running(self, name: str) -> bool:
+        self._ensure_fresh()
+        with self._lock:
+            return bool(self._by_name.get(name))
+
+    def is_alive(self, pid: int) -> bool:
+        self._ensure_fresh()
+        with self._lock:
+            return pid in self._names
+
+    def name(self, pid: int) -> Optional[str]:
+        self._ensure_fresh()
+        with self._lock:
+            return self._names.get(pid)
+
+    def find(self, predicate: Callable[[str], bool]) -> List[Tuple[int, str]]:
+        """(pid, name) of the running processes whose name matches `predicate`"""
+        self._ensure_fresh()
+        with self._lock:
+            return [(pid, name) for name, pids in self._by_name.items() if predicate(name) for pid in sorted(pids)]
+
+    def track(self, pid: int, on_exit: Optional[Callable[[int], None]] = None) -> bool:
+        """Follow `pid` (indexed right away); False, and `on_exit` called now, when it is already gone"""
+        with self._lock:
+            if pid not in self._names:
+                name = _process_name(pid)
+                if name is not None:
+                    self._add(pid, name)
+            alive = pid in self._names
+            if alive:
+                self._tracked.setdefault(pid, _create_time(pid))
+                if on_exit is not None:
+                    self._exit_callbacks.setdefault(pid, []).append(on_exit)
+        if not alive and on_exit is not None:
+            on_exit(pid)
+        return alive
+
+    def kill(self, pid: int):
+        """Kill `pid` if it is still the indexed process (NoSuchProcess for a stale or reused PID)"""
+        name = self.name(pid)
+        proc = psutil.Process(pid)
+        if name is None or proc.name() != name:
+            raise psutil.NoSuchProcess(pid)
+        proc.kill()
+
+    # --- Thread de rafraîchissement ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="process-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.log(f"Error refreshing the process index: {str(e)}", "ERROR")
+            if self._stop.wait(self.interval):
+                return
+
+
+_watcher: Optional[ProcessWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_process_watcher() -> ProcessWatcher:
+    """Return the process-wide watcher (refreshed by Service, or on demand)"""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = ProcessWatcher()
+        return _watcher
@@ -0,0 +1,322 @@
+# riot_vcr.py
+"""Record-and-replay of Riot API traffic.
+
+In "record" mode every request made through LeagueAPI is appended to a
+cassette (one compact JSON object per line: time, host, path, status,
+headers, body, duration). In "replay" mode the cassette is served back
+without any network: a request gets the last response recorded for the same
+URL at or before the current replay time, so game states change at the
+same moments as during the recorded session, optionally faster (speed > 1).
+
+    python riot_vcr.py summary evening.jsonl [replayed.jsonl]
+
+prints API-call counts per endpoint and game detection latency, to compare a
+live session with a replay against new scheduler or cache code.
+
+Replay follows the wall clock: which record a request gets depends on when
+it is sent (thread scheduling, simulated latency), so two replays of the
+same cassette give close but not identical numbers; compare over long
+cassettes rather than exact counts. Only speed 1 gives numbers comparable
+with the recorded session: the app's poll intervals, cache TTLs and rate
+limiter keep running in real time, so a faster replay polls less often on
+the recorded clock and inflates the detection latency.
+"""
+import bisect
+from collections import deque
+import json
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import APP_DIR
+
+DEFAULT_CASSETTE = os.path.join(APP_DIR, "riot_cassette.jsonl")
+
+TRANSPORT_MODES = ("live", "record", "replay")
+
+# (limites, compte) des en-têtes de limite Riot : le compte est recalculé sur le trafic du rejeu
+RATE_LIMIT_HEADERS = (("X-App-Rate-Limit", "X-App-Rate-Limit-Count"),
+                      ("X-Method-Rate-Limit", "X-Method-Rate-Limit-Count"))
+
+# Même découpage que les noms d'endpoints de league.py
+ENDPOINT_PATTERNS = [
+    (re.compile(r"^/riot/account/v1/accounts/by-riot-id/"), "account-v1.by-riot-id"),
+    (re.compile(r"^/lol/summoner/v4/summoners/by-puuid/"), "summoner-v4.by-puuid"),
+    (re.compile(r"^/lol/summoner/v4/summoners/by-name/"), "summoner-v4.by-name"),
+    (re.compile(r"^/lol/summoner/v4/summoners/"), "summoner-v4.by-id"),
+    (re.compile(r"^/lol/spectator/v5/active-games/by-summoner/"), "spectator-v5.active-games"),
+    (re.compile(r"^/lol/spectator/v5/featured-games"), "spectator-v5.featured-games"),
+    (re.compile(r"^/lol/league/v4/entries/"), "league-v4.entries"),
+    (re.compile(r"^/lol/platform/v3/champion-rotations"), "champion-v3.rotations"),
+]
+
+
+def endpoint_of(path: str) -> str:
+    for pattern, name in ENDPOINT_PATTERNS:
+        if pattern.match(path):
+            return name
+    return "other"
+
+
+class CassetteWriter:
+    """Append-only, line-buffered cassette file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]):
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def load_cassette(path: str) -> List[Dict[str, Any]]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Dernière ligne tronquée (session interrompue)
+                continue
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def _windows(header: Optional[str]) -> List[int]:
+    """Windows of a "20:1,100:120" rate-limit header: [1, 120]"""
+    windows = []
+    for part in (header or "").split(","):
+        try:
+            windows.append(int(part.strip().split(":")[1]))
+        except (IndexError, ValueError):
+            continue
+    return windows
+
+
+def build_response(record: Dict[str, Any]) -> requests.Response:
+    response = requests.Response()
+    response.status_code = record["status"]
+    response.headers = CaseInsensitiveDict(record.get("headers") or {})
+    response._content = (record.get("body") or "").encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = f"https://{record['host']}{record['path']}"
+    return response
+
+
+class RecordingTransport:
+    """Send requests for real and append each exchange to a cassette"""
+
+    uses_network = True
+
+    def __init__(self, path: str = DEFAULT_CASSETTE):
+        self.writer = CassetteWriter(path)
+
+    def send(self, host: str, path: str, send: Callable[[], requests.Response]) -> requests.Response:
+        started = time.time()
+        record = {"ts": round(started, 3), "host": host, "path": path}
+        try:
+            response = send()
+        except requests.RequestException as e:
+            record.update(status=0, error=str(e), ms=round((time.time() - started) * 1000, 1))
+            self.writer.write(record)
+            raise
+        record.update(
+            status=response.status_code,
+            ms=round((time.time() - started) * 1000, 1),
+            headers=dict(response.headers),
+            body=response.text
+        )
+        self.writer.write(record)
+        return response
+
+    def close(self):
+        self.writer.close()
+
+
+class ReplayTransport:
+    """Serve a cassette back, following its timeline at `speed` times real time.
+
+    The X-App-Rate-Limit-Count / X-Method-Rate-Limit-Count headers of the
+    recorded responses counted the original session's requests; they are
+    rewritten with the replay's own requests over the same windows, so the
+    rate limiter follows the traffic being replayed.
+    """
+
+    uses_network = False
+
+    def __init__(self, path: str = DEFAULT_CASSETTE, speed: float = 1.0, log_path: Optional[str] = None):
+        self.speed = speed
+        self._by_url: Dict[Tuple[str, str], Tuple[List[float], List[Dict[str, Any]]]] = {}
+        records = load_cassette(path)
+        self.recorded_start = records[0]["ts"] if records else time.time()
+        for record in records:
+            times, entries = self._by_url.setdefault((record["host"], record["path"]), ([], []))
+            times.append(record["ts"])
+            entries.append(record)
+        self.started = time.monotonic()
+        # Journal des réponses servies, au même format, pour comparer avec la session d'origine
+        self.log = CassetteWriter(log_path) if log_path else None
+        self.misses = 0
+        # Heures d'envoi des requêtes rejouées, par hôte (limite d'application) et par endpoint
+        self._sent: Dict[Any, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        """Current time on the recorded session's clock"""
+        return self.recorded_start + (time.monotonic() - self.started) * self.speed
+
+    def _count_headers(self, host: str, path: str, headers: Dict[str, str]) -> Dict[str, str]:
+        """`headers` with the rate-limit counts of the replay's own requests"""
+        headers = CaseInsensitiveDict(headers)
+        now = time.monotonic()
+        with self._lock:
+            for (limit_name, count_name), key in zip(RATE_LIMIT_HEADERS, (host, (host, endpoint_of(path)))):
+                sent = self._sent.setdefault(key, deque())
+                sent.append(now)
+                windows = _windows(headers.get(limit_name))
+                if not windows:
+                    headers.pop(count_name, None)
+                    continue
+                while now - sent[0] > max(windows):
+                    sent.popleft()
+                headers[count_name] = ",".join(
+                    f"{sum(1 for at in sent if now - at <= window)}:{window}" for window in windows)
+        return dict(headers)
+
+    def send(self, host: str, path: str, send: Callable[[], requests.Response]) -> requests.Response:
+        now = self.now()
+        record = None
+        found = self._by_url.get((host, path))
+        if found:
+            times, entries = found
+            index = bisect.bisect_right(times, now) - 1
+            if index >= 0:
+                record = entries[index]
+            elif endpoint_of(path) != "spectator-v5.active-games":
+                # Donnée stable (compte, invocateur...) demandée plus tôt qu'à l'enregistrement
+                record = entries[0]
+        if record is None:
+            # Jamais observé à cet instant : pas de partie en cours
+            self.misses += 1
+            record = {"host": host, "path": path, "status": 404, "ms": 0,
+                      "headers": {"X-VCR": "miss"}, "body": json.dumps({"status": {"status_code": 404}})}
+
+        if record.get("ms"):
+            time.sleep(record["ms"] / 1000 / self.speed)
+        if record.get("status"):
+            record = dict(record, headers=self._count_headers(host, path, record.get("headers") or {}))
+        if self.log is not None:
+            self.log.write(dict(record, ts=round(self.now(), 3)))
+        if record.get("status") == 0:
+            raise requests.ConnectionError(record.get("error", "Recorded connection error"))
+        return build_response(record)
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+
+
+def transport_from_config(config):
+    """Transport selected by config.riot_transport (None for live traffic)"""
+    mode = getattr(config, "riot_transport", "live")
+    path = getattr(config, "riot_cassette", "") or DEFAULT_CASSETTE
+    if mode == "record":
+        return RecordingTransport(path)
+    if mode == "replay":
+        log_path = path.replace(".jsonl", f".replay-{int(time.time())}.jsonl")
+        return ReplayTransport(path, speed=getattr(config, "riot_replay_speed", 1.0), log_path=log_path)
+    return None
+
+
+def summarize(path: str) -> Dict[str, Any]:
+    """API-call counts per endpoint and game detection latency of a cassette"""
+    records = load_cassette(path)
+    calls: Dict[str, Dict[str, int]] = {}
+    first_seen: Dict[int, float] = {}
+    game_start: Dict[int, float] = {}
+    for record in records:
+        endpoint = endpoint_of(record["path"])
+        counters = calls.setdefault(endpoint, {})
+        counters[str(record["status"])] = counters.get(str(record["status"]), 0) + 1
+        if endpoint != "spectator-v5.active-games" or record["status"] != 200:
+            continue
+        try:
+            game = json.loads(record.get("body") or "{}")
+        except ValueError:
+            continue
+        if "gameId" in game and game["gameId"] not in first_seen:
+            first_seen[game["gameId"]] = record["ts"]
+            if game.get("gameStartTime"):
+                game_start[game["gameId"]] = game["gameStartTime"] / 1000
+    latencies = [first_seen[game_id] - start for game_id, start in game_start.items()]
+    return {
+        "requests": len(records),
+        "duration": records[-1]["ts"] - records[0]["ts"] if records else 0,
+        "calls": calls,
+        "games_detected": len(first_seen),
+        "detection_latency": {
+            "mean": statistics.mean(latencies) if latencies else None,
+            "median": statistics.median(latencies) if latencies else None,
+            "max": max(latencies) if latencies else None,
+        },
+        "first_seen": first_seen,
+    }
+
+
+def print_summary(path: str, summary: Dict[str, Any]):
+    print(f"{path}: {summary['requests']} requests over {summary['duration'] / 60:.1f} min")
+    for endpoint, counters in sorted(summary["calls"].items()):
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(counters.items()))
+        print(f"  {endpoint:30} {sum(counters.values()):6}  ({statuses})")
+    latency = summary["detection_latency"]
+    if latency["mean"] is not None:
+        print(f"  games detected: {summary['games_detected']}, detection latency "
+              f"mean {latency['mean']:.1f}s / median {latency['median']:.1f}s / max {latency['max']:.1f}s")
+    else:
+        print(f"  games detected: {summary['games_detected']}")
+
+
+def main(argv: List[str]):
+    if len(argv) < 2 or argv[0] != "summary":
+        print("usage: python riot_vcr.py summary CASSETTE [OTHER_CASSETTE]")
+        return 1
+    summaries = [(path, summarize(path)) for path in argv[1:3]]
+    for path, summary in summaries:
+        print_summary(path, summary)
+    if len(summaries) == 2:
+        (_, before), (_, after) = summaries
+        common = set(before["first_seen"]) & set(after["first_seen"])
+        deltas = [after["first_seen"][game_id] - before["first_seen"][game_id] for game_id in common]
+        print(f"requests: {before['requests']} -> {after['requests']} "
+              f"({after['requests'] - before['requests']:+d})")
+        print(f"games detected in both: {len(common)}, missed by the second: "
+              f"{len(set(before['first_seen']) - set(after['first_seen']))}")
+        if deltas:
+            print(f"detection time difference (second - first): mean {statistics.mean(deltas):+.1f}s, "
+                  f"median {statistics.median(deltas):+.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
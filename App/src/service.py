@@ -5,19 +5,31 @@ import subprocess
 import psutil
 import time
 import traceback
-from obswebsocket import obsws, requests
 from datetime import datetime
 import asyncio
 import sys
-from typing import Optional, Tuple, Callable
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Optional, Tuple, Callable, Dict, Any, List
 from config import PlayerConfig, Config
 import os
 from PySide6.QtCore import QThread, Signal, QObject, QTimer, Qt, Slot
-from league import LeagueAPI
+from league import (LeagueAPI, prewarm_riot_clients, close_riot_clients, set_riot_base_url,
+                    get_riot_base_url, set_riot_transport, LANE_DETECTION)
+from riot_vcr import transport_from_config
+from runtime import get_runtime
+from identity_cache import get_identity_cache
+from player_tracker import PollScheduler, RosterIndex
+from stats_refresher import StatsRefresher
+from game_monitor import GameEndMonitor, find_game_client_pid
+from process_watcher import GAME_CLIENT_NAME, get_process_watcher
+from preemption import preemption_reason
+from stream_session import (StreamSession, SessionCancelled, DETECTED, LAUNCHING_CLIENT, CLIENT_READY,
+                            OBS_READY, LIVE, ENDING, IDLE)
 from PySide6.QtWidgets import QMessageBox
 from pynput.mouse import Controller as MouseController
 from pynput.keyboard import Controller, KeyCode, Key
 from obs_manager import OBSManager
+from obs_bundles import BundleCache
 
 # Ajouter le répertoire courant au PYTHONPATH pour garantir que emergency_log est trouvé
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -26,12 +38,23 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 keyboard = Controller()
 
+# Nombre maximal de lookups Spectator-V5 en vol pendant un balayage
+MAX_CONCURRENT_LOOKUPS = 10
+
+# Préparation d'OBS (lancement + websocket) en parallèle du lancement du client de jeu
+_bringup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="obs-bringup")
+
+# Attente maximale d'OBS une fois le client de jeu prêt
+OBS_READY_TIMEOUT = 30
+
 class Service(QObject):
     # Variable de classe (statique) pour suivre l'état global
     _any_service_running = False
 
     # Définir des signaux pour la communication entre threads
     log_signal = Signal(str, str)
+    # Joueurs dont les stats classées / summoner_info viennent d'être rafraîchis
+    stats_updated = Signal(list)
 
     def __init__(self, config: 'Config'):
         super().__init__()  # Initialiser la classe parent QObject
@@ -61,6 +84,22 @@ class Service(QObject):
             self.game_checker = None
             self.active_stream = None
             self.obs_manager = None
+            # Boucle asyncio unique pour toutes les E/S réseau (Riot, sondes)
+            self.runtime = get_runtime()
+            self.stats_refresher = None
+            self.stats_future = None
+            # Machine à états du stream, dont les attentes sont interrompues à l'arrêt
+            self.session = StreamSession(self.log)
+            # Index des processus (client de jeu, OBS) tenu à jour en tâche de fond
+            self.processes = get_process_watcher()
+            # Requêtes OBS préparées par joueur (scène, profil, clé, overlays)
+            self.bundles = BundleCache(config, self.log)
+            # Serveur Riot de substitution éventuel (tests hors ligne)
+            if config.riot_base_url:
+                set_riot_base_url(config.riot_base_url)
+            # Enregistrement / rejeu du trafic Riot
+            if config.riot_transport != "live":
+                set_riot_transport(transport_from_config(config))
             
             # Configurer le signal de log pour une exécution thread-safe
             self.log_signal.connect(self._log_internal, Qt.QueuedConnection)
@@ -99,6 +138,11 @@ class Service(QObject):
             # Marquer qu'un service est en cours d'exécution globalement
             Service._any_service_running = True
             
+            # Démarrage / arrêt du client de jeu ou d'OBS : les attentes de la session revérifient aussitôt
+            self.processes.log = self.log
+            self.processes.add_listener(self.wake_session)
+            self.processes.start()
+            
             # Initialize OBS manager
             try:
                 self.log("Initializing OBS manager", "INFO")
@@ -110,10 +154,51 @@ class Service(QObject):
                     log_callback=self.log
                 )
                 self.log("OBS Manager initialized successfully", "SUCCESS")
+                # État de la sortie poussé par OBS (StreamStateChanged)
+                self.obs_manager.on_stream_state = self.on_obs_stream_state
+                self.obs_manager.on_connected = self.prepare_obs_bundles
+                self.obs_manager.configure_health(self.config.health_sample_interval,
+                                                  self.config.adaptive_bitrate, self.config.min_bitrate)
+                # Connexion websocket ouverte d'avance et maintenue entre les parties
+                self.obs_manager.start_session()
             except Exception as obs_e:
                 self.log(f"Warning: Failed to initialize OBS manager: {str(obs_e)}", "WARNING")
                 # Continue despite error
             
+            # Démarrer la boucle asyncio partagée avant les premières requêtes
+            self.runtime.start()
+            
+            # Amorcer le cache d'identités avec les comptes déjà résolus dans settings.json
+            # (pas contre un serveur de substitution, dont les PUUID sont différents)
+            if self.config.riot_transport != "live":
+                self.log(f"Riot API transport: {self.config.riot_transport} "
+                         f"({self.config.riot_cassette or 'default cassette'})", "WARNING")
+            if get_riot_base_url():
+                self.log(f"Using Riot API stand-in at {get_riot_base_url()}", "WARNING")
+            else:
+                try:
+                    seeded = get_identity_cache().seed_from_config(self.config)
+                    if seeded:
+                        self.log(f"Identity cache seeded with {seeded} account(s) from settings", "INFO")
+                except Exception as cache_e:
+                    self.log(f"Warning: Failed to seed identity cache: {str(cache_e)}", "WARNING")
+            
+            # Rafraîchir rangs et comptes en tâche de fond (file maintenance)
+            try:
+                self.stats_refresher = StatsRefresher(self.config, self.stats_updated.emit, self.log)
+                self.stats_future = self.runtime.submit(self.stats_refresher.run())
+            except Exception as stats_e:
+                self.log(f"Warning: Failed to start stats refresher: {str(stats_e)}", "WARNING")
+            
+            # Pré-chauffer DNS/TLS vers les hôtes Riot pendant le démarrage
+            if self.config.riot_api_key:
+                try:
+                    regions = {player.region for player in self.config.players.values() if player.enabled}
+                    prewarm_riot_clients(self.config.riot_api_key, regions)
+                    self.log(f"Prewarming Riot API connections for regions: {', '.join(sorted(regions)) or 'none'}", "INFO")
+                except Exception as warm_e:
+                    self.log(f"Warning: Failed to prewarm Riot API connections: {str(warm_e)}", "WARNING")
+            
             # Start game checker thread with enhanced protection
             self.log("Starting game checker thread...", "INFO")
             
@@ -165,21 +250,17 @@ class Service(QObject):
         if self.game_checker:
             try:
                 self.game_checker.running = False  # Signal thread to stop
+                self.session.cancel()  # Réveille immédiatement toutes ses attentes
+                self.game_checker.cancel_sweep()
                 self.game_checker.wait(1000)  # Wait up to 1 second
                 self.game_checker = None
                 self.log("Game checker thread stopped", "INFO")
             except Exception as e:
                 self.log(f"Error stopping game checker: {str(e)}", "ERROR")
+        
+        self.stop_stats_refresher()
             
-        # Disconnect from OBS
-        if self.obs_manager:
-            try:
-                self.obs_manager.disconnect()
-                self.log("Disconnected from OBS", "INFO")
-            except Exception as e:
-                self.log(f"Error disconnecting from OBS: {str(e)}", "ERROR")
-            
-        # Stop streaming if active
+        # Stop streaming if active (avant la déconnexion : arrête aussi la sortie OBS)
         if self.isStreaming:
             try:
                 self.stop_streaming()
@@ -188,8 +269,33 @@ class Service(QObject):
                 self.log(f"Error stopping streaming: {str(e)}", "ERROR")
             self.active_stream = None
             
+        # Disconnect from OBS
+        if self.obs_manager:
+            try:
+                self.obs_manager.stop_session()
+                self.obs_manager.disconnect()
+                self.log("Disconnected from OBS", "INFO")
+            except Exception as e:
+                self.log(f"Error disconnecting from OBS: {str(e)}", "ERROR")
+        
+        self.processes.remove_listener(self.wake_session)
+        self.processes.stop()
+        
+        # Nouvelle session pour les actions manuelles et le prochain démarrage
+        self.session = StreamSession(self.log)
+            
         self.log("Service stopped", "SUCCESS")
 
+    def wake_session(self):
+        """Make the current stream session re-check its waits (process started or exited)"""
+        self.session.wake()
+
+    def stop_stats_refresher(self):
+        """Cancel the background stats refresh task"""
+        if self.stats_future is not None:
+            self.stats_future.cancel()
+            self.stats_future = None
+
     def get_league_locale(self, league_path):
         """Get locale from League client settings"""
         try:
@@ -244,13 +350,9 @@ class Service(QObject):
             # Configure OBS for streaming
             if self.obs_manager:
                 try:
-                    # Configure OBS with stream key
-                    self.log(f"[STREAM-OBS1] Configuring OBS for streaming", "INFO")
-                    self.obs_manager.set_stream_key(stream_key)
-                    
-                    # Start streaming in OBS
-                    self.log(f"[STREAM-OBS2] Starting OBS streaming", "INFO")
-                    self.obs_manager.start_streaming()
+                    # Player bundle and start in one request batch, then wait for StreamStateChanged
+                    self.log(f"[STREAM-OBS1] Configuring OBS and starting the stream output", "INFO")
+                    self.obs_manager.start_streaming(bundle=self.bundles.get(player_name, player_config))
                     
                     self.log(f"[STREAM-OBS3] OBS streaming started successfully", "SUCCESS")
                 except Exception as e:
@@ -273,6 +375,35 @@ class Service(QObject):
             self.log(f"[STREAM-TRACE] {traceback.format_exc()}", "ERROR")
             return False
 
+    def switch_streaming(self, player_name: str, player_config: 'PlayerConfig') -> bool:
+        """Move the live stream to another player without going through stop/start.
+
+        The OBS output is only restarted when the new player streams to
+        another channel (different stream key).
+        """
+        try:
+            if not self.isStreaming:
+                return self.start_streaming(player_name, player_config)
+            
+            old_name = self.active_stream[0] if self.active_stream else None
+            old_config = self.config.players.get(old_name) if old_name else None
+            stream_key = getattr(player_config, 'stream_key', '')
+            if not stream_key:
+                self.log(f"[STREAM-ERR] No stream key configured for {player_name}", "ERROR")
+                return False
+            
+            if self.obs_manager:
+                # Une seule requête groupée, sauf si la clé ou le profil imposent de relancer la sortie
+                self.log(f"[STREAM-SWITCH] Moving OBS output from {old_name} to {player_name}", "INFO")
+                self.obs_manager.switch_streaming(self.bundles.get(player_name, player_config))
+            
+            self.active_stream = (player_name, player_config.channel_name)
+            self.log(f"[STREAM-SWITCH] Now streaming {player_name} on {player_config.channel_name}", "SUCCESS")
+            return True
+        except Exception as e:
+            self.log(f"[STREAM-ERR] Error switching stream to {player_name}: {str(e)}", "ERROR")
+            return False
+
     def stop_streaming(self):
         """Stop streaming"""
         try:
@@ -290,6 +421,8 @@ class Service(QObject):
                     pass
                 
             self.log(f"[STOPSTREAM-002] Stopping stream for {stream_info}", "INFO")
+            if self.session.state not in (IDLE, ENDING):
+                self.session.transition(ENDING, "stream stopped")
             
             # Reset streaming state
             try:
@@ -302,6 +435,14 @@ class Service(QObject):
                 self.log(f"[STOPSTREAM-003] Streaming state reset from {old_state} to {self.isStreaming}", "DEBUG")
             except Exception as e:
                 self.log(f"[STOPSTREAM-ERR1] Error resetting streaming state: {str(e)}", "ERROR")
+            
+            # Stop the OBS stream output
+            if self.obs_manager and self.obs_manager.stream_active:
+                try:
+                    self.obs_manager.stop_streaming()
+                    self.log("[STOPSTREAM-OBS] OBS stream output stopped", "INFO")
+                except Exception as e:
+                    self.log(f"[STOPSTREAM-ERR3] Error stopping OBS stream output: {str(e)}", "ERROR")
                 
             # Kill any League process if running
             try:
@@ -313,6 +454,7 @@ class Service(QObject):
                 import traceback
                 self.log(f"[STOPSTREAM-TRACE] {traceback.format_exc()}", "ERROR")
                 
+            self.session.end()
             self.log("[STOPSTREAM-006] Stream stopped successfully", "SUCCESS")
             return True
             
@@ -322,8 +464,30 @@ class Service(QObject):
             self.log(f"[STOPSTREAM-TRACE] {traceback.format_exc()}", "ERROR")
             return False
 
-    def kill_league_game(self):
-        """Kill the League game process"""
+    def on_obs_stream_state(self, active: bool, state: str):
+        """StreamStateChanged pushed by OBS (websocket reader thread)"""
+        self.log(f"OBS stream output {'started' if active else 'stopped'} ({state})", "DEBUG")
+        # Hors LIVE (préemption en cours), l'arrêt de la sortie est voulu
+        if not active and self.isStreaming and self.session.state == LIVE:
+            name = self.active_stream[0] if self.active_stream else "unknown"
+            self.log(f"OBS stream output stopped while streaming {name}", "WARNING")
+
+    def prepare_obs_bundles(self):
+        """Validate and cache every player's OBS bundle against the connected OBS"""
+        inventory = self.obs_manager.fetch_inventory()
+        self.bundles.set_inventory(inventory)
+        count = self.bundles.prepare_all()
+        self.log(f"Prepared OBS bundles for {count} player(s) ({len(inventory.scenes)} scenes, "
+                 f"{len(inventory.profiles)} profiles in OBS)", "INFO")
+
+    def stream_health(self) -> Optional[Dict[str, Any]]:
+        """Health of the live stream (see StreamHealth.summary), None when unknown"""
+        if not self.obs_manager or not self.isStreaming:
+            return None
+        return self.obs_manager.health.summary()
+
+    def kill_league_game(self, pid: Optional[int] = None):
+        """Kill the League game process (only the one with `pid` when given)"""
         try:
             self.log("[KILL-001] Attempting to kill League game process", "INFO")
             
@@ -331,14 +495,14 @@ class Service(QObject):
             killed = False
             
             try:
-                for proc in psutil.process_iter():
+                for game_pid in self.processes.pids(GAME_CLIENT_NAME):
                     try:
-                        if proc.name() == "League of Legends.exe":
+                        if pid is None or game_pid == pid:
                             found = True
-                            self.log(f"[KILL-002] Found League process, PID: {proc.pid}", "INFO")
-                            proc.kill()
+                            self.log(f"[KILL-002] Found League process, PID: {game_pid}", "INFO")
+                            self.processes.kill(game_pid)
                             killed = True
-                            self.log(f"[KILL-003] Successfully killed League process {proc.pid}", "SUCCESS")
+                            self.log(f"[KILL-003] Successfully killed League process {game_pid}", "SUCCESS")
                             break
                     except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
                         self.log(f"[KILL-ERR1] Access error for process: {str(e)}", "WARNING")
@@ -449,32 +613,32 @@ class Service(QObject):
             self.log(f"Error checking if OBS is running: {str(e)}", "ERROR")
             return False
 
-    def launch_obs(self):
-        """Launch OBS"""
+    def launch_obs(self) -> Optional[Future]:
+        """Launch OBS if needed; Future resolving once its websocket accepts connections"""
         if not self.obs_manager:
             self.log("OBS manager not initialized", "ERROR")
-            return
-            
-        try:
-            self.obs_manager.launch_obs()
-        except Exception as e:
-            self.log(f"Error launching OBS: {str(e)}", "ERROR")
+            return None
+        return self.obs_manager.launch_obs()
 
-    def connect_obs(self):
-        """Connect to OBS websocket"""
+    def connect_obs(self) -> bool:
+        """Connect to OBS websocket (immediate when the persistent session is up)"""
         if not self.obs_manager:
             self.log("OBS manager not initialized", "ERROR")
-            return
+            return False
             
         try:
+            # Paramètres éventuellement modifiés dans les réglages
+            self.obs_manager.set_connection(self.config.obs_host, self.config.obs_port, self.config.obs_password)
             self.obs_manager.connect()
+            return True
         except Exception as e:
             self.log(f"Error connecting to OBS: {str(e)}", "ERROR")
+            return False
 
     def is_league_game_running(self) -> bool:
         """Check if League game process is running"""
         try:
-            return "League of Legends.exe" in (p.name() for p in psutil.process_iter())
+            return self.processes.running(GAME_CLIENT_NAME)
         except Exception as e:
             self.log(f"Error checking if League game is running: {str(e)}", "ERROR")
             return False
@@ -502,42 +666,18 @@ class Service(QObject):
             # Vérifier si le processus s'est lancé correctement
             self.log(f"Process started with PID: {process.pid}", "SUCCESS")
             
-            # Attendre un court instant pour voir si le processus démarre bien
-            # Le processus parent terminera rapidement car "start" lance un nouveau processus
-            time.sleep(2)
-            
-            # Vérifier si League of Legends.exe est en cours d'exécution
-            lol_running = False
-            try:
-                for proc in psutil.process_iter(['pid', 'name']):
-                    if proc.info['name'] == "League of Legends.exe":
-                        lol_running = True
-                        self.log(f"League of Legends.exe is running with PID: {proc.info['pid']}", "SUCCESS")
-                        break
-            except Exception as e:
-                self.log(f"Error checking for League process: {e}", "WARNING")
-            
-            if lol_running:
+            # Le processus parent terminera rapidement car "start" lance un nouveau processus :
+            # attendre que League of Legends.exe apparaisse (7 s au plus)
+            if self.session.wait_for(self.is_league_game_running, timeout=7, interval=0.5):
                 self.log("League of Legends client successfully launched", "SUCCESS")
                 return True
-            else:
-                # Le processus start peut s'être terminé, mais LoL peut encore être en train de démarrer
-                self.log("Start command completed, checking if League of Legends is starting...", "INFO")
-                
-                # Attendre un peu plus longtemps
-                time.sleep(5)
-                
-                # Vérifier à nouveau
-                for proc in psutil.process_iter(['pid', 'name']):
-                    if proc.info['name'] == "League of Legends.exe":
-                        lol_running = True
-                        self.log(f"League of Legends.exe is now running with PID: {proc.info['pid']}", "SUCCESS")
-                        return True
-                
-                # Si toujours pas en cours d'exécution, c'est un échec
-                self.log("League of Legends client failed to start", "ERROR")
-                return False
+            
+            # Si toujours pas en cours d'exécution, c'est un échec
+            self.log("League of Legends client failed to start", "ERROR")
+            return False
                 
+        except SessionCancelled:
+            raise
         except Exception as e:
             self.log(f"Error launching spectate client: {str(e)}", "ERROR")
             import traceback
@@ -587,16 +727,10 @@ class Service(QObject):
                     os.system(f'"{batch_path}"')  # Exécuter directement, pas avec start
                     self.log("Batch file execution completed", "SUCCESS")
                     
-                    # Attendre un peu pour que le processus démarre
-                    time.sleep(5)
-                    
-                    # Vérifier si League of Legends.exe est en cours d'exécution
-                    lol_running = False
-                    for proc in psutil.process_iter(['pid', 'name']):
-                        if proc.info['name'] == "League of Legends.exe":
-                            lol_running = True
-                            self.log(f"League of Legends.exe is running with PID: {proc.info['pid']}", "SUCCESS")
-                            break
+                    # Attendre que le processus démarre (5 s au plus)
+                    lol_running = self.session.wait_for(self.is_league_game_running, timeout=5, interval=0.5)
+                    if lol_running:
+                        self.log("League of Legends.exe is running", "SUCCESS")
                     
                     # Supprimer le fichier temporaire
                     try:
@@ -638,16 +772,13 @@ class Service(QObject):
             
             # Lister tous les processus liés à League of Legends
             lol_processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+            for pid, name in self.processes.find(lambda name: 'league' in name.lower() or 'lol' in name.lower()):
                 try:
-                    proc_info = proc.info
-                    proc_name = proc_info['name'].lower() if proc_info['name'] else ""
-                    if 'league' in proc_name or 'lol' in proc_name:
-                        lol_processes.append({
-                            'pid': proc_info['pid'],
-                            'name': proc_info['name'],
-                            'cmdline': proc_info['cmdline']
-                        })
+                    lol_processes.append({
+                        'pid': pid,
+                        'name': name,
+                        'cmdline': psutil.Process(pid).cmdline()
+                    })
                 except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                     pass
                 
@@ -682,11 +813,15 @@ class Service(QObject):
         if hasattr(self, 'game_checker') and self.game_checker and self.game_checker.isRunning():
             self.log("Stopping game checker thread...", "INFO")
             self.game_checker.running = False
+            self.session.cancel()
+            self.game_checker.cancel_sweep()
             self.game_checker.wait(5000)  # Attendre max 5 secondes
             if self.game_checker.isRunning():
                 self.log("Force terminating game checker thread", "WARNING")
                 self.game_checker.terminate()
         
+        self.stop_stats_refresher()
+        
         # Arrêter le streaming s'il est en cours
         if self.isStreaming:
             try:
@@ -699,10 +834,27 @@ class Service(QObject):
         if hasattr(self, 'obs_manager') and self.obs_manager:
             try:
                 self.log("Closing OBS connection...", "INFO")
+                self.obs_manager.stop_session()
                 self.obs_manager.disconnect()
             except Exception as e:
                 self.log(f"Error disconnecting from OBS: {str(e)}", "ERROR")
         
+        self.processes.remove_listener(self.wake_session)
+        self.processes.stop()
+        
+        # Fermer les connexions HTTP persistantes vers l'API Riot (et la cassette éventuelle)
+        try:
+            close_riot_clients()
+            set_riot_transport(None)
+        except Exception as e:
+            self.log(f"Error closing Riot API connections: {str(e)}", "ERROR")
+        
+        # Arrêter la boucle asyncio partagée (annule les coroutines restantes)
+        try:
+            self.runtime.stop()
+        except Exception as e:
+            self.log(f"Error stopping async runtime: {str(e)}", "ERROR")
+        
         self.log("Service shutdown complete", "INFO")
 
     def kill_league_processes(self):
@@ -710,13 +862,12 @@ class Service(QObject):
         killed = []
         
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
+            # Vérifier si c'est un processus League
+            for pid, name in self.processes.find(lambda name: "league" in name.lower() or name == GAME_CLIENT_NAME):
                 try:
-                    # Vérifier si c'est un processus League
-                    if "league" in proc.info['name'].lower() or proc.info['name'] == "League of Legends.exe":
-                        proc.kill()
-                        killed.append(proc.info['name'])
-                        self.log(f"Killed process: {proc.info['name']} (PID: {proc.info['pid']})", "INFO")
+                    self.processes.kill(pid)
+                    killed.append(name)
+                    self.log(f"Killed process: {name} (PID: {pid})", "INFO")
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     pass
         except Exception as e:
@@ -734,6 +885,22 @@ class SafeGameCheckerThread(QThread):
             super().__init__()
             self.service = service
             self.running = False
+            # Un LeagueAPI par (clé API, région), réutilisé d'un cycle à l'autre
+            self.apis = {}
+            # Échéancier des polls par joueur
+            self.scheduler = None
+            # Balayage en cours sur le runtime asyncio, annulé à l'arrêt
+            self.sweep_future = None
+            # PUUID -> joueur suivi, pour qu'une partie trouvée couvre tous ses participants
+            self.roster = RosterIndex()
+            # Session du service au démarrage du thread (annulée par Service.stop)
+            self.session = service.session
+            # Parties en cours des joueurs suivis (gameId -> game_info), candidates au relais
+            self.live_games = {}
+            # Détection de fin de la partie streamée
+            self.monitor = None
+            # Parties dont la préemption a échoué : pas de nouvelle tentative
+            self.failed_preemptions = set()
             
             # Connecter le signal aux méthodes du thread principal
             self.launch_spectate_signal.connect(self.service.launch_spectate_client, Qt.QueuedConnection)
@@ -741,12 +908,496 @@ class SafeGameCheckerThread(QThread):
         except Exception as e:
             print(f"[CRITICAL] Error initializing SafeGameCheckerThread: {str(e)}")
     
+    def cancel_sweep(self):
+        """Cancel the sweep running on the async runtime, if any"""
+        future = self.sweep_future
+        if future is not None:
+            future.cancel()
+
+    def get_api(self, region: str) -> LeagueAPI:
+        """Return the League API for a region, created once per API key"""
+        key = (self.service.config.riot_api_key, region)
+        api = self.apis.get(key)
+        if api is None:
+            api = LeagueAPI(api_key=key[0], region=region, lane=LANE_DETECTION)
+            api.set_logger(self.service.log)
+            self.apis[key] = api
+        return api
+
+    async def check_player(self, player_name: str, player_config: PlayerConfig) -> Dict[str, Any]:
+        """Return the active game of one player ({} when not in game)"""
+        async with self.lookup_slots:
+            self.service.log(f"Checking if {player_name} is in game", "INFO")
+            game_info = await self.get_api(player_config.region)._get_active_game_by_summoner(player_config.summoner_id)
+            if not game_info:
+                self.service.log(f"Player {player_name} is not in game", "INFO")
+            return game_info
+
+    async def prefilter_featured_games(self, players) -> Dict[str, Dict[str, Any]]:
+        """Match the roster against each region's featured games (one call per region)"""
+        regions = sorted({player_config.region for _, player_config in players})
+        responses = await asyncio.gather(
+            *(self.get_api(region)._get_featured_games() for region in regions),
+            return_exceptions=True
+        )
+        found = {}
+        for region, games in zip(regions, responses):
+            if isinstance(games, Exception):
+                self.service.log(f"Featured games unavailable for {region}: {str(games)}", "WARNING")
+                continue
+            found.update(self.roster.match_featured(games, region))
+        return found
+
+    async def sweep_active_games(self, players, exhaustive: bool = False) -> Optional[Tuple[str, PlayerConfig, Dict[str, Any]]]:
+        """Check all players concurrently and return the player to stream.
+
+        `players` is sorted by priority. The featured games of each region are
+        checked first; only the players not found there get their own lookup.
+        Each game found answers for every tracked participant in it: their
+        lookups are cancelled and their polls skipped until the game ends.
+        With the "priority" preference, as soon as a player is confirmed in
+        game and every player before them is confirmed idle, the lookups still
+        running are cancelled. With "most_players", every lookup completes and
+        the game with the most tracked players wins. `exhaustive` completes
+        every lookup and only refreshes the games in progress (while streaming).
+        """
+        self.lookup_slots = asyncio.Semaphore(MAX_CONCURRENT_LOOKUPS)
+        most_players = self.service.config.stream_preference == "most_players"
+        short_circuit = not most_players and not exhaustive
+        index_by_name = {player_name: index for index, (player_name, _) in enumerate(players)}
+        
+        # None = en attente, False = pas en partie, dict = partie trouvée
+        results = [False] * len(players)
+        tasks = {}
+        task_by_index = {}
+        pending = set()
+        
+        def game_found(player_name, game_info):
+            self.live_games[game_info['gameId']] = game_info
+            # Les autres joueurs suivis de cette partie n'ont pas besoin de leur propre lookup
+            region = self.service.config.players[player_name].region
+            participants = self.roster.tracked_participants(game_info, region)
+            if self.scheduler:
+                self.scheduler.record_game(player_name, game_info, participants)
+            for other in participants:
+                other_index = index_by_name.get(other)
+                if other_index is None or results[other_index]:
+                    continue
+                results[other_index] = game_info
+                other_task = task_by_index.get(other_index)
+                if other_task in pending:
+                    pending.discard(other_task)
+                    other_task.cancel()
+            if len(participants) > 1:
+                self.service.log(f"Game {game_info['gameId']} covers {len(participants)} tracked players: "
+                                 f"{', '.join(participants)}", "INFO")
+        
+        featured = await self.prefilter_featured_games(players)
+        if featured:
+            self.service.log(f"{len(featured)} tracked player(s) found in featured games", "INFO")
+        
+        for index, (player_name, player_config) in enumerate(players):
+            if player_name in featured:
+                continue
+            if not player_config.summoner_id:
+                self.service.log(f"No summoner ID for {player_name}", "WARNING")
+                continue
+            task = asyncio.ensure_future(self.check_player(player_name, player_config))
+            tasks[task] = index
+            task_by_index[index] = task
+            results[index] = None
+        pending.update(tasks)
+        
+        # Le joueur le plus prioritaire de chaque partie en devient le propriétaire
+        for index, (player_name, _) in enumerate(players):
+            game_info = featured.get(player_name)
+            if not game_info or results[index]:
+                continue
+            if self.scheduler:
+                self.scheduler.record_result(player_name, True, game_id=game_info['gameId'])
+            results[index] = game_info
+            game_found(player_name, game_info)
+        
+        try:
+            while True:
+                if short_circuit:
+                    # Le premier joueur (par priorité) non idle décide du résultat
+                    for index, game_info in enumerate(results):
+                        if game_info is None:
+                            break
+                        if game_info:
+                            return self.stream_target(game_info, *players[index])
+                if not pending:
+                    break
+                
+                done, pending_left = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.intersection_update(pending_left)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    player_name = players[tasks[task]][0]
+                    try:
+                        game_info = task.result()
+                    except Exception as e:
+                        self.service.log(f"Error checking {player_name}: {str(e)}", "ERROR")
+                        if self.scheduler:
+                            self.scheduler.record_error(player_name)
+                        results[tasks[task]] = False
+                        continue
+                    in_game = bool(game_info and game_info.get('gameId'))
+                    if self.scheduler:
+                        self.scheduler.record_result(player_name, in_game,
+                                                     game_id=game_info.get('gameId') if in_game else None)
+                    results[tasks[task]] = game_info if in_game else False
+                    if in_game:
+                        game_found(player_name, game_info)
+            
+            if exhaustive:
+                # Seule la liste des parties en cours (live_games / scheduler) est utile ici
+                return None
+            if most_players:
+                return self.pick_most_players_game(results, players)
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.service.log(f"Cancelled {len(pending)} lower-priority lookup(s)", "DEBUG")
+            # Laisser les tâches annulées (joueurs couverts ou moins prioritaires) se terminer proprement
+            unfinished = [task for task in tasks if not task.done()]
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+    def stream_target(self, game_info: Dict[str, Any], player_name: str,
+                      player_config: PlayerConfig) -> Tuple[str, PlayerConfig, Dict[str, Any]]:
+        """Pick the highest-priority tracked player of a game as the stream target"""
+        players = self.service.config.players
+        candidates = [name for name in self.roster.tracked_participants(game_info, player_config.region)
+                      if name in players]
+        if candidates:
+            best = min(candidates, key=lambda name: players[name].priority)
+            if players[best].priority < player_config.priority:
+                player_name, player_config = best, players[best]
+        self.service.log(f"Found active game for {player_name}: Game ID {game_info['gameId']}", "SUCCESS")
+        return player_name, player_config, game_info
+
+    def pick_most_players_game(self, results, players) -> Optional[Tuple[str, PlayerConfig, Dict[str, Any]]]:
+        """Among the games found, pick the one with the most tracked players (ties: best priority)"""
+        games = {}
+        for index, game_info in enumerate(results):
+            if game_info and game_info['gameId'] not in games:
+                games[game_info['gameId']] = (game_info, index)
+        if not games:
+            return None
+        
+        config_players = self.service.config.players
+        
+        def score(entry):
+            game_info, index = entry
+            region = players[index][1].region
+            names = [name for name in self.roster.tracked_participants(game_info, region) if name in config_players]
+            best_priority = min([config_players[name].priority for name in names] or [players[index][1].priority])
+            return (-max(1, len(names)), best_priority)
+        
+        game_info, index = min(games.values(), key=score)
+        return self.stream_target(game_info, *players[index])
+
+    def start_stream_for(self, player_name: str, player_config: PlayerConfig, game_info: Dict[str, Any]) -> bool:
+        """Launch the spectator client and start streaming a game that was found.
+
+        Drives the stream session through DETECTED, LAUNCHING_CLIENT,
+        CLIENT_READY, OBS_READY and LIVE; any failure goes back to IDLE
+        through ENDING. Raises SessionCancelled when the service stops.
+        """
+        session = self.session
+        game_id = game_info.get('gameId')
+        if not game_id:
+            self.service.log(f"Invalid game info returned for {player_name}", "ERROR")
+            return False
+        
+        # Check if League path is configured
+        if not self.service.config.league_path or not os.path.exists(self.service.config.league_path):
+            self.service.log("League path is not correctly configured", "ERROR")
+            return False
+        
+        session.player_name = player_name
+        session.game_id = game_id
+        session.transition(DETECTED, f"{player_name}, game {game_id}")
+        # OBS ne dépend pas du client de jeu : le préparer pendant que le client se lance
+        obs_future = _bringup_executor.submit(self.prepare_obs)
+        obs_future.add_done_callback(lambda _: session.wake())
+        try:
+            if self.launch_client(player_name, player_config, game_info) and self.join_obs(obs_future):
+                # Start actual streaming
+                if self.service.start_streaming(player_name, player_config):
+                    session.transition(LIVE, player_name)
+                    self.watch_game_end(player_name, player_config, game_id)
+                    self.service.log(f"Successfully started streaming for {player_name}", "SUCCESS")
+                    self.service.log("Bring-up: " + ", ".join(
+                        f"{state} {seconds:.1f}s" for state, seconds in session.timeline()[:-1]), "INFO")
+                    return True
+                self.service.log(f"Failed to start streaming for {player_name}", "ERROR")
+                # Kill the game, the next sweep will pick a player again
+                self.service.kill_league_game()
+        except SessionCancelled:
+            session.end("service stopping")
+            raise
+        session.end("bring-up failed")
+        return False
+
+    def launch_client(self, player_name: str, player_config: PlayerConfig, game_info: Dict[str, Any],
+                      keep_pid: Optional[int] = None) -> bool:
+        """LAUNCHING_CLIENT -> CLIENT_READY: start the spectator and wait for the game client.
+
+        `keep_pid` is the client still streamed during a preemption: only a
+        new League of Legends.exe counts as the client of this game.
+        """
+        session = self.session
+        game_id = game_info['gameId']
+        session.transition(LAUNCHING_CLIENT)
+        
+        # Lorsque vous obtenez le game_info du joueur, assurez-vous d'extraire la clé d'encryption
+        encryption_key = game_info.get('observers', {}).get('encryptionKey', game_id)
+        
+        # Créer la commande de spectate avec la clé d'encryption
+        spectate_cmd = self.get_api(player_config.region).create_spectate_command(
+            game_id=game_id, 
+            league_path=self.service.config.league_path,
+            encryption_key=encryption_key
+        )
+        
+        # Start spectating
+        self.service.log(f"Starting spectate with command: {spectate_cmd}", "INFO")
+        
+        # Launch directly without signal to avoid thread issues
+        success = self.service.launch_spectate_client(spectate_cmd)
+        
+        if not success:
+            session.check()
+            self.service.log("Failed to launch spectator. Trying alternative method...", "WARNING")
+            success = self.service.launch_spectate_client_alternative(spectate_cmd)
+            
+        if not success:
+            session.check()
+            self.service.log("All spectator launch methods failed", "ERROR")
+            return False
+        
+        # Wait for game client to start (up to 60 seconds)
+        self.service.log("Waiting for game client to start...", "INFO")
+        exclude = [keep_pid] if keep_pid else []
+        if not session.wait_for(lambda: find_game_client_pid(exclude) is not None, timeout=60, interval=0.5):
+            self.service.log("Timed out waiting for game client to start", "ERROR")
+            return False
+        
+        session.client_pid = find_game_client_pid(exclude)
+        # Le PID lancé par Popen est celui du shell "start" : suivre le client de jeu lui-même
+        if session.client_pid is not None:
+            self.service.processes.track(session.client_pid)
+        self.service.log(f"League game client detected (PID {session.client_pid})", "SUCCESS")
+        session.transition(CLIENT_READY)
+        return True
+
+    def prepare_obs(self) -> bool:
+        """Launch OBS if needed and connect its websocket (runs beside launch_client)"""
+        session = self.session
+        obs_manager = self.service.obs_manager
+        if not obs_manager:
+            return True
+        started = time.monotonic()
+        if obs_manager.is_connected():
+            return True
+        
+        # Prêt dès que le websocket accepte l'authentification, sans attente fixe
+        ready = self.service.launch_obs()
+        ready.add_done_callback(lambda _: session.wake())
+        session.wait_for(ready.done)
+        try:
+            ready.result()
+        except Exception as e:
+            self.service.log(f"OBS is not ready: {str(e)}", "ERROR")
+            return False
+        self.service.log(f"Connected to OBS in {time.monotonic() - started:.1f}s", "SUCCESS")
+        return True
+
+    def join_obs(self, obs_future) -> bool:
+        """CLIENT_READY -> OBS_READY: wait for the OBS preparation started at DETECTED"""
+        session = self.session
+        self.service.log(f"Setting up streaming for {session.player_name}", "INFO")
+        if not obs_future.done():
+            self.service.log("Game client ready, waiting for OBS...", "INFO")
+        if not session.wait_for(obs_future.done, timeout=OBS_READY_TIMEOUT):
+            self.service.log("Timed out waiting for OBS", "ERROR")
+            return False
+        try:
+            obs_ready = obs_future.result()
+        except SessionCancelled:
+            raise
+        except Exception as e:
+            self.service.log(f"Error preparing OBS: {str(e)}", "ERROR")
+            obs_ready = False
+        # Comme avant, un échec OBS n'empêche pas la tentative de start_streaming
+        session.transition(OBS_READY, "" if obs_ready else "OBS not connected")
+        return True
+
+    def watch_game_end(self, player_name: str, player_config: PlayerConfig, game_id: int):
+        """Start monitoring the end of the game now streamed"""
+        self.close_monitor()
+        api = self.get_api(player_config.region)
+        self.monitor = GameEndMonitor(
+            game_id,
+            self.session.client_pid,
+            lambda: self.service.runtime.submit(api._get_active_game_by_summoner(player_config.summoner_id)),
+            self.service.log
+        )
+
+    def close_monitor(self):
+        if self.monitor is not None:
+            self.monitor.close()
+            self.monitor = None
+
+    def watch_live_game(self, timeout: float) -> Optional[str]:
+        """Wait up to `timeout` for the streamed game to end; returns why it ended"""
+        monitor = self.monitor
+        if monitor is None:
+            # Stream lancé hors de la machine à états : attendre seulement son arrêt
+            self.session.wait_for(lambda: not self.service.isStreaming, timeout=timeout)
+            return None
+        
+        reasons = []
+        
+        def ended():
+            if not self.service.isStreaming:
+                return True
+            reason = monitor.poll()
+            if reason:
+                reasons.append(reason)
+            return bool(reason)
+        
+        self.session.wait_for(ended, timeout=timeout, interval=1)
+        if not self.service.isStreaming:
+            # Arrêté depuis l'interface ou par le service
+            self.close_monitor()
+        return reasons[0] if reasons else None
+
+    def handoff(self, reason: str):
+        """Stop the stream of the game that ended and go live on the next game in progress"""
+        ended_game = self.session.game_id
+        self.service.log(f"Streamed game {ended_game} ended: {reason}", "SUCCESS")
+        self.close_monitor()
+        self.service.stop_streaming()
+        if ended_game:
+            self.scheduler.record_game_end(ended_game)
+            self.live_games.pop(ended_game, None)
+        
+        for player_name, player_config, game_info in self.handoff_candidates():
+            # Vérification rapide (en général servie par le cache des parties actives)
+            current = self.service.runtime.run(
+                self.get_api(player_config.region)._get_active_game_by_summoner(player_config.summoner_id))
+            if current and current.get('gameId') == game_info['gameId']:
+                self.service.log(f"Handing off to {player_name} (game {game_info['gameId']})", "INFO")
+                self.start_stream_for(player_name, player_config, current)
+                return
+            if current is not None:
+                self.scheduler.record_result(player_name, bool(current), game_id=(current or {}).get('gameId'))
+            self.live_games.pop(game_info['gameId'], None)
+        self.service.log("No other tracked game in progress, back to polling", "INFO")
+
+    def preemption_candidate(self) -> Optional[Tuple[str, PlayerConfig, Dict[str, Any], str]]:
+        """Best-priority game worth interrupting the current stream for, with the reason"""
+        session = self.session
+        players = self.service.config.players
+        current = players.get(session.player_name or "")
+        if session.state != LIVE or current is None:
+            return None
+        current_game = self.live_games.get(session.game_id)
+        candidates = [candidate for candidate in self.handoff_candidates()
+                      if candidate[2]['gameId'] != session.game_id
+                      and candidate[2]['gameId'] not in self.failed_preemptions]
+        for player_name, player_config, game_info in sorted(candidates, key=lambda candidate: candidate[1].priority):
+            reason = preemption_reason(current, session.time_in_state(), current_game, player_config, game_info)
+            if reason:
+                return player_name, player_config, game_info, reason
+            # Le meilleur candidat ne suffit pas : les suivants non plus
+            break
+        return None
+
+    def preempt(self, player_name: str, player_config: PlayerConfig, game_info: Dict[str, Any], reason: str) -> bool:
+        """Switch the live stream to a higher-priority game.
+
+        The new client is started while the current one is still streamed,
+        the OBS output is moved over, and only then is the old client killed.
+        On failure the current stream goes on untouched.
+        """
+        session = self.session
+        old_name, old_game, old_pid = session.player_name, session.game_id, session.client_pid
+        game_id = game_info['gameId']
+        self.service.log(f"Preempting {old_name} for {player_name} (game {game_id}): {reason}", "INFO")
+        self.close_monitor()
+        session.transition(DETECTED, f"preempting {old_name} for {player_name}, game {game_id}")
+        session.player_name = player_name
+        session.game_id = game_id
+        try:
+            if self.launch_client(player_name, player_config, game_info, keep_pid=old_pid):
+                # OBS est déjà connecté et diffuse le stream en cours
+                session.transition(OBS_READY)
+                if self.service.switch_streaming(player_name, player_config):
+                    session.transition(LIVE, player_name)
+                    if old_pid:
+                        self.service.kill_league_game(pid=old_pid)
+                    self.watch_game_end(player_name, player_config, game_id)
+                    self.service.log(f"Switched stream from {old_name} to {player_name}", "SUCCESS")
+                    return True
+        except SessionCancelled:
+            raise
+        except Exception as e:
+            self.service.log(f"Error during preemption: {str(e)}", "ERROR")
+        
+        # Échec : fermer le nouveau client éventuel et rester sur le stream en cours
+        self.failed_preemptions.add(game_id)
+        if session.client_pid and session.client_pid != old_pid:
+            self.service.kill_league_game(pid=session.client_pid)
+        session.transition(LIVE, "preemption aborted")
+        session.player_name, session.game_id, session.client_pid = old_name, old_game, old_pid
+        old_config = self.service.config.players.get(old_name)
+        if old_config is not None:
+            self.watch_game_end(old_name, old_config, old_game)
+        self.service.log(f"Preemption failed, staying on {old_name}", "WARNING")
+        return False
+
+    def handoff_candidates(self) -> List[Tuple[str, PlayerConfig, Dict[str, Any]]]:
+        """Games in progress, best first, each with the player to stream"""
+        players = self.service.config.players
+        in_progress = self.scheduler.games_in_progress()
+        # Oublier les parties que plus aucun joueur suivi ne joue
+        self.live_games = {game_id: game_info for game_id, game_info in self.live_games.items()
+                           if game_id in in_progress}
+        self.failed_preemptions &= set(in_progress)
+        most_players = self.service.config.stream_preference == "most_players"
+        candidates = []
+        for game_id, names in in_progress.items():
+            names = [name for name in names if name in players]
+            if names and game_id in self.live_games:
+                best = players[names[0]].priority
+                key = (-len(names), best) if most_players else (best, -len(names))
+                candidates.append((key, names[0], game_id))
+        candidates.sort()
+        return [(name, players[name], self.live_games[game_id]) for _, name, game_id in candidates]
+
     def run(self):
         """Functional implementation that checks for active games and starts streaming"""
         try:
             self.service.log("Game checker thread starting", "INFO")
             self.running = True
+            self.session = session = self.service.session
             start_time = time.time()
+            error_delay = 5
+            
+            config = self.service.config
+            self.scheduler = PollScheduler(
+                base_interval=config.poll_base_interval,
+                max_interval=config.poll_max_interval,
+                requests_per_second=config.riot_requests_per_second
+            )
             
             # Main service loop
             while self.running:
@@ -762,156 +1413,100 @@ class SafeGameCheckerThread(QThread):
                         self.service.log("Game checker thread still active (hourly check)", "INFO")
                         start_time = current_time
                     
-                    # Skip if already streaming
-                    if self.service.isStreaming:
-                        self.service.log("Already streaming, skipping check", "DEBUG")
-                        time.sleep(10)  # Check less frequently when streaming
-                        continue
+                    # Pendant un stream : surveiller la fin de la partie jusqu'au prochain poll dû,
+                    # puis continuer les polls pour garder la liste des parties candidates à jour
+                    streaming = self.service.isStreaming
+                    self.scheduler.set_streaming(streaming)
+                    if streaming:
+                        reason = self.watch_live_game(max(1, min(self.scheduler.seconds_until_next(), 30)))
+                        if reason:
+                            self.handoff(reason)
+                            continue
+                        if not self.service.isStreaming:
+                            continue
                     
                     self.service.log("Checking for active games...", "INFO")
                     
                     # Create API instance with configured API key
                     if not self.service.config.riot_api_key:
                         self.service.log("No Riot API key configured", "ERROR")
-                        time.sleep(30)  # Wait longer on error
+                        session.sleep(30)  # Wait longer on error
                         continue
                     
-                    # Get all enabled players sorted by priority
-                    enabled_players = [(name, player) for name, player in self.service.config.players.items() 
-                                      if player.enabled]
+                    # Suivre les joueurs activés/désactivés depuis le dernier cycle
+                    self.scheduler.sync_roster(self.service.config.players)
+                    self.roster.rebuild(self.service.config.players, get_identity_cache(get_riot_base_url()))
                     
-                    if not enabled_players:
+                    if not self.scheduler.states:
                         self.service.log("No enabled players configured", "WARNING")
-                        time.sleep(30)
+                        session.sleep(30)
+                        continue
+                    
+                    # Only the players whose poll is due, sorted by priority
+                    due_names = [name for name in self.scheduler.due_players()
+                                 if name in self.service.config.players]
+                    if not due_names:
+                        if not streaming:
+                            session.sleep(max(1, min(self.scheduler.seconds_until_next(), 30)))
+                        continue
+                    
+                    due_players = [(name, self.service.config.players[name]) for name in due_names]
+                    self.scheduler.begin_sweep()
+                    self.service.log(f"Polling {len(due_players)}/{len(self.scheduler.states)} player(s)", "INFO")
+                    
+                    # Check every due player concurrently, keep the highest-priority one in game
+                    # (en stream : tous les lookups vont au bout pour préparer la suite)
+                    self.sweep_future = self.service.runtime.submit(
+                        self.sweep_active_games(due_players, exhaustive=streaming))
+                    try:
+                        found = self.sweep_future.result()
+                    except CancelledError:
+                        self.service.log("Sweep cancelled", "DEBUG")
                         continue
+                    finally:
+                        self.sweep_future = None
                     
-                    # Sort by priority (lower number = higher priority)
-                    enabled_players.sort(key=lambda p: p[1].priority)
+                    if streaming:
+                        candidates = len(self.scheduler.games_in_progress()) - 1
+                        self.service.log(f"{max(0, candidates)} other game(s) ready for handoff", "DEBUG")
+                        preemption = self.preemption_candidate()
+                        if preemption:
+                            self.preempt(*preemption)
+                        continue
                     
-                    # Check each player for active games
-                    for player_name, player_config in enabled_players:
+                    if found:
+                        player_name, player_config, game_info = found
                         try:
-                            self.service.log(f"Checking if {player_name} is in game", "INFO")
-                            
-                            # Initialize League API for this player's region
-                            api = LeagueAPI(
-                                api_key=self.service.config.riot_api_key,
-                                region=player_config.region
-                            )
-                            api.set_logger(self.service.log)
-                            
-                            # Get the summoner ID
-                            summoner_id = player_config.summoner_id
-                            if not summoner_id:
-                                self.service.log(f"No summoner ID for {player_name}", "WARNING")
-                                continue
-                            
-                            # Get active game
-                            self.service.log(f"Checking active game for {summoner_id}", "INFO")
-                            game_info = api.get_active_game_by_summoner(summoner_id)
-                            
-                            if not game_info:
-                                self.service.log(f"Player {player_name} is not in game", "INFO")
-                                continue
-                                
-                            # Found active game!
-                            game_id = game_info.get('gameId')
-                            if not game_id:
-                                self.service.log(f"Invalid game info returned for {player_name}", "ERROR")
-                                continue
-                                
-                            self.service.log(f"Found active game for {player_name}: Game ID {game_id}", "SUCCESS")
-                            
-                            # Check if League path is configured
-                            if not self.service.config.league_path or not os.path.exists(self.service.config.league_path):
-                                self.service.log("League path is not correctly configured", "ERROR")
-                                continue
-                                
-                            # Lorsque vous obtenez le game_info du joueur, assurez-vous d'extraire la clé d'encryption
-                            encryption_key = game_info.get('observers', {}).get('encryptionKey', game_id)
-                            
-                            # Créer la commande de spectate avec la clé d'encryption
-                            spectate_cmd = api.create_spectate_command(
-                                game_id=game_id, 
-                                league_path=self.service.config.league_path,
-                                encryption_key=encryption_key
-                            )
-                            
-                            # Start spectating
-                            self.service.log(f"Starting spectate with command: {spectate_cmd}", "INFO")
-                            
-                            # Launch directly without signal to avoid thread issues
-                            success = self.service.launch_spectate_client(spectate_cmd)
-                            
-                            if not success:
-                                self.service.log("Failed to launch spectator. Trying alternative method...", "WARNING")
-                                success = self.service.launch_spectate_client_alternative(spectate_cmd)
-                                
-                            if not success:
-                                self.service.log("All spectator launch methods failed", "ERROR")
-                                continue
-                            
-                            # Wait for game client to start
-                            self.service.log("Waiting for game client to start...", "INFO")
-                            max_wait = 60  # Wait up to 60 seconds
-                            game_started = False
-                            
-                            for _ in range(max_wait):
-                                if self.service.is_league_game_running():
-                                    game_started = True
-                                    self.service.log("League game client detected", "SUCCESS")
-                                    break
-                                time.sleep(1)
-                                
-                            if not game_started:
-                                self.service.log("Timed out waiting for game client to start", "ERROR")
-                                continue
-                                
-                            # Start streaming for this player
-                            self.service.log(f"Setting up streaming for {player_name}", "INFO")
-                            
-                            # Connect to OBS if needed
-                            if self.service.obs_manager and not self.service.is_obs_running():
-                                self.service.log("Launching OBS...", "INFO")
-                                self.service.launch_obs()
-                                time.sleep(5)  # Wait for OBS to start
-                            
-                            if self.service.obs_manager:
-                                try:
-                                    self.service.connect_obs()
-                                    self.service.log("Connected to OBS", "SUCCESS")
-                                except Exception as e:
-                                    self.service.log(f"Failed to connect to OBS: {str(e)}", "ERROR")
-                            
-                            # Start actual streaming
-                            streaming_started = self.service.start_streaming(player_name, player_config)
-                            
-                            if streaming_started:
-                                self.service.log(f"Successfully started streaming for {player_name}", "SUCCESS")
-                                # Stream is now active, break out of player loop
-                                break
-                            else:
-                                self.service.log(f"Failed to start streaming for {player_name}", "ERROR")
-                                # Try to kill game and move to next player
-                                self.service.kill_league_game()
-                                
+                            self.start_stream_for(player_name, player_config, game_info)
+                        except SessionCancelled:
+                            raise
                         except Exception as e:
                             self.service.log(f"Error processing player {player_name}: {str(e)}", "ERROR")
                             import traceback
                             trace = traceback.format_exc()
                             self.service.log(f"Stack trace: {trace}", "ERROR")
-                            continue
+                    else:
+                        self.service.log("No tracked player is in game", "INFO")
                     
-                    # Wait before next check cycle
-                    self.service.log("Waiting before next check cycle", "INFO")
-                    time.sleep(30)  # Check every 30 seconds
+                    # Wait until the next player is due
+                    error_delay = 5
+                    wait = max(1, min(self.scheduler.seconds_until_next(), 30))
+                    self.service.log(f"Next poll in {wait:.0f}s", "DEBUG")
+                    session.sleep(wait)
                     
+                except SessionCancelled:
+                    break
                 except Exception as e:
                     self.service.log(f"Error in game checker loop: {str(e)}", "ERROR")
                     import traceback
                     trace = traceback.format_exc() 
                     self.service.log(f"Stack trace: {trace}", "ERROR")
-                    time.sleep(60)  # Wait longer on error
+                    # Backoff exponentiel au lieu d'une attente fixe de 60 s
+                    try:
+                        session.sleep(error_delay)
+                    except SessionCancelled:
+                        break
+                    error_delay = min(error_delay * 2, 60)
                     
         except Exception as e:
             self.service.log(f"Critical error in game checker thread: {str(e)}", "ERROR")
@@ -922,6 +1517,7 @@ class SafeGameCheckerThread(QThread):
         finally:
             self.service.log("Game checker thread stopping", "WARNING")
             self.running = False
+            self.close_monitor()
             
             # Clean up if thread is stopping
             if self.service.isStreaming:
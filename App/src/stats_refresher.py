@@ -0,0 +1,127 @@
+# stats_refresher.py
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import Config, PlayerConfig
+from league import LeagueAPI, LANE_MAINTENANCE
+
+# Attente quand tout le roster est à jour
+IDLE_CHECK_INTERVAL = 60
+
+# Délai avant de retenter un joueur dont le rafraîchissement a échoué
+RETRY_DELAY = 10 * 60
+
+
+def format_rank(player: PlayerConfig) -> str:
+    """Short rank label for the players table ("GOLD II · 45 LP", "Unranked", "—")"""
+    info = player.summoner_info or {}
+    if "statsUpdatedAt" not in info and not info.get("stats"):
+        return "—"
+    stats = info.get("stats")
+    if not stats:
+        return "Unranked"
+    return f"{stats['rank']} · {stats['lp']} LP"
+
+
+class StatsRefresher:
+    """Maintenance job that keeps summoner_info fresh for the whole roster.
+
+    Ranked stats (rank, LP, W/L) are refreshed once older than
+    config.stats_max_age, the account part of summoner_info once older than
+    config.summoner_info_max_age. Stored values stay in use until the new
+    ones arrive. Players are refreshed oldest first, in batches of
+    config.stats_batch_size whose requests are spread over
+    config.stats_batch_interval seconds, on the maintenance lane.
+    """
+
+    def __init__(self, config: Config, on_batch: Callable[[List[str]], None],
+                 log: Callable[[str, str], None] = lambda message, level="INFO": print(message)):
+        self.config = config
+        self.on_batch = on_batch
+        self.log = log
+        self.apis: Dict[Tuple[str, str], LeagueAPI] = {}
+        self._retry_after: Dict[str, float] = {}
+
+    def get_api(self, region: str) -> LeagueAPI:
+        key = (self.config.riot_api_key, region)
+        api = self.apis.get(key)
+        if api is None:
+            api = LeagueAPI(api_key=key[0], region=region, lane=LANE_MAINTENANCE)
+            api.set_logger(self.log)
+            self.apis[key] = api
+        return api
+
+    def _age(self, player: PlayerConfig, field: str, now: float) -> float:
+        return now - (player.summoner_info or {}).get(field, 0)
+
+    def stale_players(self, now: Optional[float] = None) -> List[str]:
+        """Players with stats or account info past their freshness target, oldest first"""
+        now = time.time() if now is None else now
+        stale = []
+        for name, player in list(self.config.players.items()):
+            if "#" not in player.summoner_id or self._retry_after.get(name, 0) > now:
+                continue
+            stats_age = self._age(player, "statsUpdatedAt", now)
+            info_age = self._age(player, "infoUpdatedAt", now)
+            if stats_age > self.config.stats_max_age or info_age > self.config.summoner_info_max_age:
+                stale.append((max(stats_age - self.config.stats_max_age,
+                                  info_age - self.config.summoner_info_max_age), name))
+        stale.sort(reverse=True)
+        return [name for _, name in stale]
+
+    async def refresh_player(self, name: str) -> bool:
+        """Refresh one player in place; True when summoner_info changed"""
+        player = self.config.players.get(name)
+        if player is None:
+            return False
+        now = time.time()
+        info = dict(player.summoner_info or {})
+        api = self.get_api(player.region)
+
+        account = info.get("accountInfo") or {}
+        if self._age(player, "infoUpdatedAt", now) > self.config.summoner_info_max_age or "id" not in account:
+            game_name, tag_line = player.summoner_id.split("#", 1)
+            summoner = await api._get_summoner_by_riot_id(game_name, tag_line)
+            if not summoner:
+                return False
+            info["accountInfo"] = account = summoner
+            info["infoUpdatedAt"] = now
+
+        if self._age(player, "statsUpdatedAt", now) > self.config.stats_max_age and "id" in account:
+            info["stats"] = await api._get_summoner_stats(account["id"], strict=True)
+            info["statsUpdatedAt"] = now
+
+        # Remplacement atomique : l'interface lit toujours un dictionnaire complet
+        player.summoner_info = info
+        return True
+
+    async def run(self):
+        """Refresh stale players forever (cancel the task to stop)"""
+        while True:
+            if not self.config.riot_api_key:
+                await asyncio.sleep(IDLE_CHECK_INTERVAL)
+                continue
+            batch = self.stale_players()[:max(1, self.config.stats_batch_size)]
+            if not batch:
+                await asyncio.sleep(IDLE_CHECK_INTERVAL)
+                continue
+
+            spacing = self.config.stats_batch_interval / len(batch)
+            updated = []
+            for name in batch:
+                try:
+                    if await self.refresh_player(name):
+                        updated.append(name)
+                    else:
+                        self._retry_after[name] = time.time() + RETRY_DELAY
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.log(f"Stats refresh failed for {name}: {str(e)}", "WARNING")
+                    self._retry_after[name] = time.time() + RETRY_DELAY
+                await asyncio.sleep(spacing)
+
+            if updated:
+                self.log(f"Refreshed ranked stats for {len(updated)} player(s)", "DEBUG")
+                self.on_batch(updated)
@@ -0,0 +1,347 @@
+# stream_health.py
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+# Nombre d'échantillons conservés (10 minutes à 2 s)
+HEALTH_HISTORY = 300
+
+# Seuils d'un échantillon dégradé
+CONGESTION_HIGH = 0.15
+DROPPED_HIGH = 0.02  # part des images perdues par la sortie
+RENDER_LAG_HIGH = 0.05  # part des images sautées au rendu
+CPU_HIGH = 85.0
+
+# Échantillons consécutifs avant d'agir : baisse rapide, remontée prudente
+SUSTAINED_SAMPLES = 5
+RECOVERY_SAMPLES = 30
+
+# Facteur du débit vidéo par palier de baisse
+BITRATE_STEP_DOWN = 0.75
+
+# Presets x264 du plus lourd au plus léger (sortie simple)
+X264_PRESETS = ["medium", "fast", "faster", "veryfast", "superfast", "ultrafast"]
+
+HEALTH_GOOD = "good"
+HEALTH_DEGRADED = "degraded"
+HEALTH_BAD = "bad"
+
+# Requête obs-websocket : (requestType, requestData)
+Request = Tuple[str, Optional[Dict[str, Any]]]
+
+
+class HealthSample(NamedTuple):
+    at: float
+    kbps: float
+    congestion: float
+    dropped: float  # part des images perdues depuis l'échantillon précédent
+    render_lag: float  # part des images sautées au rendu depuis l'échantillon précédent
+    cpu: float
+    fps: float
+
+
+def _ratio(part: float, total: float) -> float:
+    return part / total if total > 0 else 0.0
+
+
+def make_sample(previous: Optional[Tuple[float, Dict[str, Any], Dict[str, Any]]],
+                now: float, status: Dict[str, Any], stats: Dict[str, Any]) -> Optional[HealthSample]:
+    """Sample from two consecutive GetStreamStatus / GetStats answers (None for the first one)"""
+    if previous is None:
+        return None
+    at, last_status, last_stats = previous
+    elapsed = now - at
+    sent = status.get("outputBytes", 0) - last_status.get("outputBytes", 0)
+    if elapsed <= 0 or sent < 0:
+        # Compteurs remis à zéro : la sortie a redémarré
+        return None
+    return HealthSample(
+        at=now,
+        kbps=sent * 8 / 1000 / elapsed,
+        congestion=float(status.get("outputCongestion") or 0.0),
+        dropped=_ratio(status.get("outputSkippedFrames", 0) - last_status.get("outputSkippedFrames", 0),
+                       status.get("outputTotalFrames", 0) - last_status.get("outputTotalFrames", 0)),
+        render_lag=_ratio(stats.get("renderSkippedFrames", 0) - last_stats.get("renderSkippedFrames", 0),
+                          stats.get("renderTotalFrames", 0) - last_stats.get("renderTotalFrames", 0)),
+        cpu=float(stats.get("cpuUsage") or 0.0),
+        fps=float(stats.get("activeFps") or 0.0),
+    )
+
+
+def network_strained(sample: HealthSample) -> bool:
+    return sample.congestion >= CONGESTION_HIGH or sample.dropped >= DROPPED_HIGH
+
+
+def encoder_strained(sample: HealthSample) -> bool:
+    return sample.cpu >= CPU_HIGH or sample.render_lag >= RENDER_LAG_HIGH
+
+
+class StreamHealth:
+    """Ring buffer of stream health samples and the encoder settings of the next output start.
+
+    OBS reads the encoder settings (simple output mode: the SimpleOutput
+    VBitrate and Preset profile parameters) only when the stream output
+    starts, so nothing written to the profile changes the stream that is
+    running. Sustained congestion or dropped frames schedule one bitrate
+    step down (not below `min_bitrate`), sustained CPU load or render lag
+    one lighter x264 preset; a stream that stays healthy for
+    RECOVERY_SAMPLES with reduced settings schedules one step back up. At
+    most one step is scheduled per output run, since the running stream
+    cannot show the effect of a change; a step down is dropped again when
+    the stream recovers before the next start.
+
+    Scheduled steps take effect at the next output start: `override_requests`
+    go in the StartStream batch and `begin` puts the profile's own values
+    back as soon as the output is live, so the saved profile only holds the
+    reduced settings while the output starts. In advanced output mode the
+    sampler only observes.
+
+    `get_parameter(category, name)` / `set_parameter(category, name, value)`
+    read and write OBS profile parameters.
+    """
+
+    def __init__(self, get_parameter: Callable[[str, str], Optional[str]],
+                 set_parameter: Callable[[str, str, Optional[str]], None],
+                 adaptive: bool = True, min_bitrate: int = 2500,
+                 log: Callable[[str, str], None] = lambda message, level="INFO": print(message)):
+        self.get_parameter = get_parameter
+        self.set_parameter = set_parameter
+        self.adaptive = adaptive
+        self.min_bitrate = min_bitrate
+        self.log = log
+        self.samples: Deque[HealthSample] = deque(maxlen=HEALTH_HISTORY)
+        self._previous: Optional[Tuple[float, Dict[str, Any], Dict[str, Any]]] = None
+        self.active = False
+        # Réglages propres du profil de la sortie, et réglages de la sortie en cours
+        self.simple_mode = True
+        self.base_bitrate: Optional[int] = None
+        self.base_preset: Optional[str] = None
+        self.bitrate: Optional[int] = None
+        self.preset: Optional[str] = None
+        # Paliers de baisse prévus pour le prochain démarrage, et ceux de la sortie en cours
+        self.bitrate_steps = 0
+        self.preset_steps = 0
+        self._running_steps = (0, 0)
+        # Baisse prévue puis annulée : plus rien à prévoir pour la sortie en cours
+        self._held = False
+        # Paliers demandés par `override_requests` pour le démarrage en cours
+        self._start_steps: Optional[Tuple[int, int]] = None
+        # Le profil contient les réglages réduits (entre StartStream et `begin`)
+        self._overridden = False
+        self._lock = threading.RLock()
+
+    # --- Réglages du profil ---
+
+    @staticmethod
+    def profile_requests() -> List[Request]:
+        """Requests reading the profile's encoder settings (answers go to `set_profile`)"""
+        return [("GetProfileParameter", {"parameterCategory": category, "parameterName": name})
+                for category, name in (("Output", "Mode"), ("SimpleOutput", "VBitrate"), ("SimpleOutput", "Preset"))]
+
+    def set_profile(self, answers: List[Dict[str, Any]]):
+        mode, bitrate, preset = (answer.get("parameterValue") for answer in answers)
+        with self._lock:
+            self.simple_mode = (mode or "Simple") == "Simple"
+            try:
+                self.base_bitrate = int(bitrate) if bitrate else None
+            except ValueError:
+                self.base_bitrate = None
+            self.base_preset = preset if preset in X264_PRESETS else None
+
+    def _read_profile(self):
+        self.set_profile([{"parameterValue": self.get_parameter(data["parameterCategory"], data["parameterName"])}
+                          for _, data in self.profile_requests()])
+
+    def _target_bitrate(self, steps: int) -> Optional[int]:
+        if self.base_bitrate is None or steps <= 0 or self.base_bitrate <= self.min_bitrate:
+            return self.base_bitrate
+        return max(self.min_bitrate, int(self.base_bitrate * BITRATE_STEP_DOWN ** steps))
+
+    def _target_preset(self, steps: int) -> Optional[str]:
+        if self.base_preset is None:
+            return None
+        return X264_PRESETS[min(len(X264_PRESETS) - 1, X264_PRESETS.index(self.base_preset) + steps)]
+
+    def scheduled(self) -> bool:
+        """True when the next output start needs reduced settings (and the profile read first)"""
+        return self.adaptive and bool(self.bitrate_steps or self.preset_steps)
+
+    def restart_pending(self) -> bool:
+        """True when a restart of the running output would apply a scheduled change"""
+        with self._lock:
+            return self.active and self.adaptive and (self.bitrate_steps, self.preset_steps) != self._running_steps
+
+    def override_requests(self) -> List[Request]:
+        """SetProfileParameter requests to send before StartStream (after `set_profile`)"""
+        with self._lock:
+            if not self.scheduled() or not self.simple_mode:
+                self._start_steps = None
+                return []
+            self._start_steps = (self.bitrate_steps, self.preset_steps)
+            requests = []
+            bitrate = self._target_bitrate(self.bitrate_steps)
+            if bitrate is not None and bitrate != self.base_bitrate:
+                requests.append(_set_request("VBitrate", str(bitrate)))
+            preset = self._target_preset(self.preset_steps)
+            if preset is not None and preset != self.base_preset:
+                requests.append(_set_request("Preset", preset))
+            self._overridden = bool(requests)
+            return requests
+
+    def _restore_profile(self):
+        if not self._overridden:
+            return
+        self._overridden = False
+        try:
+            if self.base_bitrate is not None:
+                self.set_parameter("SimpleOutput", "VBitrate", str(self.base_bitrate))
+            if self.base_preset is not None:
+                self.set_parameter("SimpleOutput", "Preset", self.base_preset)
+        except Exception as e:
+            self.log(f"Could not restore OBS encoder settings: {str(e)}", "WARNING")
+
+    # --- Cycle de vie de la sortie ---
+
+    def begin(self, profile_known: bool = False):
+        """Stream output live: note the settings it runs with, put the profile's own values back.
+
+        `profile_known` when `set_profile` was fed for this start already.
+        """
+        with self._lock:
+            if self.active:
+                # Déjà noté (démarrage explicite ou échantillonneur)
+                return
+            self.samples.clear()
+            self._previous = None
+            self.active = True
+            try:
+                # Pendant la substitution, le profil ne contient pas ses propres valeurs
+                if not profile_known and not self._overridden:
+                    self._read_profile()
+            except Exception as e:
+                self.log(f"Could not read OBS encoder settings: {str(e)}", "WARNING")
+                self.base_bitrate = self.base_preset = None
+            # Sortie démarrée hors de start_streaming (depuis OBS) : réglages du profil
+            self._running_steps = self._start_steps or (0, 0)
+            self._held = False
+            self._start_steps = None
+            self.bitrate = self._target_bitrate(self._running_steps[0])
+            self.preset = self._target_preset(self._running_steps[1])
+            if self._overridden:
+                self.log(f"Stream output started with reduced encoder settings: {self.bitrate} kbps"
+                         + (f", preset {self.preset}" if self.preset else ""), "INFO")
+                self._restore_profile()
+            if self.adaptive and not self.simple_mode:
+                self.log("OBS uses the advanced output mode: stream health is monitored, "
+                         "bitrate is not adapted", "INFO")
+
+    def end(self, if_active: bool = False):
+        """Stream output stopped (or failed to start): the profile gets its own values back.
+
+        `if_active` for a stop noticed after the fact: nothing to do once the
+        run was ended explicitly, even if the next start is under way.
+        """
+        with self._lock:
+            if if_active and not self.active:
+                return
+            self._restore_profile()
+            self._start_steps = None
+            self.active = False
+            self._previous = None
+            # Le prochain démarrage peut se faire sur un autre profil
+            self.base_bitrate = self.base_preset = self.bitrate = self.preset = None
+
+    # --- Échantillonnage ---
+
+    def record(self, status: Dict[str, Any], stats: Dict[str, Any], now: Optional[float] = None) -> Optional[HealthSample]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            sample = make_sample(self._previous, now, status, stats)
+            self._previous = (now, status, stats)
+            if sample is not None:
+                self.samples.append(sample)
+                self.adapt()
+            return sample
+
+    def _recent(self, count: int) -> List[HealthSample]:
+        if len(self.samples) < count:
+            return []
+        return list(self.samples)[-count:]
+
+    def adapt(self):
+        """Schedule one step for the next output start on sustained strain, or back up after a long healthy run"""
+        if not self.adaptive or not self.simple_mode or not self.active or self._held:
+            return
+        running_bitrate, running_preset = self._running_steps
+        healthy = self._recent(RECOVERY_SAMPLES)
+        recovered = bool(healthy) and not any(network_strained(sample) or encoder_strained(sample)
+                                              for sample in healthy)
+        if (self.bitrate_steps, self.preset_steps) != self._running_steps:
+            # Un palier est déjà prévu : la sortie en cours ne peut pas montrer d'autre effet,
+            # sauf une baisse devenue inutile
+            if recovered and (self.bitrate_steps > running_bitrate or self.preset_steps > running_preset):
+                self.bitrate_steps, self.preset_steps = self._running_steps
+                self._held = True
+                self.log("Stream healthy again: the next stream start keeps the current encoder settings", "INFO")
+            return
+        recent = self._recent(SUSTAINED_SAMPLES)
+        if recent and all(network_strained(sample) for sample in recent):
+            target = self._target_bitrate(running_bitrate + 1)
+            if target is not None and target < (self.bitrate or 0):
+                self.bitrate_steps = running_bitrate + 1
+                self.log(f"Sustained congestion: the next stream start will use {target} kbps "
+                         f"instead of {self.bitrate}", "WARNING")
+                return
+        if recent and all(encoder_strained(sample) for sample in recent):
+            target = self._target_preset(running_preset + 1)
+            if target is not None and target != self.preset:
+                self.preset_steps = running_preset + 1
+                self.log(f"Sustained encoder load: the next stream start will use the {target} "
+                         f"preset instead of {self.preset}", "WARNING")
+                return
+
+        if not recovered:
+            return
+        if running_bitrate:
+            self.bitrate_steps = running_bitrate - 1
+            self.log(f"Stream healthy: the next stream start will use "
+                     f"{self._target_bitrate(self.bitrate_steps)} kbps", "INFO")
+        elif running_preset:
+            self.preset_steps = running_preset - 1
+            self.log(f"Stream healthy: the next stream start will use the "
+                     f"{self._target_preset(self.preset_steps)} preset", "INFO")
+
+    # --- Résumé pour l'interface ---
+
+    def summary(self, window: int = SUSTAINED_SAMPLES) -> Optional[Dict[str, Any]]:
+        """Health over the last `window` samples, None before the first sample"""
+        with self._lock:
+            recent = list(self.samples)[-window:]
+            if not recent:
+                return None
+            dropped = sum(sample.dropped for sample in recent) / len(recent)
+            congestion = max(sample.congestion for sample in recent)
+            cpu = sum(sample.cpu for sample in recent) / len(recent)
+            strained = [sample for sample in recent if network_strained(sample) or encoder_strained(sample)]
+            state = HEALTH_GOOD if not strained else HEALTH_BAD if len(strained) == len(recent) else HEALTH_DEGRADED
+            pending = self.restart_pending()
+            return {
+                "state": state,
+                "kbps": recent[-1].kbps,
+                "dropped": dropped,
+                "congestion": congestion,
+                "cpu": cpu,
+                "fps": recent[-1].fps,
+                "bitrate": self.bitrate,
+                "base_bitrate": self.base_bitrate,
+                "preset": self.preset,
+                # Réglages prévus au prochain démarrage de la sortie (None : inchangés)
+                "next_bitrate": self._target_bitrate(self.bitrate_steps) if pending else None,
+                "next_preset": self._target_preset(self.preset_steps) if pending else None,
+            }
+
+
+def _set_request(name: str, value: str) -> Request:
+    return ("SetProfileParameter", {"parameterCategory": "SimpleOutput", "parameterName": name,
+                                    "parameterValue": value})
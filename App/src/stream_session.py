@@ -0,0 +1,153 @@
+# stream_session.py
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# États d'une session de stream, dans l'ordre normal
+IDLE = "IDLE"
+DETECTED = "DETECTED"
+LAUNCHING_CLIENT = "LAUNCHING_CLIENT"
+CLIENT_READY = "CLIENT_READY"
+OBS_READY = "OBS_READY"
+LIVE = "LIVE"
+ENDING = "ENDING"
+
+# Transitions autorisées (ENDING est accessible depuis tout état actif). LIVE -> DETECTED
+# est une préemption : le stream en cours continue pendant la mise en place de la
+# nouvelle partie, et y revient (-> LIVE) si elle échoue.
+TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+    IDLE: (DETECTED,),
+    DETECTED: (LAUNCHING_CLIENT, ENDING, LIVE),
+    LAUNCHING_CLIENT: (CLIENT_READY, ENDING, LIVE),
+    CLIENT_READY: (OBS_READY, ENDING, LIVE),
+    OBS_READY: (LIVE, ENDING),
+    LIVE: (ENDING, DETECTED),
+    ENDING: (IDLE,),
+}
+
+# Nombre de transitions conservées dans l'historique
+HISTORY_SIZE = 200
+
+
+class SessionCancelled(Exception):
+    """Raised by a session wait when the service is stopping"""
+
+
+class StreamSession:
+    """State machine of the stream pipeline with interruptible waits.
+
+    IDLE -> DETECTED -> LAUNCHING_CLIENT -> CLIENT_READY -> OBS_READY -> LIVE
+    -> ENDING -> IDLE. Every transition is timestamped and wakes up the
+    threads waiting on the session, so a stage advances as soon as its
+    condition holds. `cancel` wakes every wait with SessionCancelled, which
+    lets the service stop its worker thread in milliseconds.
+    """
+
+    def __init__(self, log: Callable[[str, str], None] = lambda message, level="INFO": print(message)):
+        self.log = log
+        self.state = IDLE
+        self.player_name: Optional[str] = None
+        self.game_id: Optional[int] = None
+        # PID du client de jeu lancé pour cette session (suivi de fin de partie)
+        self.client_pid: Optional[int] = None
+        self.entered_at = time.time()
+        # (état, horodatage, détail)
+        self.history: Deque[Tuple[str, float, str]] = deque([(IDLE, self.entered_at, "")], maxlen=HISTORY_SIZE)
+        self._cancelled = False
+        # Incrémenté à chaque transition, réveil ou annulation
+        self._generation = 0
+        self._condition = threading.Condition()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def transition(self, state: str, detail: str = "") -> bool:
+        """Move to `state`; False (and no change) when the transition is not allowed"""
+        with self._condition:
+            previous = self.state
+            if state not in TRANSITIONS[previous]:
+                self.log(f"Ignored stream session transition {previous} -> {state}", "WARNING")
+                return False
+            now = time.time()
+            elapsed = now - self.entered_at
+            self.state = state
+            self.entered_at = now
+            self.history.append((state, now, detail))
+            if state == IDLE:
+                self.player_name = None
+                self.game_id = None
+                self.client_pid = None
+            self._generation += 1
+            self._condition.notify_all()
+        self.log(f"Stream session: {previous} -> {state} after {elapsed:.2f}s"
+                 + (f" ({detail})" if detail else ""), "DEBUG")
+        return True
+
+    def end(self, detail: str = ""):
+        """Go through ENDING back to IDLE from any active state"""
+        with self._condition:
+            if self.state == IDLE:
+                return
+            if self.state != ENDING:
+                self.transition(ENDING, detail)
+            self.transition(IDLE)
+
+    def time_in_state(self) -> float:
+        return time.time() - self.entered_at
+
+    def timeline(self) -> List[Tuple[str, float]]:
+        """Seconds spent in each state of the last session, in order"""
+        entries = list(self.history)
+        start = max((i for i, (state, _, _) in enumerate(entries) if state == DETECTED), default=len(entries) - 1)
+        entries = entries[start:]
+        timeline = []
+        for (state, at, _), (_, next_at, _) in zip(entries, entries[1:] + [(None, time.time(), "")]):
+            timeline.append((state, next_at - at))
+        return timeline
+
+    def wake(self):
+        """Wake up the waits so that they re-check their condition now"""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def cancel(self):
+        """Interrupt every current and future wait with SessionCancelled"""
+        with self._condition:
+            self._cancelled = True
+            self._generation += 1
+            self._condition.notify_all()
+
+    def check(self):
+        if self._cancelled:
+            raise SessionCancelled()
+
+    def wait_for(self, predicate: Callable[[], bool], timeout: Optional[float] = None,
+                 interval: Optional[float] = None) -> bool:
+        """Wait until `predicate()` is true; False on timeout.
+
+        The predicate is re-checked on every transition or `wake`, and every
+        `interval` seconds for conditions nobody notifies (process started...).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.check()
+            generation = self._generation
+            # Évalué hors verrou : la condition peut être lente (liste des processus...)
+            if predicate():
+                return True
+            with self._condition:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                if interval is not None:
+                    remaining = interval if remaining is None else min(remaining, interval)
+                if generation == self._generation:
+                    self._condition.wait(remaining)
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep up to `seconds`; True when woken early by a transition or `wake`"""
+        generation = self._generation
+        return self.wait_for(lambda: self._generation != generation, seconds)
@@ -2,16 +2,17 @@ from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                               QPushButton, QLabel, QTableWidget, QTableWidgetItem,
                               QDialog, QLineEdit, QFormLayout, QSpinBox,
                               QMessageBox, QFrame, QApplication, QTextEdit, QSplitter, QComboBox, QHeaderView, QToolButton, QMenu,
-                              QGraphicsDropShadowEffect)
+                              QGraphicsDropShadowEffect, QCheckBox)
 from PySide6.QtCore import Qt, QTimer, Signal, QSize
 from PySide6.QtGui import QFont, QIcon, QColor, QPalette, QTextCursor, QPainter, QAction, QPixmap
 from typing import Optional
 from datetime import datetime
-import asyncio
-from league import LeagueAPI
+from league import LeagueAPI, LANE_INTERACTIVE, BREAKER_OPEN, circuit_breaker_status
 from config import PlayerConfig
+from stats_refresher import format_rank
+from stream_health import HEALTH_GOOD, HEALTH_DEGRADED, HEALTH_BAD
 import os
-import hashlib
+import time
 
 # Modern UI Components
 class ModernButton(QPushButton):
@@ -262,6 +263,9 @@ class ModernTableWidget(QTableWidget):
             }
         """)
 
+HEALTH_COLORS = {HEALTH_GOOD: "#059669", HEALTH_DEGRADED: "#d97706", HEALTH_BAD: "#dc2626"}
+
+
 class StatusCard(QFrame):
     def __init__(self):
         super().__init__()
@@ -323,12 +327,25 @@ class StatusCard(QFrame):
         self.stream_player.setStyleSheet("font-weight: bold; font-size: 14px;")
         streaming_layout.addWidget(self.stream_player)
         
+        # Santé du stream (débit, images perdues, CPU)
+        self.health_label = QLabel()
+        self.health_label.setStyleSheet("font-size: 11px; color: #4b5563;")
+        self.health_label.setVisible(False)
+        streaming_layout.addWidget(self.health_label)
+        
         # Hide by default
         self.streaming_info.setVisible(False)
         
         layout.addWidget(self.streaming_info)
         layout.addStretch()
         
+        # Disjoncteurs Riot ouverts (hôte / endpoint dégradé)
+        self.breaker_label = QLabel()
+        self.breaker_label.setStyleSheet("color: #b45309; font-size: 12px;")
+        self.breaker_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.breaker_label.setVisible(False)
+        layout.addWidget(self.breaker_label)
+        
         # Set inactive by default
         self.set_active(False)
 
@@ -351,6 +368,51 @@ class StatusCard(QFrame):
         self.status_icon.setPixmap(self._create_status_icon("#facc15"))  # Jaune
         self.status_msg.setText("Stopping service...")
 
+    def set_breakers(self, breakers):
+        """Show the Riot API circuit breakers that are not closed"""
+        if not breakers:
+            self.breaker_label.setVisible(False)
+            return
+        lines = []
+        for breaker in breakers:
+            region = breaker["host"].split(".")[0]
+            if breaker["state"] == BREAKER_OPEN:
+                lines.append(f"⚠ {region} {breaker['endpoint']}: open, probe in {breaker['retry_in']:.0f}s")
+            else:
+                lines.append(f"⚠ {region} {breaker['endpoint']}: probing")
+        self.breaker_label.setText("\n".join(lines[:2]) + (f" (+{len(lines) - 2})" if len(lines) > 2 else ""))
+        self.breaker_label.setToolTip("\n".join(
+            f"{breaker['host']} {breaker['endpoint']}: {breaker['state']}, "
+            f"{breaker['failures']} failure(s), last error: {breaker['last_error']}"
+            for breaker in breakers
+        ))
+        self.breaker_label.setVisible(True)
+
+    def set_health(self, health):
+        """Show the stream health summary (None hides it)"""
+        if not health:
+            self.health_label.setVisible(False)
+            return
+        color = HEALTH_COLORS.get(health["state"], "#4b5563")
+        text = (f"● {health['kbps']:.0f} kbps · {health['dropped'] * 100:.1f}% dropped · "
+                f"CPU {health['cpu']:.0f}%")
+        if health["bitrate"] and health["base_bitrate"] and health["bitrate"] < health["base_bitrate"]:
+            text += f" · bitrate lowered to {health['bitrate']}"
+        self.health_label.setText(text)
+        self.health_label.setStyleSheet(f"font-size: 11px; color: {color};")
+        self.health_label.setToolTip(
+            f"Stream health: {health['state']}\n"
+            f"Congestion: {health['congestion'] * 100:.0f}%\n"
+            f"FPS: {health['fps']:.0f}\n"
+            f"Encoder bitrate: {health['bitrate'] or 'unknown'}"
+            + (f" (profile: {health['base_bitrate']})" if health["base_bitrate"] else "")
+            + (f"\nx264 preset: {health['preset']}" if health["preset"] else "")
+            + (f"\nNext stream start: {health['next_bitrate']} kbps"
+               + (f", preset {health['next_preset']}" if health["next_preset"] else "")
+               if health["next_bitrate"] else "")
+        )
+        self.health_label.setVisible(True)
+
     def set_active(self, is_active: bool, stream_name: str = None):
         if is_active:
             self.status_icon.setPixmap(self._create_status_icon("#10b981"))  # Vert
@@ -497,9 +559,15 @@ class ModernConsole(QFrame):
         self.text_area.clear()
 
 class AddPlayerDialog(QDialog):
+    # Résultat de la recherche Riot ID (résultat, erreur), émis depuis le runtime asyncio
+    lookup_finished = Signal(object, object)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Add New Player")
+        self.lookup_future = None
+        self.pending_values = None
+        self.lookup_finished.connect(self.on_lookup_finished)
         self.setup_ui()
 
     def setup_ui(self):
@@ -521,6 +589,23 @@ class AddPlayerDialog(QDialog):
         self.priority_input = QSpinBox()
         self.priority_input.setRange(0, 100)
         
+        # Préemption par une partie plus prioritaire pendant le stream de ce joueur
+        self.allow_preempt_input = QCheckBox("Can be interrupted by a higher-priority game")
+        self.allow_preempt_input.setChecked(True)
+        self.min_dwell_input = QSpinBox()
+        self.min_dwell_input.setRange(0, 60)
+        self.min_dwell_input.setSuffix(" min")
+        self.min_dwell_input.setValue(5)
+        self.preempt_gap_input = QSpinBox()
+        self.preempt_gap_input.setRange(1, 100)
+        self.preempt_gap_input.setValue(2)
+        
+        # Scène / profil OBS préparés pour ce joueur
+        self.obs_scene_input = QLineEdit()
+        self.obs_scene_input.setPlaceholderText("OBS scene (optional)")
+        self.obs_profile_input = QLineEdit()
+        self.obs_profile_input.setPlaceholderText("OBS profile (optional)")
+        
         # Add region dropdown
         self.region_input = QComboBox()
         self.region_input.addItems([
@@ -544,16 +629,21 @@ class AddPlayerDialog(QDialog):
         layout.addRow("Stream Key:", self.stream_key_input)
         layout.addRow("Channel Name:", self.channel_input)
         layout.addRow("Priority (0=highest):", self.priority_input)
+        layout.addRow("Preemption:", self.allow_preempt_input)
+        layout.addRow("Minimum stream time:", self.min_dwell_input)
+        layout.addRow("Priority gap to preempt:", self.preempt_gap_input)
+        layout.addRow("OBS Scene:", self.obs_scene_input)
+        layout.addRow("OBS Profile:", self.obs_profile_input)
 
         # Buttons
         buttons = QHBoxLayout()
-        save_btn = ModernButton("Save")
+        self.save_btn = ModernButton("Save")
         cancel_btn = ModernButton("Cancel", is_destructive=True)
-        buttons.addWidget(save_btn)
+        buttons.addWidget(self.save_btn)
         buttons.addWidget(cancel_btn)
         layout.addRow(buttons)
 
-        save_btn.clicked.connect(self.accept)
+        self.save_btn.clicked.connect(self.accept)
         cancel_btn.clicked.connect(self.reject)
         
 
@@ -564,7 +654,12 @@ class AddPlayerDialog(QDialog):
             "stream_key": self.stream_key_input.text(),
             "channel_name": self.channel_input.text(),
             "priority": self.priority_input.value(),
-            "region": self.region_input.currentText()  # Add region to values
+            "region": self.region_input.currentText(),  # Add region to values
+            "allow_preempt": self.allow_preempt_input.isChecked(),
+            "min_dwell": self.min_dwell_input.value() * 60,
+            "preempt_gap": self.preempt_gap_input.value(),
+            "obs_scene": self.obs_scene_input.text().strip(),
+            "obs_profile": self.obs_profile_input.text().strip()
         }
 
     def accept(self):
@@ -575,6 +670,8 @@ class AddPlayerDialog(QDialog):
                 "No API key configured. Please add your Riot API key in Settings first."
             )
             return
+        if self.lookup_future is not None:
+            return
 
         try:
             values = self.get_values()
@@ -594,72 +691,120 @@ class AddPlayerDialog(QDialog):
             # Create League instance
             league = LeagueAPI(
                 api_key=self.parent().config.riot_api_key,
-                region=values["region"]
+                region=values["region"],
+                lane=LANE_INTERACTIVE
             )
             
             self.parent().console.log(f"Looking up Riot ID: {game_name}#{tag_line}", "INFO")
             
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+            # La recherche tourne sur le runtime asyncio : l'interface reste réactive
+            self.pending_values = (values, game_name, tag_line)
+            self.set_busy(True)
+            self.lookup_future = league.runtime.submit(self.lookup_account(league, game_name, tag_line))
+            self.lookup_future.add_done_callback(self.emit_lookup_result)
                 
-                # Get account info using Riot ID
-                summoner = loop.run_until_complete(league._get_summoner_by_riot_id(game_name, tag_line))
+        except Exception as e:
+            self.set_busy(False)
+            self.parent().console.log(f"Unexpected error: {str(e)}", "ERROR")
+            QMessageBox.warning(
+                self,
+                "Error",
+                f"An unexpected error occurred: {str(e)}"
+            )
+
+    @staticmethod
+    async def lookup_account(league, game_name, tag_line):
+        """Get account info using Riot ID, then the ranked stats"""
+        summoner = await league._get_summoner_by_riot_id(game_name, tag_line)
+        summoner_stats = None
+        if summoner and "id" in summoner:
+            summoner_stats = await league._get_summoner_stats(summoner["id"])
+        return summoner, summoner_stats
+
+    def emit_lookup_result(self, future):
+        """Forward the lookup result to the GUI thread (called on the runtime thread)"""
+        if future.cancelled():
+            return
+        try:
+            error = future.exception()
+            self.lookup_finished.emit(None if error else future.result(), error)
+        except RuntimeError:
+            # Dialogue déjà détruit
+            pass
+
+    def set_busy(self, busy):
+        self.save_btn.setEnabled(not busy)
+        self.save_btn.setText("Looking up..." if busy else "Save")
+
+    def on_lookup_finished(self, result, error):
+        self.lookup_future = None
+        self.set_busy(False)
+        if self.pending_values is None:
+            return
+        values, game_name, tag_line = self.pending_values
+        self.pending_values = None
+        
+        if error is not None:
+            error_msg = str(error)
+            self.parent().console.log(f"Error: {error_msg}", "ERROR")
+            QMessageBox.warning(self, "Error", error_msg)
+            return
+        
+        try:
+            summoner, summoner_stats = result
+            
+            if summoner and "id" in summoner:
+                # Log the raw API response for debugging
+                self.parent().console.log(f"Raw API Response: {summoner}", "INFO")
                 
-                if summoner and "id" in summoner:
-                    # Log the raw API response for debugging
-                    self.parent().console.log(f"Raw API Response: {summoner}", "INFO")
-                    
-                    # Get ranked stats
-                    summoner_stats = loop.run_until_complete(league._get_summoner_stats(summoner["id"]))
-                    loop.close()
-                    
-                    # Create the complete summoner info object
-                    summoner_info = {
-                        "accountInfo": summoner,
-                        "stats": summoner_stats,
-                        "riotId": {
-                            "gameName": game_name,
-                            "tagLine": tag_line,
-                            "region": values["region"]
-                        }
+                # Create the complete summoner info object
+                summoner_info = {
+                    "accountInfo": summoner,
+                    "stats": summoner_stats,
+                    "infoUpdatedAt": time.time(),
+                    "statsUpdatedAt": time.time(),
+                    "riotId": {
+                        "gameName": game_name,
+                        "tagLine": tag_line,
+                        "region": values["region"]
                     }
-                    
-                    # Log the structured data we're about to save
-                    self.parent().console.log(f"Storing summoner info: {summoner_info}", "INFO")
-                    
-                    # Add player to config with summoner info
-                    self.parent().config.add_player(
-                        name=values["name"],
-                        summoner_id=f"{game_name}#{tag_line}",
-                        stream_key=values["stream_key"],
-                        channel_name=values["channel_name"],
-                        region=values["region"],
-                        priority=values["priority"],
-                        summoner_info=summoner_info  # Pass the summoner info
-                    )
-                    
-                    # Verify the data was stored
-                    self.parent().console.log(
-                        f"Saved player data: {self.parent().config.players[values['name']].__dict__}", 
-                        "INFO"
-                    )
-                    
-                    self.parent().console.log(f"Successfully added player: {values['name']}", "SUCCESS")
-                    QDialog.accept(self)
-                    return
-                    
-                else:
-                    QMessageBox.warning(
-                        self,
-                        "Error",
-                        "Could not find account with that Riot ID. Please check the spelling and region."
-                    )
-                    
-            except Exception as e:
-                error_msg = str(e)
-                self.parent().console.log(f"Error: {error_msg}", "ERROR")
-                QMessageBox.warning(self, "Error", str(e))
+                }
+                
+                # Log the structured data we're about to save
+                self.parent().console.log(f"Storing summoner info: {summoner_info}", "INFO")
+                
+                # Add player to config with summoner info
+                self.parent().config.add_player(
+                    name=values["name"],
+                    summoner_id=f"{game_name}#{tag_line}",
+                    stream_key=values["stream_key"],
+                    channel_name=values["channel_name"],
+                    region=values["region"],
+                    priority=values["priority"],
+                    summoner_info=summoner_info,  # Pass the summoner info
+                    allow_preempt=values["allow_preempt"],
+                    min_dwell=values["min_dwell"],
+                    preempt_gap=values["preempt_gap"],
+                    obs_scene=values["obs_scene"],
+                    obs_profile=values["obs_profile"]
+                )
+                
+                # Verify the data was stored
+                self.parent().console.log(
+                    f"Saved player data: {self.parent().config.players[values['name']].__dict__}", 
+                    "INFO"
+                )
+                
+                self.parent().console.log(f"Successfully added player: {values['name']}", "SUCCESS")
+                QDialog.accept(self)
+                return
+                
+            else:
+                QMessageBox.warning(
+                    self,
+                    "Error",
+                    "Could not find account with that Riot ID. Please check the spelling and region."
+                )
                 
         except Exception as e:
             self.parent().console.log(f"Unexpected error: {str(e)}", "ERROR")
@@ -669,16 +814,31 @@ class AddPlayerDialog(QDialog):
                 f"An unexpected error occurred: {str(e)}"
             )
 
+    def reject(self):
+        # Abandonner une recherche en cours
+        if self.lookup_future is not None:
+            self.lookup_future.cancel()
+            self.lookup_future = None
+        self.pending_values = None
+        QDialog.reject(self)
+
 class MainWindow(QMainWindow):
+    # Résultat de la recherche de partie du test de spectate (partie, erreur), émis depuis le runtime asyncio
+    spectate_lookup_finished = Signal(object, object)
+
     def __init__(self, config, service):
         super().__init__()
         self.config = config
         self.service = service
         self.service.set_log_callback(self.log_message)
         self.is_running = False
+        # Test de spectate en attente de la recherche de partie : (api, joueur, bouton, texte du bouton)
+        self.spectate_pending = None
         self.setup_ui()
         
         self.update_players_table()
+        self.service.stats_updated.connect(self.on_stats_updated)
+        self.spectate_lookup_finished.connect(self.on_spectate_lookup_finished)
         # Update timer for status
         self.status_timer = QTimer()
         self.status_timer.timeout.connect(self.update_status)
@@ -850,8 +1010,8 @@ class MainWindow(QMainWindow):
         
         # Table des joueurs (moderne)
         self.players_table = ModernTableWidget()
-        self.players_table.setColumnCount(6)
-        self.players_table.setHorizontalHeaderLabels(["Joueur", "Région", "Chaîne", "Streaming", "Active", "Actions"])
+        self.players_table.setColumnCount(7)
+        self.players_table.setHorizontalHeaderLabels(["Joueur", "Région", "Chaîne", "Rang", "Streaming", "Active", "Actions"])
         
         players_layout.addWidget(self.players_table)
         
@@ -913,21 +1073,22 @@ class MainWindow(QMainWindow):
             self.players_table.setRowCount(0)
             
             # Configure columns
-            self.players_table.setColumnCount(6)
+            self.players_table.setColumnCount(7)
             self.players_table.setHorizontalHeaderLabels([
-                "Name", "Region", "Channel", "Streaming", "Active", "Actions"
+                "Name", "Region", "Channel", "Rank", "Streaming", "Active", "Actions"
             ])
             
             # Set column widths
             self.players_table.setColumnWidth(0, 150)  # Name
             self.players_table.setColumnWidth(1, 80)   # Region
             self.players_table.setColumnWidth(2, 150)  # Channel
-            self.players_table.setColumnWidth(3, 100)  # Status
-            self.players_table.setColumnWidth(4, 80)   # Active/Inactive
-            self.players_table.setColumnWidth(5, 120)  # Actions - réduit de moitié
+            self.players_table.setColumnWidth(3, 140)  # Rank
+            self.players_table.setColumnWidth(4, 100)  # Status
+            self.players_table.setColumnWidth(5, 80)   # Active/Inactive
+            self.players_table.setColumnWidth(6, 120)  # Actions - réduit de moitié
             
             # Set stretch for the last column
-            self.players_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.ResizeMode.Stretch)
+            self.players_table.horizontalHeader().setSectionResizeMode(6, QHeaderView.ResizeMode.Stretch)
         
             sorted_players = sorted(list(self.config.players.items()))
             
@@ -950,6 +1111,11 @@ class MainWindow(QMainWindow):
                 channel_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
                 self.players_table.setItem(row, 2, channel_item)
                 
+                # Rank (rafraîchi en tâche de fond par le service)
+                rank_item = QTableWidgetItem(format_rank(player))
+                rank_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+                self.players_table.setItem(row, 3, rank_item)
+                
                 # Status indicator
                 try:
                     status = "Streaming" if self.service.is_player_streaming(name) else "Idle"
@@ -969,9 +1135,9 @@ class MainWindow(QMainWindow):
                 """)
                 status_layout.addWidget(status_label)
                 status_layout.addStretch()
-                self.players_table.setCellWidget(row, 3, status_widget)
+                self.players_table.setCellWidget(row, 4, status_widget)
                 
-                # Active/Inactive toggle button (column 4)
+                # Active/Inactive toggle button (column 5)
                 active_widget = QWidget()
                 active_layout = QHBoxLayout(active_widget)
                 active_layout.setContentsMargins(8, 4, 8, 4)
@@ -1009,9 +1175,9 @@ class MainWindow(QMainWindow):
                 active_btn.clicked.connect(toggle_click_handler())
                 active_layout.addWidget(active_btn)
                 
-                self.players_table.setCellWidget(row, 4, active_widget)
+                self.players_table.setCellWidget(row, 5, active_widget)
                 
-                # Action buttons (column 5)
+                # Action buttons (column 6)
                 action_widget = QWidget()
                 action_layout = QHBoxLayout(action_widget)
                 action_layout.setContentsMargins(4, 4, 4, 4)
@@ -1064,11 +1230,26 @@ class MainWindow(QMainWindow):
                 action_layout.addWidget(delete_btn)
                 action_layout.addStretch()
                 
-                self.players_table.setCellWidget(row, 5, action_widget)
+                self.players_table.setCellWidget(row, 6, action_widget)
         
         except Exception as e:
             self.console.log(f"Erreur lors de la mise à jour du tableau des joueurs: {str(e)}", "ERROR")
 
+    def on_stats_updated(self, names):
+        """Refresh the Rank cells of players updated in the background"""
+        try:
+            for row in range(self.players_table.rowCount()):
+                name_item = self.players_table.item(row, 0)
+                if name_item is None or name_item.text() not in names:
+                    continue
+                player = self.config.players.get(name_item.text())
+                rank_item = self.players_table.item(row, 3)
+                if player is not None and rank_item is not None:
+                    rank_item.setText(format_rank(player))
+            self.config.save()
+        except Exception as e:
+            self.console.log(f"Erreur lors de la mise à jour des rangs: {str(e)}", "ERROR")
+
     def log_message(self, message: str, level: str = "INFO"):
         """Callback for service logging"""
         self.console.log(message, level)
@@ -1279,6 +1460,9 @@ class MainWindow(QMainWindow):
                     self.status_card.set_active(False)
                     self.console.log("[STATUS] Service stopped", "INFO")
                     
+            self.status_card.set_breakers(circuit_breaker_status() if is_running else [])
+            self.status_card.set_health(self.service.stream_health() if is_streaming else None)
+                    
             # Mettre à jour explicitement le tableau des joueurs
             self.update_players_table(save=False)
             
@@ -1302,6 +1486,11 @@ class MainWindow(QMainWindow):
         dialog.channel_input.setText(player.channel_name)
         dialog.priority_input.setValue(player.priority)
         dialog.region_input.setCurrentText(player.region)
+        dialog.allow_preempt_input.setChecked(player.allow_preempt)
+        dialog.min_dwell_input.setValue(player.min_dwell // 60)
+        dialog.preempt_gap_input.setValue(player.preempt_gap)
+        dialog.obs_scene_input.setText(player.obs_scene)
+        dialog.obs_profile_input.setText(player.obs_profile)
         
         if dialog.exec():
             values = dialog.get_values()
@@ -1393,6 +1582,8 @@ class MainWindow(QMainWindow):
         
         sender = None
         original_text = "Test Spectate"
+        if self.spectate_pending is not None:
+            return
         
         try:
             # Récupérer le nom du joueur sélectionné ou choisir le premier de la liste
@@ -1402,7 +1593,7 @@ class MainWindow(QMainWindow):
             self.console.log("[SPECTATE-002] Searching for active players", "INFO")
             for row in range(self.players_table.rowCount()):
                 try:
-                    cell_widget = self.players_table.cellWidget(row, 4)
+                    cell_widget = self.players_table.cellWidget(row, 5)
                     if cell_widget:
                         is_active = "Active" in cell_widget.findChild(QPushButton).text()
                         if is_active:
@@ -1443,50 +1634,24 @@ class MainWindow(QMainWindow):
                     self.console.log("[SPECTATE-ERR3] No Riot API key configured", "ERROR")
                     return
                 
-                api = LeagueAPI(self.config.riot_api_key, region)
+                api = LeagueAPI(self.config.riot_api_key, region, lane=LANE_INTERACTIVE)
                 api.set_logger(self.console.log)
                 
-                # Vérifier si en partie
+                # Vérifier si en partie, sur le runtime asyncio : l'interface reste réactive
                 self.console.log(f"[SPECTATE-008] Checking if player is in game", "INFO")
-                game_id = api.get_active_game_id(summoner_id)
-                
-                if not game_id:
-                    self.console.log(f"[SPECTATE-009] Player {player_name} is not in game", "WARNING")
-                    return
-                
-                self.console.log(f"[SPECTATE-010] Found active game with ID: {game_id}", "SUCCESS")
-                
-                # Vérifier le chemin de League
-                if not self.config.league_path or not os.path.exists(self.config.league_path):
-                    self.console.log("[SPECTATE-ERR4] League path is invalid or not configured", "ERROR") 
-                    return
-                
-                # Créer la commande de spectate
-                spectate_cmd = api.create_spectate_command(game_id, self.config.league_path)
-                self.console.log(f"[SPECTATE-011] Generated spectate command: {spectate_cmd}", "INFO")
-                
-                # Tenter de lancer la commande
-                success = self.service.launch_spectate_client(spectate_cmd) 
-                
-                if not success:
-                    self.console.log("Trying alternative launch method...", "WARNING")
-                    success = self.service.launch_spectate_client_alternative(spectate_cmd)
-                
-                if success:
-                    self.console.log("Spectate command successfully executed", "SUCCESS")
-                else:
-                    self.console.log("All launch methods failed", "ERROR")
+                self.spectate_pending = (api, player_name, sender, original_text)
+                future = api.runtime.submit(api._get_active_game_by_summoner(summoner_id))
+                future.add_done_callback(self.emit_spectate_lookup)
                 
             except Exception as e:
+                self.spectate_pending = None
                 self.console.log(f"[SPECTATE-ERR5] Error during spectate test: {str(e)}", "ERROR")
                 import traceback
                 self.console.log(f"[SPECTATE-TRACE] {traceback.format_exc()}", "ERROR")
             finally:
-                # Réactiver le bouton
-                if sender:
-                    sender.setText(original_text)
-                    sender.setEnabled(True)
-                    self.console.log("[SPECTATE-014] Re-enabled UI button", "DEBUG")
+                # Sans recherche en cours, réactiver le bouton tout de suite
+                if self.spectate_pending is None:
+                    self.finish_spectate_test(sender, original_text)
         
         except Exception as e:
             self.console.log(f"[SPECTATE-CRIT] Critical error in test_spectate: {str(e)}", "ERROR")
@@ -1498,6 +1663,71 @@ class MainWindow(QMainWindow):
                 sender.setText(original_text)
                 sender.setEnabled(True)
 
+    def emit_spectate_lookup(self, future):
+        """Forward the spectate test's game lookup to the GUI thread (called on the runtime thread)"""
+        if future.cancelled():
+            return
+        try:
+            error = future.exception()
+            self.spectate_lookup_finished.emit(None if error else future.result(), error)
+        except RuntimeError:
+            # Fenêtre déjà détruite
+            pass
+
+    def on_spectate_lookup_finished(self, game_info, error):
+        """Second half of test_spectate: launch the spectator once the game is known"""
+        if self.spectate_pending is None:
+            return
+        api, player_name, sender, original_text = self.spectate_pending
+        self.spectate_pending = None
+        
+        try:
+            if error is not None:
+                self.console.log(f"[SPECTATE-ERR5] Error during spectate test: {str(error)}", "ERROR")
+                return
+            
+            game_id = (game_info or {}).get("gameId")
+            if not game_id:
+                self.console.log(f"[SPECTATE-009] Player {player_name} is not in game", "WARNING")
+                return
+            
+            self.console.log(f"[SPECTATE-010] Found active game with ID: {game_id}", "SUCCESS")
+            
+            # Vérifier le chemin de League
+            if not self.config.league_path or not os.path.exists(self.config.league_path):
+                self.console.log("[SPECTATE-ERR4] League path is invalid or not configured", "ERROR") 
+                return
+            
+            # Créer la commande de spectate
+            spectate_cmd = api.create_spectate_command(game_id, self.config.league_path)
+            self.console.log(f"[SPECTATE-011] Generated spectate command: {spectate_cmd}", "INFO")
+            
+            # Tenter de lancer la commande
+            success = self.service.launch_spectate_client(spectate_cmd) 
+            
+            if not success:
+                self.console.log("Trying alternative launch method...", "WARNING")
+                success = self.service.launch_spectate_client_alternative(spectate_cmd)
+            
+            if success:
+                self.console.log("Spectate command successfully executed", "SUCCESS")
+            else:
+                self.console.log("All launch methods failed", "ERROR")
+            
+        except Exception as e:
+            self.console.log(f"[SPECTATE-ERR5] Error during spectate test: {str(e)}", "ERROR")
+            import traceback
+            self.console.log(f"[SPECTATE-TRACE] {traceback.format_exc()}", "ERROR")
+        finally:
+            self.finish_spectate_test(sender, original_text)
+
+    def finish_spectate_test(self, sender, original_text):
+        # Réactiver le bouton
+        if sender:
+            sender.setText(original_text)
+            sender.setEnabled(True)
+            self.console.log("[SPECTATE-014] Re-enabled UI button", "DEBUG")
+
     def test_stream(self):
         """Test the stream functionality without starting the service"""
         self.console.log("[STREAM-001] Starting stream test", "INFO")
@@ -1513,7 +1743,7 @@ class MainWindow(QMainWindow):
             self.console.log("[STREAM-002] Searching for active players", "INFO")
             for row in range(self.players_table.rowCount()):
                 try:
-                    cell_widget = self.players_table.cellWidget(row, 4)
+                    cell_widget = self.players_table.cellWidget(row, 5)
                     if cell_widget:
                         is_active = "Actif" in cell_widget.findChild(QPushButton).text()
                         if is_active:
@@ -1542,11 +1772,11 @@ class MainWindow(QMainWindow):
             # Effectuer le test de stream
             try:
                 # Vérifier si OBS est configuré
-                if not self.config.obs_password or not self.config.obs_address:
+                if not self.config.obs_host or not self.config.obs_port:
                     self.console.log("[STREAM-ERR2] OBS settings are not configured", "ERROR")
                     return
                 
-                self.console.log(f"[STREAM-007] Connecting to OBS at {self.config.obs_address}", "INFO")
+                self.console.log(f"[STREAM-007] Connecting to OBS at {self.config.obs_host}:{self.config.obs_port}", "INFO")
                 
                 # Vérifier que le joueur est dans la configuration
                 if player_name not in self.config.players:
@@ -1561,90 +1791,33 @@ class MainWindow(QMainWindow):
                 
                 self.console.log(f"[STREAM-008] Player {player_name} has valid streaming config (channel: {player_config.channel_name})", "INFO")
                 
-                # Tentative d'envoi d'une commande test à OBS
-                import json
-                import websocket
-                import base64
-                import hashlib
-                from datetime import datetime
+                from obs_manager import OBSWebSocket
                 
-                # Fonction pour envoyer une commande
-                def send_command(ws, request_type, request_data=None):
-                    if request_data is None:
-                        request_data = {}
-                    
-                    message = {
-                        "request-type": request_type,
-                        "message-id": f"test-{datetime.now().timestamp()}",
-                        **request_data
-                    }
-                    
-                    self.console.log(f"[STREAM-009] Sending OBS command: {request_type}", "DEBUG")
-                    ws.send(json.dumps(message))
-                    response = json.loads(ws.recv())
-                    return response
-                
-                # Créer la connexion WebSocket à OBS
+                # Créer la connexion WebSocket à OBS (Hello / Identify, authentification comprise)
+                ws = OBSWebSocket(self.config.obs_host, self.config.obs_port, self.config.obs_password)
                 try:
                     self.console.log("[STREAM-010] Creating WebSocket connection to OBS", "INFO")
-                    ws = websocket.create_connection(self.config.obs_address)
+                    ws.connect()
+                    self.console.log("[STREAM-013] Connected and authenticated", "SUCCESS")
                 except Exception as e:
                     self.console.log(f"[STREAM-ERR5] Failed to connect to OBS: {str(e)}", "ERROR")
                     return
                 
-                # Authentifier
-                try:
-                    self.console.log("[STREAM-011] Starting OBS authentication", "INFO")
-                    auth_response = send_command(ws, "GetAuthRequired")
-                    
-                    if auth_response.get("authRequired"):
-                        self.console.log("[STREAM-012] Authentication required, generating auth hash", "INFO")
-                        
-                        try:
-                            secret = base64.b64encode(hashlib.sha256(
-                                (self.config.obs_password + auth_response["salt"]).encode()
-                            ).digest())
-                            
-                            auth_response = send_command(ws, "Authenticate", {
-                                "auth": base64.b64encode(
-                                    hashlib.sha256(secret + auth_response["challenge"].encode()).digest()
-                                ).decode()
-                            })
-                        except Exception as e:
-                            self.console.log(f"[STREAM-ERR6] Error generating auth hash: {str(e)}", "ERROR")
-                            ws.close()
-                            return
-                        
-                        if auth_response.get("status") != "ok":
-                            self.console.log(f"[STREAM-ERR7] Authentication failed: {auth_response.get('error')}", "ERROR")
-                            ws.close()
-                            return
-                        
-                        self.console.log("[STREAM-013] Authentication successful", "SUCCESS")
-                    else:
-                        self.console.log("[STREAM-014] No authentication required", "INFO")
-                except Exception as e:
-                    self.console.log(f"[STREAM-ERR8] Error during authentication: {str(e)}", "ERROR")
-                    ws.close()
-                    return
-                
-                # Test de récupération de la liste des scènes
+                # Test de récupération des scènes et de l'état du stream, en un seul aller-retour
                 try:
-                    self.console.log("[STREAM-015] Requesting scene list", "INFO")
-                    scenes_response = send_command(ws, "GetSceneList")
-                    
-                    if scenes_response.get("status") == "ok":
-                        scene_names = [scene["name"] for scene in scenes_response.get("scenes", [])]
-                        self.console.log(f"[STREAM-016] Found {len(scene_names)} scenes in OBS", "SUCCESS")
-                        if scene_names:
-                            self.console.log(f"[STREAM-017] Sample scenes: {', '.join(scene_names[:3])}", "INFO")
-                    else:
-                        self.console.log(f"[STREAM-ERR9] Failed to get scene list: {scenes_response.get('error')}", "ERROR")
+                    self.console.log("[STREAM-015] Requesting scene list and stream status", "INFO")
+                    scenes, status = ws.call_batch([("GetSceneList", None), ("GetStreamStatus", None)])
+                    scene_names = [scene["sceneName"] for scene in scenes.get("scenes", [])]
+                    self.console.log(f"[STREAM-016] Found {len(scene_names)} scenes in OBS", "SUCCESS")
+                    if scene_names:
+                        self.console.log(f"[STREAM-017] Sample scenes: {', '.join(scene_names[:3])}", "INFO")
+                    self.console.log(f"[STREAM-017] Stream output active: {status.get('outputActive', False)}", "INFO")
                 except Exception as e:
-                    self.console.log(f"[STREAM-ERR10] Error getting scene list: {str(e)}", "ERROR")
+                    self.console.log(f"[STREAM-ERR10] Error querying OBS: {str(e)}", "ERROR")
+                finally:
+                    # Fermer la connexion
+                    ws.disconnect()
                 
-                # Fermer la connexion
-                ws.close()
                 self.console.log("[STREAM-018] OBS connection test completed successfully", "SUCCESS")
                 
             except Exception as e:
@@ -1,17 +1,20 @@
 # ui/settings_dialog.py
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                               QLineEdit, QPushButton, QFormLayout, QMessageBox, QFileDialog, QComboBox, QSpinBox)
-from PySide6.QtCore import Qt
-import asyncio
-from pantheon import pantheon
-from league import LeagueAPI as League
+from PySide6.QtCore import Qt, Signal
+from league import LeagueAPI as League, RiotAPIError, LANE_INTERACTIVE
 import os
 
 class SettingsDialog(QDialog):
+    # Résultat de la vérification de la clé API (valide, erreur), émis depuis le runtime asyncio
+    api_key_checked = Signal(object, object)
+
     def __init__(self, config, parent=None):
         super().__init__(parent)
         self.setWindowTitle("OBS Settings")
         self.config = config
+        self.api_key_future = None
+        self.api_key_checked.connect(self.on_api_key_checked)
         
         self.setup_ui()
 
@@ -43,6 +46,16 @@ class SettingsDialog(QDialog):
         self.obs_port_input.setValue(self.config.obs_port)
         self.obs_password_input = QLineEdit(self.config.obs_password)
         self.riot_api_key_input = QLineEdit(self.config.riot_api_key)
+        self.stream_preference_input = QComboBox()
+        self.stream_preference_input.addItem("Highest priority player", "priority")
+        self.stream_preference_input.addItem("Most tracked players", "most_players")
+        self.stream_preference_input.setCurrentIndex(
+            max(0, self.stream_preference_input.findData(self.config.stream_preference)))
+        # Sources texte OBS renseignées avec le joueur streamé et son rang
+        self.overlay_name_input = QLineEdit(self.config.overlay_name_input)
+        self.overlay_name_input.setPlaceholderText("OBS text source for the player name (optional)")
+        self.overlay_rank_input = QLineEdit(self.config.overlay_rank_input)
+        self.overlay_rank_input.setPlaceholderText("OBS text source for the rank (optional)")
         
         # Add to layout
         layout.addRow("OBS Path:", obs_path_layout)
@@ -51,6 +64,9 @@ class SettingsDialog(QDialog):
         layout.addRow("OBS Port:", self.obs_port_input)
         layout.addRow("OBS Password:", self.obs_password_input)
         layout.addRow("Riot API Key:", self.riot_api_key_input)
+        layout.addRow("Stream Game:", self.stream_preference_input)
+        layout.addRow("Player Name Source:", self.overlay_name_input)
+        layout.addRow("Rank Source:", self.overlay_rank_input)
         
         # Buttons
         buttons = QHBoxLayout()
@@ -103,54 +119,76 @@ class SettingsDialog(QDialog):
         }
 
     def test_connection(self):
-        from obswebsocket import obsws
+        from obs_manager import OBSWebSocket
         ws = None
         try:
-            ws = obsws(
+            ws = OBSWebSocket(
                 self.obs_host_input.text(),
                 int(self.obs_port_input.text()),
                 self.obs_password_input.text()
             )
             ws.connect()
-            QMessageBox.information(self, "Success", "Successfully connected to OBS!")
+            version = ws.call("GetVersion")
+            QMessageBox.information(self, "Success", "Successfully connected to OBS "
+                                    f"{version.get('obsVersion', '')} (websocket {version.get('obsWebSocketVersion', '')})!")
         except Exception as e:
             QMessageBox.warning(self, "Connection Failed", f"Could not connect to OBS: {str(e)}")
         finally:
-            # S'assurer que la déconnexion est toujours tentée si ws existe et est connecté
-            if ws and hasattr(ws, 'ws') and ws.ws is not None and ws.ws.connected:
-                try:
-                    ws.disconnect()
-                except:
-                    pass  # Ignorer les erreurs de déconnexion ici
+            # S'assurer que la déconnexion est toujours tentée si ws existe
+            if ws is not None:
+                ws.disconnect()
 
     def test_api_key(self):
-        """Test if the Riot API key is valid"""
+        """Test if the Riot API key is valid (the answer arrives in on_api_key_checked)"""
+        if self.api_key_future is not None:
+            return
         try:
             # Create a League instance with the new API key
             league = League(
                 api_key=self.riot_api_key_input.text(),
-                region="euw1"  # Use a default region for testing
+                region="euw1",  # Use a default region for testing
+                lane=LANE_INTERACTIVE
             )
             
-            # Try to fetch a test summoner - this will validate the API key
-            response = league.verify_api_key()
-            
-            if response:
-                QMessageBox.information(self, "Success", "API key is valid!")
-                return True
-            else:
-                QMessageBox.warning(self, "Error", "Invalid API key")
-                return False
-            
+            # La vérification tourne sur le runtime asyncio : l'interface reste réactive
+            self.api_key_future = league.runtime.submit(league._verify_api_key())
+            self.api_key_future.add_done_callback(self.emit_api_key_result)
         except Exception as e:
-            error_msg = str(e)
-            if "403" in error_msg:
+            QMessageBox.warning(self, "Error", f"Failed to validate API key: {str(e)}")
+
+    def emit_api_key_result(self, future):
+        """Forward the verification result to the GUI thread (called on the runtime thread)"""
+        if future.cancelled():
+            return
+        try:
+            error = future.exception()
+            self.api_key_checked.emit(None if error else future.result(), error)
+        except RuntimeError:
+            # Dialogue déjà détruit
+            pass
+
+    def on_api_key_checked(self, valid, error):
+        self.api_key_future = None
+        if isinstance(error, RiotAPIError):
+            if error.status == 403:
                 QMessageBox.warning(self, "Error", "Invalid API key (403 Forbidden)")
-            elif "401" in error_msg:
+            elif error.status == 401:
                 QMessageBox.warning(self, "Error", "Unauthorized API key (401)")
             else:
-                QMessageBox.warning(self, "Error", f"Failed to validate API key: {error_msg}")
-            return False
+                QMessageBox.warning(self, "Error", f"Failed to validate API key: {str(error)}")
+        elif error is not None:
+            QMessageBox.warning(self, "Error", f"Failed to validate API key: {str(error)}")
+        elif valid:
+            QMessageBox.information(self, "Success", "API key is valid!")
+        else:
+            QMessageBox.warning(self, "Error", "Invalid API key")
+
+    def reject(self):
+        # Abandonner une vérification en cours
+        if self.api_key_future is not None:
+            self.api_key_future.cancel()
+            self.api_key_future = None
+        QDialog.reject(self)
 
     def accept(self):
         """Save settings and close dialog"""
@@ -160,6 +198,9 @@ class SettingsDialog(QDialog):
         self.config.obs_password = self.obs_password_input.text()
         self.config.riot_api_key = self.riot_api_key_input.text()
         self.config.league_path = self.league_path_input.text()
+        self.config.stream_preference = self.stream_preference_input.currentData()
+        self.config.overlay_name_input = self.overlay_name_input.text().strip()
+        self.config.overlay_rank_input = self.overlay_rank_input.text().strip()
         
         self.config.save()
         QDialog.accept(self)
\ No newline at end of file
@@ -0,0 +1,721 @@
+# obs_standin.py
+"""Local stand-in for the obs-websocket v5 server used by League-Spectate.
+
+Speaks the v5 protocol on ws://HOST:PORT (Hello / Identify with salt and
+challenge authentication, Request, RequestBatch and events), with enough
+of OBS behind it for the app: scenes, text sources, profiles and profile
+parameters, stream service settings, StartStream / StopStream with
+StreamStateChanged events, and stream statistics.
+
+Latency is added to every message (a RequestBatch pays it once), requests
+can be made to fail at a given rate, and the stream output drops frames
+at a configurable rate, plus all the frames above the simulated upload
+bandwidth. `--flap` drops every client periodically to exercise
+reconnection.
+
+    python tools/obs_standin.py --password secret --latency 0.02
+    python tools/obs_standin.py --fail StartStream=0.2 --drop-rate 0.01 --bandwidth 4500
+
+Point the app at it with "obs_host" / "obs_port" / "obs_password" in
+settings.json (no OBS process is needed once connected).
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_HELLO = 0
+OP_IDENTIFY = 1
+OP_IDENTIFIED = 2
+OP_REIDENTIFY = 3
+OP_EVENT = 5
+OP_REQUEST = 6
+OP_REQUEST_RESPONSE = 7
+OP_REQUEST_BATCH = 8
+OP_REQUEST_BATCH_RESPONSE = 9
+
+# Codes de statut des requêtes (RequestStatus)
+STATUS_SUCCESS = 100
+STATUS_MISSING_REQUEST_TYPE = 203
+STATUS_UNKNOWN_REQUEST_TYPE = 204
+STATUS_MISSING_REQUEST_FIELD = 300
+STATUS_OUTPUT_RUNNING = 500
+STATUS_OUTPUT_NOT_RUNNING = 501
+STATUS_RESOURCE_NOT_FOUND = 600
+STATUS_RESOURCE_ALREADY_EXISTS = 601
+STATUS_REQUEST_PROCESSING_FAILED = 702
+
+# Codes de fermeture du websocket
+CLOSE_NOT_IDENTIFIED = 4007
+CLOSE_ALREADY_IDENTIFIED = 4008
+CLOSE_AUTHENTICATION_FAILED = 4009
+CLOSE_UNSUPPORTED_RPC_VERSION = 4010
+
+# Catégories d'événements (masque eventSubscriptions)
+EVENT_GENERAL = 1 << 0
+EVENT_CONFIG = 1 << 1
+EVENT_SCENES = 1 << 2
+EVENT_INPUTS = 1 << 3
+EVENT_OUTPUTS = 1 << 6
+EVENT_ALL = (1 << 11) - 1
+
+OUTPUT_STARTING = "OBS_WEBSOCKET_OUTPUT_STARTING"
+OUTPUT_STARTED = "OBS_WEBSOCKET_OUTPUT_STARTED"
+OUTPUT_STOPPING = "OBS_WEBSOCKET_OUTPUT_STOPPING"
+OUTPUT_STOPPED = "OBS_WEBSOCKET_OUTPUT_STOPPED"
+
+FPS = 60
+
+# Débit vidéo par défaut du profil (kbit/s), comme la sortie simple d'OBS
+DEFAULT_VIDEO_BITRATE = 6000
+DEFAULT_AUDIO_BITRATE = 160
+
+DEFAULT_SCENES = ["Game", "Starting Soon", "Be Right Back"]
+
+# Sources texte présentes par défaut (overlays)
+DEFAULT_TEXT_INPUTS = ["Player Name", "Rank"]
+TEXT_INPUT_KIND = "text_gdiplus_v2"
+
+# Paramètres d'un profil neuf (sortie simple, x264)
+DEFAULT_PROFILE_PARAMETERS = {
+    ("Output", "Mode"): "Simple",
+    ("SimpleOutput", "StreamEncoder"): "x264",
+    ("SimpleOutput", "VBitrate"): str(DEFAULT_VIDEO_BITRATE),
+    ("SimpleOutput", "Preset"): "veryfast",
+}
+
+# Charge CPU relative des presets x264 (veryfast = 1)
+PRESET_CPU_COST = {"medium": 2.5, "fast": 1.8, "faster": 1.4, "veryfast": 1.0, "superfast": 0.75, "ultrafast": 0.5}
+
+
+class StandinOBS:
+    """State of the simulated OBS instance, shared by every client"""
+
+    def __init__(self, scenes: Optional[List[str]] = None, profiles: Optional[List[str]] = None,
+                 inputs: Optional[List[str]] = None,
+                 start_delay: float = 0.5, drop_rate: float = 0.0, bandwidth: float = 0.0,
+                 cpu_usage: float = 5.0, fail_rates: Optional[Dict[str, float]] = None):
+        self.lock = threading.RLock()
+        self.scenes = list(scenes or DEFAULT_SCENES)
+        self.program_scene = self.scenes[0]
+        self.scene_collections = ["Untitled"]
+        self.scene_collection = self.scene_collections[0]
+        self.profiles = list(profiles or ["Untitled"])
+        self.profile = self.profiles[0]
+        # {nom de source: (type, réglages)}
+        self.inputs: Dict[str, Tuple[str, Dict[str, Any]]] = {
+            name: (TEXT_INPUT_KIND, {"text": ""}) for name in (inputs if inputs is not None else DEFAULT_TEXT_INPUTS)}
+        # {profil: {(catégorie, nom): valeur}}
+        self.profile_parameters: Dict[str, Dict[Tuple[str, str], str]] = {}
+        # {profil: service de diffusion}, enregistré dans le profil comme dans OBS
+        self.stream_services: Dict[str, Dict[str, Any]] = {}
+        self.start_delay = start_delay
+        self.drop_rate = drop_rate
+        # Débit montant simulé (kbit/s, 0 = illimité) : au-delà, les images sont perdues
+        self.bandwidth = bandwidth
+        # Charge CPU simulée avec le preset veryfast
+        self.cpu_usage = cpu_usage
+        self.fail_rates = dict(fail_rates or {})
+        self.output_state = OUTPUT_STOPPED
+        self.output_started_at: Optional[float] = None
+        self.output_frames = 0
+        self.output_skipped = 0
+        self.output_bytes = 0
+        # Débit vidéo et preset lus au démarrage de la sortie, comme OBS : modifier
+        # le profil pendant le stream ne change pas la sortie en cours
+        self.output_bitrate = DEFAULT_VIDEO_BITRATE
+        self.output_preset: Optional[str] = None
+        self._sampled_at: Optional[float] = None
+        self.started_at = time.monotonic()
+        self.emit: Callable[[str, int, Dict[str, Any]], None] = lambda event_type, intent, data: None
+
+    # --- Paramètres du profil ---
+
+    def get_parameter(self, category: str, name: str) -> Optional[str]:
+        key = (category, name)
+        return self.profile_parameters.get(self.profile, {}).get(key, DEFAULT_PROFILE_PARAMETERS.get(key))
+
+    @property
+    def stream_service(self) -> Dict[str, Any]:
+        return self.stream_services.setdefault(self.profile, {
+            "streamServiceType": "rtmp_common",
+            "streamServiceSettings": {"service": "Twitch", "server": "auto", "key": ""}})
+
+    @stream_service.setter
+    def stream_service(self, service: Dict[str, Any]):
+        self.stream_services[self.profile] = service
+
+    def video_bitrate(self) -> float:
+        for category in ("SimpleOutput", "AdvOut"):
+            value = self.get_parameter(category, "VBitrate")
+            if value:
+                try:
+                    return float(value)
+                except ValueError:
+                    pass
+        return DEFAULT_VIDEO_BITRATE
+
+    # --- Sortie stream ---
+
+    @property
+    def output_active(self) -> bool:
+        return self.output_state == OUTPUT_STARTED
+
+    def sample_output(self, now: Optional[float] = None):
+        """Advance the output counters up to now (frames, dropped frames, bytes)"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if not self.output_active or self._sampled_at is None:
+                self._sampled_at = now
+                return
+            elapsed = now - self._sampled_at
+            frames = int(elapsed * FPS)
+            if frames <= 0:
+                return
+            self._sampled_at += frames / FPS
+            bitrate = self.output_bitrate
+            # Part du débit qui ne passe pas : perdue en plus des pertes aléatoires
+            congestion = max(0.0, 1 - self.bandwidth / bitrate) if self.bandwidth else 0.0
+            skipped = sum(1 for _ in range(frames) if random.random() < self.drop_rate)
+            skipped = min(frames, skipped + int(frames * congestion))
+            self.output_frames += frames
+            self.output_skipped += skipped
+            sent_ratio = (frames - skipped) / frames
+            self.output_bytes += int((bitrate + DEFAULT_AUDIO_BITRATE) * 1000 / 8 * (frames / FPS) * sent_ratio)
+
+    def cpu(self) -> float:
+        if not self.output_active:
+            return min(100.0, self.cpu_usage * 0.2)
+        return min(100.0, self.cpu_usage * PRESET_CPU_COST.get(self.output_preset, 1.0))
+
+    def congestion(self) -> float:
+        if not self.bandwidth or not self.output_active:
+            return 0.0
+        return min(1.0, max(0.0, 1 - self.bandwidth / self.output_bitrate))
+
+    def set_output_state(self, state: str):
+        with self.lock:
+            self.output_state = state
+            if state == OUTPUT_STARTED:
+                self.output_started_at = time.monotonic()
+                self.output_frames = self.output_skipped = self.output_bytes = 0
+                self._sampled_at = self.output_started_at
+            elif state == OUTPUT_STOPPED:
+                self.output_started_at = None
+        self.emit("StreamStateChanged", EVENT_OUTPUTS,
+                  {"outputActive": state == OUTPUT_STARTED, "outputState": state})
+
+    def start_output(self):
+        with self.lock:
+            self.output_bitrate = self.video_bitrate()
+            self.output_preset = self.get_parameter("SimpleOutput", "Preset")
+        self.set_output_state(OUTPUT_STARTING)
+
+        def started():
+            with self.lock:
+                if self.output_state != OUTPUT_STARTING:
+                    return
+            self.set_output_state(OUTPUT_STARTED)
+
+        threading.Timer(self.start_delay, started).start()
+
+    def stop_output(self):
+        self.sample_output()
+        self.set_output_state(OUTPUT_STOPPING)
+        self.set_output_state(OUTPUT_STOPPED)
+
+    def stream_status(self) -> Dict[str, Any]:
+        self.sample_output()
+        with self.lock:
+            duration = time.monotonic() - self.output_started_at if self.output_started_at else 0
+            return {
+                "outputActive": self.output_active,
+                "outputReconnecting": False,
+                "outputTimecode": time.strftime("%H:%M:%S.000", time.gmtime(duration)),
+                "outputDuration": int(duration * 1000),
+                "outputCongestion": self.congestion(),
+                "outputBytes": self.output_bytes,
+                "outputSkippedFrames": self.output_skipped,
+                "outputTotalFrames": self.output_frames,
+            }
+
+    # --- Requêtes ---
+
+    def handle(self, request_type: str, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any], str]:
+        """Run one request: (status code, responseData, comment)"""
+        rate = self.fail_rates.get(request_type, self.fail_rates.get("*", 0.0))
+        if rate and random.random() < rate:
+            return STATUS_REQUEST_PROCESSING_FAILED, {}, "Injected failure"
+        handler = getattr(self, "request_" + request_type, None)
+        if handler is None:
+            return STATUS_UNKNOWN_REQUEST_TYPE, {}, f"Your request type is not valid: {request_type}"
+        try:
+            with self.lock:
+                result = handler(data)
+        except KeyError as e:
+            return STATUS_MISSING_REQUEST_FIELD, {}, f"Your request is missing the `{e.args[0]}` field."
+        if isinstance(result, tuple):
+            return result
+        return STATUS_SUCCESS, result or {}, ""
+
+    def request_GetVersion(self, data):
+        return {"obsVersion": "30.0.0", "obsWebSocketVersion": "5.3.0", "rpcVersion": 1,
+                "availableRequests": sorted(name[len("request_"):] for name in dir(self)
+                                            if name.startswith("request_")),
+                "platform": "standin", "platformDescription": "League-Spectate OBS stand-in"}
+
+    def request_GetStats(self, data):
+        status = self.stream_status()
+        return {"cpuUsage": self.cpu(), "memoryUsage": 300.0, "availableDiskSpace": 100000.0,
+                "activeFps": float(FPS), "averageFrameRenderTime": 1.5,
+                "renderSkippedFrames": 0, "renderTotalFrames": int((time.monotonic() - self.started_at) * FPS),
+                "outputSkippedFrames": status["outputSkippedFrames"],
+                "outputTotalFrames": status["outputTotalFrames"],
+                "webSocketSessionIncomingMessages": 0, "webSocketSessionOutgoingMessages": 0}
+
+    def request_GetSceneList(self, data):
+        return {"currentProgramSceneName": self.program_scene, "currentPreviewSceneName": None,
+                "scenes": [{"sceneName": name, "sceneIndex": len(self.scenes) - 1 - index}
+                           for index, name in enumerate(self.scenes)]}
+
+    def request_GetCurrentProgramScene(self, data):
+        return {"currentProgramSceneName": self.program_scene, "sceneName": self.program_scene}
+
+    def request_SetCurrentProgramScene(self, data):
+        name = data["sceneName"]
+        if name not in self.scenes:
+            return STATUS_RESOURCE_NOT_FOUND, {}, f"No source was found by the name of `{name}`."
+        if name != self.program_scene:
+            self.program_scene = name
+            self.emit("CurrentProgramSceneChanged", EVENT_SCENES, {"sceneName": name})
+
+    def request_CreateScene(self, data):
+        name = data["sceneName"]
+        if name in self.scenes:
+            return STATUS_RESOURCE_ALREADY_EXISTS, {}, "A source already exists by that scene name."
+        self.scenes.append(name)
+        self.emit("SceneCreated", EVENT_SCENES, {"sceneName": name, "isGroup": False})
+
+    def request_GetSceneCollectionList(self, data):
+        return {"currentSceneCollectionName": self.scene_collection, "sceneCollections": list(self.scene_collections)}
+
+    def request_SetCurrentSceneCollection(self, data):
+        name = data["sceneCollectionName"]
+        if name not in self.scene_collections:
+            return STATUS_RESOURCE_NOT_FOUND, {}, "No scene collection was found by that name."
+        if name != self.scene_collection:
+            self.scene_collection = name
+            self.emit("CurrentSceneCollectionChanged", EVENT_CONFIG, {"sceneCollectionName": name})
+
+    def request_GetInputList(self, data):
+        kind = data.get("inputKind")
+        return {"inputs": [{"inputName": name, "inputKind": input_kind, "unversionedInputKind": input_kind}
+                           for name, (input_kind, _) in self.inputs.items() if kind is None or kind == input_kind]}
+
+    def request_GetInputSettings(self, data):
+        name = data["inputName"]
+        if name not in self.inputs:
+            return STATUS_RESOURCE_NOT_FOUND, {}, f"No source was found by the name of `{name}`."
+        input_kind, settings = self.inputs[name]
+        return {"inputSettings": dict(settings), "inputKind": input_kind}
+
+    def request_SetInputSettings(self, data):
+        name = data["inputName"]
+        if name not in self.inputs:
+            return STATUS_RESOURCE_NOT_FOUND, {}, f"No source was found by the name of `{name}`."
+        input_kind, settings = self.inputs[name]
+        if data.get("overlay", True):
+            settings = dict(settings, **data["inputSettings"])
+        else:
+            settings = dict(data["inputSettings"])
+        self.inputs[name] = (input_kind, settings)
+        self.emit("InputSettingsChanged", EVENT_INPUTS, {"inputName": name, "inputSettings": settings})
+
+    def request_GetProfileList(self, data):
+        return {"currentProfileName": self.profile, "profiles": list(self.profiles)}
+
+    def request_SetCurrentProfile(self, data):
+        name = data["profileName"]
+        if name not in self.profiles:
+            return STATUS_RESOURCE_NOT_FOUND, {}, "No profile was found by that name."
+        if self.output_state != OUTPUT_STOPPED:
+            return STATUS_OUTPUT_RUNNING, {}, "The profile cannot be changed while an output is active."
+        if name != self.profile:
+            self.profile = name
+            self.emit("CurrentProfileChanged", EVENT_CONFIG, {"profileName": name})
+
+    def request_CreateProfile(self, data):
+        name = data["profileName"]
+        if name in self.profiles:
+            return STATUS_RESOURCE_ALREADY_EXISTS, {}, "A profile already exists by that name."
+        self.profiles.append(name)
+
+    def request_GetProfileParameter(self, data):
+        key = (data["parameterCategory"], data["parameterName"])
+        return {"parameterValue": self.get_parameter(*key), "defaultParameterValue": DEFAULT_PROFILE_PARAMETERS.get(key)}
+
+    def request_SetProfileParameter(self, data):
+        key = (data["parameterCategory"], data["parameterName"])
+        parameters = self.profile_parameters.setdefault(self.profile, {})
+        # Sans effet sur la sortie en cours : débit et preset sont lus au démarrage (start_output)
+        if data.get("parameterValue") is None:
+            parameters.pop(key, None)
+        else:
+            parameters[key] = str(data["parameterValue"])
+
+    def request_GetStreamServiceSettings(self, data):
+        return json.loads(json.dumps(self.stream_service))
+
+    def request_SetStreamServiceSettings(self, data):
+        settings = dict(data["streamServiceSettings"])
+        if data["streamServiceType"] == self.stream_service["streamServiceType"]:
+            # Même type de service : OBS applique les réglages reçus sur les réglages actuels
+            settings = dict(self.stream_service["streamServiceSettings"], **settings)
+        self.stream_service = {"streamServiceType": data["streamServiceType"], "streamServiceSettings": settings}
+
+    def request_GetStreamStatus(self, data):
+        return self.stream_status()
+
+    def request_StartStream(self, data):
+        if self.output_state != OUTPUT_STOPPED:
+            return STATUS_OUTPUT_RUNNING, {}, "The stream output is already active."
+        self.start_output()
+
+    def request_StopStream(self, data):
+        if self.output_state == OUTPUT_STOPPED:
+            return STATUS_OUTPUT_NOT_RUNNING, {}, "The stream output is not active."
+        self.stop_output()
+
+    def request_ToggleStream(self, data):
+        if self.output_state == OUTPUT_STOPPED:
+            self.start_output()
+            return {"outputActive": True}
+        self.stop_output()
+        return {"outputActive": False}
+
+
+def _auth_string(password: str, salt: str, challenge: str) -> str:
+    secret = base64.b64encode(hashlib.sha256((password + salt).encode()).digest())
+    return base64.b64encode(hashlib.sha256(secret + challenge.encode()).digest()).decode()
+
+
+class OBSStandinServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, obs: StandinOBS, password: str = "", latency: float = 0.0,
+                 jitter: float = 0.0, verbose: bool = False):
+        super().__init__(address, OBSStandinHandler)
+        self.obs = obs
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.verbose = verbose
+        self.clients: List["OBSStandinHandler"] = []
+        self.clients_lock = threading.Lock()
+        # Refus des nouvelles connexions jusqu'à cette date (OBS fermé)
+        self.offline_until = 0.0
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.stats_lock = threading.Lock()
+        obs.emit = self.broadcast
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"ws://{host}:{port}"
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def count(self, request_type: str, code: int):
+        with self.stats_lock:
+            counters = self.stats.setdefault(request_type, {})
+            counters[str(code)] = counters.get(str(code), 0) + 1
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def broadcast(self, event_type: str, intent: int, data: Dict[str, Any]):
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            if client.event_subscriptions & intent:
+                client.send_message(OP_EVENT, {"eventType": event_type, "eventIntent": intent, "eventData": data})
+
+    def drop_clients(self, offline: float = 0.0):
+        """Close every connection (OBS crash / restart); refuse new ones for `offline` seconds"""
+        self.offline_until = time.monotonic() + offline
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.abort()
+
+
+class OBSStandinHandler(socketserver.StreamRequestHandler):
+    server: OBSStandinServer
+
+    def setup(self):
+        super().setup()
+        self.send_lock = threading.Lock()
+        self.event_subscriptions = 0
+        self.identified = False
+
+    def log(self, message: str):
+        if self.server.verbose:
+            print(f"[{self.client_address[0]}:{self.client_address[1]}] {message}")
+
+    # --- Trames websocket ---
+
+    def handshake(self) -> bool:
+        request_line = self.rfile.readline()
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if not request_line or not key or headers.get("upgrade", "").lower() != "websocket":
+            self.wfile.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        response = ("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                    f"Sec-WebSocket-Accept: {accept}\r\n")
+        if "obswebsocket.json" in headers.get("sec-websocket-protocol", ""):
+            response += "Sec-WebSocket-Protocol: obswebsocket.json\r\n"
+        self.wfile.write((response + "\r\n").encode())
+        return True
+
+    def read_exact(self, size: int) -> bytes:
+        data = self.rfile.read(size)
+        if len(data) < size:
+            raise EOFError()
+        return data
+
+    def read_message(self) -> Optional[str]:
+        """Next text message (None when the client closes)"""
+        message = b""
+        while True:
+            first, second = self.read_exact(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", self.read_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", self.read_exact(8))[0]
+            mask = self.read_exact(4) if second & 0x80 else b"\0\0\0\0"
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(self.read_exact(length)))
+            if opcode == 0x8:
+                self.send_frame(0x8, payload[:2])
+                return None
+            if opcode == 0x9:
+                self.send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if first & 0x80:
+                return message.decode("utf-8")
+
+    def send_frame(self, opcode: int, payload: bytes):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        with self.send_lock:
+            try:
+                self.wfile.write(header + payload)
+            except OSError:
+                pass
+
+    def send_message(self, op: int, data: Dict[str, Any]):
+        self.send_frame(0x1, json.dumps({"op": op, "d": data}).encode("utf-8"))
+
+    def close(self, code: int, reason: str = ""):
+        self.send_frame(0x8, struct.pack(">H", code) + reason.encode("utf-8"))
+
+    def abort(self):
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    # --- Protocole obs-websocket ---
+
+    def handle(self):
+        if time.monotonic() < self.server.offline_until:
+            return
+        try:
+            if not self.handshake():
+                return
+            with self.server.clients_lock:
+                self.server.clients.append(self)
+            self.session()
+        except (EOFError, OSError, ValueError):
+            pass
+        finally:
+            with self.server.clients_lock:
+                if self in self.server.clients:
+                    self.server.clients.remove(self)
+            self.log("disconnected")
+
+    def session(self):
+        salt = base64.b64encode(os.urandom(32)).decode()
+        challenge = base64.b64encode(os.urandom(32)).decode()
+        hello = {"obsWebSocketVersion": "5.3.0", "rpcVersion": 1}
+        if self.server.password:
+            hello["authentication"] = {"challenge": challenge, "salt": salt}
+        self.send_message(OP_HELLO, hello)
+
+        while True:
+            raw = self.read_message()
+            if raw is None:
+                return
+            message = json.loads(raw)
+            op, data = message.get("op"), message.get("d") or {}
+            if not self.identified:
+                if op != OP_IDENTIFY:
+                    return self.close(CLOSE_NOT_IDENTIFIED, "The session has not been identified yet.")
+                if data.get("rpcVersion") != 1:
+                    return self.close(CLOSE_UNSUPPORTED_RPC_VERSION, "Unsupported RPC version.")
+                if self.server.password and data.get("authentication") != _auth_string(
+                        self.server.password, salt, challenge):
+                    self.log("authentication failed")
+                    return self.close(CLOSE_AUTHENTICATION_FAILED, "Authentication failed.")
+                self.event_subscriptions = data.get("eventSubscriptions", EVENT_ALL)
+                self.identified = True
+                self.server.delay()
+                self.send_message(OP_IDENTIFIED, {"negotiatedRpcVersion": 1})
+                self.log("identified")
+            elif op == OP_IDENTIFY:
+                return self.close(CLOSE_ALREADY_IDENTIFIED, "You are already identified with the obs-websocket server.")
+            elif op == OP_REIDENTIFY:
+                self.event_subscriptions = data.get("eventSubscriptions", self.event_subscriptions)
+                self.send_message(OP_IDENTIFIED, {"negotiatedRpcVersion": 1})
+            elif op == OP_REQUEST:
+                self.server.delay()
+                self.send_message(OP_REQUEST_RESPONSE, self.run_request(data))
+            elif op == OP_REQUEST_BATCH:
+                # Un seul aller-retour pour tout le lot
+                self.server.delay()
+                self.send_message(OP_REQUEST_BATCH_RESPONSE, {
+                    "requestId": data.get("requestId"), "results": self.run_batch(data)})
+
+    def run_request(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        request_type = data.get("requestType")
+        response = {"requestType": request_type, "requestId": data.get("requestId")}
+        if not request_type:
+            code, result, comment = STATUS_MISSING_REQUEST_TYPE, {}, "Your request is missing a `requestType`"
+        else:
+            code, result, comment = self.server.obs.handle(request_type, data.get("requestData") or {})
+        self.server.count(request_type or "?", code)
+        self.log(f"{request_type} -> {code}")
+        response["requestStatus"] = {"result": code == STATUS_SUCCESS, "code": code}
+        if comment:
+            response["requestStatus"]["comment"] = comment
+        if result:
+            response["responseData"] = result
+        return response
+
+    def run_batch(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        results = []
+        for request in data.get("requests") or []:
+            if request.get("requestType") == "Sleep":
+                time.sleep((request.get("requestData") or {}).get("sleepMillis", 0) / 1000)
+                results.append({"requestType": "Sleep", "requestId": request.get("requestId"),
+                                "requestStatus": {"result": True, "code": STATUS_SUCCESS}})
+                continue
+            response = self.run_request(request)
+            results.append(response)
+            if data.get("haltOnFailure") and not response["requestStatus"]["result"]:
+                break
+        return results
+
+
+def start_server(obs: Optional[StandinOBS] = None, host: str = "127.0.0.1", port: int = 0,
+                 **options) -> OBSStandinServer:
+    """Start a stand-in server in a daemon thread (port 0 = any free port)"""
+    server = OBSStandinServer((host, port), obs or StandinOBS(), **options)
+    threading.Thread(target=server.serve_forever, name="obs-standin", daemon=True).start()
+    return server
+
+
+def parse_fail_rates(overrides: List[str]) -> Dict[str, float]:
+    """["StartStream=0.2", "*=0.01"] -> {"StartStream": 0.2, "*": 0.01}"""
+    rates = {}
+    for override in overrides:
+        request_type, _, rate = override.partition("=")
+        rates[request_type] = float(rate)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local obs-websocket v5 stand-in for League-Spectate")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4455)
+    parser.add_argument("--password", default="", help="Websocket password (default: no authentication)")
+    parser.add_argument("--latency", type=float, default=0.005, help="Base latency per message (s)")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Random extra latency (s)")
+    parser.add_argument("--start-delay", type=float, default=0.5, help="StartStream to output started (s)")
+    parser.add_argument("--scene", action="append", default=[], help="Scene name (repeatable)")
+    parser.add_argument("--profile", action="append", default=[], help="Profile name (repeatable)")
+    parser.add_argument("--text-input", action="append", default=None, help="Text source name (repeatable)")
+    parser.add_argument("--fail", action="append", default=[], metavar="REQUEST=RATE",
+                        help='Failure rate of a request type, e.g. "StartStream=0.2" ("*" for all)')
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Random dropped frame rate (0-1)")
+    parser.add_argument("--bandwidth", type=float, default=0.0,
+                        help="Upload bandwidth in kbit/s; frames above it are dropped (0: unlimited)")
+    parser.add_argument("--cpu", type=float, default=5.0, help="Simulated CPU usage while streaming (%%)")
+    parser.add_argument("--flap", type=float, default=0.0, help="Drop every client every N seconds")
+    parser.add_argument("--offline", type=float, default=2.0, help="Refuse connections for N s after a flap")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    obs = StandinOBS(scenes=args.scene or None, profiles=args.profile or None, inputs=args.text_input,
+                     start_delay=args.start_delay,
+                     drop_rate=args.drop_rate, bandwidth=args.bandwidth, cpu_usage=args.cpu,
+                     fail_rates=parse_fail_rates(args.fail))
+
+    server = OBSStandinServer((args.host, args.port), obs, password=args.password, latency=args.latency,
+                              jitter=args.jitter, verbose=args.verbose)
+    print(f"OBS websocket stand-in on {server.url} ({len(obs.scenes)} scenes, "
+          f"{'password required' if args.password else 'no authentication'})")
+    print(f'Set "obs_host": "{args.host}", "obs_port": {server.port} in settings.json to use it')
+
+    if args.flap:
+        def flap():
+            while True:
+                time.sleep(args.flap)
+                print(f"Dropping {len(server.clients)} client(s), offline for {args.offline}s")
+                server.drop_clients(args.offline)
+        threading.Thread(target=flap, name="obs-standin-flap", daemon=True).start()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for request_type, counters in sorted(server.stats.items()):
+            statuses = ", ".join(f"{code}: {count}" for code, count in sorted(counters.items()))
+            print(f"  {request_type:28} {sum(counters.values()):6}  ({statuses})")
+
+
+if __name__ == "__main__":
+    main()
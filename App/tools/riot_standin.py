@@ -0,0 +1,545 @@
+# riot_standin.py
+"""Local stand-in for the Riot API endpoints used by League-Spectate.
+
+Serves Account-V1, Summoner-V4, Spectator-V5 (active and featured games),
+League-V4 entries and champion rotations on http://HOST:PORT/<riot host>/<path>,
+which is the URL layout LeagueAPI uses when a base URL override is set
+(config "riot_base_url" or the RIOT_API_BASE_URL environment variable).
+
+Rate limits are enforced per key and host like Riot does (X-App-Rate-Limit /
+X-Method-Rate-Limit headers, 429 with Retry-After and X-Rate-Limit-Type), with
+configurable latency, and a scripted timeline decides who is in game when.
+
+    python tools/riot_standin.py --roster settings.json --generate --speed 30
+    python tools/riot_standin.py --scenario tools/scenarios/example.json
+
+Scenario file:
+    {
+        "accounts": [{"riot_id": "Name#TAG", "region": "euw1", "puuid": "...", "summoner_id": "..."}],
+        "games": [{"start": 0, "duration": 1800, "region": "euw1", "players": ["Name#TAG"], "featured": true}]
+    }
+Times are in scenario seconds; --speed makes scenario time run faster than
+wall time. puuid / summoner_id are optional (derived from the Riot ID).
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+# Limites d'une clé de développement
+DEFAULT_APP_LIMITS = "20:1,100:120"
+
+# Limites par méthode (noms identiques à ceux utilisés par league.py)
+DEFAULT_METHOD_LIMITS = {
+    "account-v1.by-riot-id": "1000:60",
+    "summoner-v4.by-puuid": "1600:60",
+    "summoner-v4.by-id": "1600:60",
+    "summoner-v4.by-name": "1600:60",
+    "spectator-v5.active-games": "20000:10,1200000:600",
+    "spectator-v5.featured-games": "20000:10,1200000:600",
+    "league-v4.entries": "100:60",
+    "champion-v3.rotations": "30:10,500:600",
+}
+
+FEATURED_REFRESH_INTERVAL = 300
+
+ROUTES = [
+    (re.compile(r"^/riot/account/v1/accounts/by-riot-id/([^/]+)/([^/]+)$"), "account-v1.by-riot-id"),
+    (re.compile(r"^/lol/summoner/v4/summoners/by-puuid/([^/]+)$"), "summoner-v4.by-puuid"),
+    (re.compile(r"^/lol/summoner/v4/summoners/by-name/([^/]+)$"), "summoner-v4.by-name"),
+    (re.compile(r"^/lol/summoner/v4/summoners/([^/]+)$"), "summoner-v4.by-id"),
+    (re.compile(r"^/lol/spectator/v5/active-games/by-summoner/([^/]+)$"), "spectator-v5.active-games"),
+    (re.compile(r"^/lol/spectator/v5/featured-games$"), "spectator-v5.featured-games"),
+    (re.compile(r"^/lol/league/v4/entries/by-summoner/([^/]+)$"), "league-v4.entries"),
+    (re.compile(r"^/lol/platform/v3/champion-rotations$"), "champion-v3.rotations"),
+]
+
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND", "MASTER", "GRANDMASTER", "CHALLENGER"]
+
+
+def parse_limits(spec: str) -> List[Tuple[int, int]]:
+    """"20:1,100:120" -> [(20, 1), (100, 120)]"""
+    limits = []
+    for part in spec.split(","):
+        if part.strip():
+            count, window = part.split(":")
+            limits.append((int(count), int(window)))
+    return limits
+
+
+def _digest(text: str, length: int) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:length]
+
+
+class RateWindow:
+    """Fixed window counter, started by the first request (as Riot does)"""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.started = 0.0
+        self.count = 0
+
+    def _roll(self, now: float):
+        if now - self.started >= self.window:
+            self.started = now
+            self.count = 0
+
+    def retry_after(self, now: float) -> float:
+        self._roll(now)
+        if self.count < self.limit:
+            return 0.0
+        return self.started + self.window - now
+
+    def hit(self, now: float):
+        self._roll(now)
+        self.count += 1
+
+
+class RateLimits:
+    """Application limits per (key, host) and method limits per (key, host, endpoint)"""
+
+    def __init__(self, app_limits: str, method_limits: Dict[str, str]):
+        self.app_spec = app_limits
+        self.method_specs = method_limits
+        self._windows: Dict[Tuple, List[RateWindow]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: Tuple, spec: str) -> List[RateWindow]:
+        windows = self._windows.get(key)
+        if windows is None:
+            windows = [RateWindow(limit, window) for limit, window in parse_limits(spec)]
+            self._windows[key] = windows
+        return windows
+
+    def check(self, api_key: str, host: str, endpoint: str) -> Tuple[Optional[str], float, Dict[str, str]]:
+        """Count a request; return (limit type hit or None, retry after, headers)"""
+        method_spec = self.method_specs.get(endpoint, "")
+        now = time.monotonic()
+        with self._lock:
+            app = self._get(("app", api_key, host), self.app_spec)
+            method = self._get(("method", api_key, host, endpoint), method_spec)
+            limited, retry = None, 0.0
+            for kind, windows in (("application", app), ("method", method)):
+                wait = max([window.retry_after(now) for window in windows] or [0.0])
+                if wait > retry:
+                    limited, retry = kind, wait
+            if limited is None:
+                for window in app + method:
+                    window.hit(now)
+            headers = {
+                "X-App-Rate-Limit": self.app_spec,
+                "X-App-Rate-Limit-Count": ",".join(f"{w.count}:{w.window}" for w in app),
+            }
+            if method_spec:
+                headers["X-Method-Rate-Limit"] = method_spec
+                headers["X-Method-Rate-Limit-Count"] = ",".join(f"{w.count}:{w.window}" for w in method)
+        return limited, retry, headers
+
+
+class Timeline:
+    """Accounts and the scripted schedule of games"""
+
+    def __init__(self, scenario: Dict[str, Any], speed: float = 1.0):
+        self.speed = speed
+        self.started = time.monotonic()
+        self.by_riot_id: Dict[str, Dict[str, Any]] = {}
+        self.by_puuid: Dict[str, Dict[str, Any]] = {}
+        self.by_summoner_id: Dict[str, Dict[str, Any]] = {}
+        self.games: List[Dict[str, Any]] = []
+        for account in scenario.get("accounts", []):
+            self.add_account(account["riot_id"], account.get("region", "euw1"),
+                             account.get("puuid"), account.get("summoner_id"))
+        for index, game in enumerate(scenario.get("games", [])):
+            self.add_game(game, index)
+
+    def add_account(self, riot_id: str, region: str, puuid: Optional[str] = None,
+                    summoner_id: Optional[str] = None) -> Dict[str, Any]:
+        key = riot_id.strip().lower()
+        game_name, tag_line = riot_id.split("#", 1)
+        account = {
+            "riot_id": riot_id,
+            "gameName": game_name,
+            "tagLine": tag_line,
+            "region": region,
+            "puuid": puuid or f"standin-{_digest(key, 66)}",
+            "summoner_id": summoner_id or f"sid-{_digest(key + ':sid', 44)}",
+            "seed": int(_digest(key, 8), 16),
+        }
+        self.by_riot_id[key] = account
+        self.by_puuid[account["puuid"]] = account
+        self.by_summoner_id[account["summoner_id"]] = account
+        return account
+
+    def add_game(self, game: Dict[str, Any], index: int):
+        region = game.get("region", "euw1")
+        players = []
+        for riot_id in game.get("players", []):
+            account = self.by_riot_id.get(riot_id.strip().lower()) or self.add_account(riot_id, region)
+            players.append(account)
+        self.games.append({
+            "gameId": game.get("gameId", 7_000_000_000 + index),
+            "start": float(game.get("start", 0)),
+            "duration": float(game.get("duration", 1800)),
+            "region": region,
+            "players": players,
+            "featured": bool(game.get("featured", False)),
+            "queue": game.get("queue", 420),
+        })
+
+    def now(self) -> float:
+        """Current scenario time in seconds"""
+        return (time.monotonic() - self.started) * self.speed
+
+    def active_games(self, region: Optional[str] = None) -> List[Dict[str, Any]]:
+        now = self.now()
+        return [game for game in self.games
+                if game["start"] <= now < game["start"] + game["duration"]
+                and (region is None or game["region"] == region)]
+
+    def game_of(self, puuid: str, region: str) -> Optional[Dict[str, Any]]:
+        for game in self.active_games(region):
+            if any(player["puuid"] == puuid for player in game["players"]):
+                return game
+        return None
+
+    def game_payload(self, game: Dict[str, Any]) -> Dict[str, Any]:
+        """Spectator-V5 CurrentGameInfo for a scripted game (padded to ten players)"""
+        rng = random.Random(game["gameId"])
+        participants = []
+        for slot in range(10):
+            if slot < len(game["players"]):
+                account = game["players"][slot]
+                puuid, riot_id, summoner_id = account["puuid"], account["riot_id"], account["summoner_id"]
+            else:
+                filler = f"Filler{game['gameId'] % 100000}x{slot}#SIM"
+                puuid = f"standin-{_digest(filler.lower(), 66)}"
+                riot_id, summoner_id = filler, f"sid-{_digest(filler.lower() + ':sid', 44)}"
+            participants.append({
+                "puuid": puuid,
+                "riotId": riot_id,
+                "summonerId": summoner_id,
+                "teamId": 100 if slot < 5 else 200,
+                "championId": rng.randint(1, 950),
+                "spell1Id": 4,
+                "spell2Id": rng.choice([7, 11, 12, 14]),
+                "profileIconId": rng.randint(1, 5000),
+                "bot": False,
+            })
+        elapsed = max(0.0, self.now() - game["start"])
+        return {
+            "gameId": game["gameId"],
+            "mapId": 11,
+            "gameMode": "CLASSIC",
+            "gameType": "MATCHED",
+            "gameQueueConfigId": game["queue"],
+            "platformId": game["region"].upper(),
+            "participants": participants,
+            "observers": {"encryptionKey": _digest(f"key:{game['gameId']}", 32)},
+            "bannedChampions": [],
+            # Temps du scénario : avec --speed > 1, gameStartTime est « compressé »
+            "gameStartTime": int(time.time() * 1000 - elapsed * 1000),
+            "gameLength": int(elapsed),
+        }
+
+    def summoner_payload(self, account: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": account["summoner_id"],
+            "accountId": f"acc-{_digest(account['puuid'], 40)}",
+            "puuid": account["puuid"],
+            "profileIconId": account["seed"] % 5000,
+            "revisionDate": int(time.time() * 1000),
+            "summonerLevel": 30 + account["seed"] % 900,
+        }
+
+    def league_payload(self, account: Dict[str, Any]) -> List[Dict[str, Any]]:
+        seed = account["seed"]
+        return [{
+            "queueType": "RANKED_SOLO_5x5",
+            "tier": TIERS[seed % len(TIERS)],
+            "rank": ["I", "II", "III", "IV"][seed // 7 % 4],
+            "leaguePoints": seed % 100,
+            "wins": 50 + seed % 400,
+            "losses": 50 + seed // 3 % 400,
+            "summonerId": account["summoner_id"],
+            "puuid": account["puuid"],
+        }]
+
+
+def generate_schedule(accounts: List[Dict[str, Any]], horizon: float, seed: int = 0,
+                      group_chance: float = 0.2) -> List[Dict[str, Any]]:
+    """Random idle / in-game periods for every account over `horizon` scenario seconds.
+
+    With probability `group_chance` a game pulls in other idle accounts of the
+    same region (pro players often share high-elo games).
+    """
+    rng = random.Random(seed)
+    busy_until = {account["riot_id"]: rng.uniform(0, 600) for account in accounts}
+    games = []
+    while True:
+        riot_id = min(busy_until, key=busy_until.get) if busy_until else None
+        if riot_id is None or busy_until[riot_id] >= horizon:
+            break
+        start = busy_until[riot_id]
+        duration = rng.uniform(15 * 60, 40 * 60)
+        region = next(account["region"] for account in accounts if account["riot_id"] == riot_id)
+        players = [riot_id]
+        if rng.random() < group_chance:
+            for other in accounts:
+                if (other["riot_id"] not in players and other["region"] == region
+                        and busy_until[other["riot_id"]] <= start and len(players) < 4):
+                    players.append(other["riot_id"])
+        for player in players:
+            busy_until[player] = start + duration + rng.uniform(60, 15 * 60)
+        games.append({
+            "start": round(start, 1),
+            "duration": round(duration, 1),
+            "region": region,
+            "players": players,
+            "featured": rng.random() < 0.3,
+        })
+    return games
+
+
+def accounts_from_settings(path: str) -> List[Dict[str, Any]]:
+    """Accounts of the players in an App settings.json (keeps their real PUUIDs)"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    accounts = []
+    for player in data.get("players", {}).values():
+        riot_id = player.get("summoner_id", "")
+        if "#" not in riot_id:
+            continue
+        info = (player.get("summoner_info") or {}).get("accountInfo") or {}
+        accounts.append({
+            "riot_id": riot_id,
+            "region": player.get("region", "euw1"),
+            "puuid": info.get("puuid"),
+            "summoner_id": info.get("id"),
+        })
+    return accounts
+
+
+class RiotStandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, timeline: Timeline, limits: RateLimits, latency: float = 0.0,
+                 jitter: float = 0.0, api_keys: Optional[List[str]] = None, verbose: bool = False):
+        super().__init__(address, RiotStandinHandler)
+        self.timeline = timeline
+        self.limits = limits
+        self.latency = latency
+        self.jitter = jitter
+        self.api_keys = set(api_keys or [])
+        self.verbose = verbose
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, endpoint: str, status: int):
+        with self.stats_lock:
+            counters = self.stats.setdefault(endpoint, {})
+            counters[str(status)] = counters.get(str(status), 0) + 1
+
+
+class RiotStandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: RiotStandinServer
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def send_error_status(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        self.send_json(status, {"status": {"message": message, "status_code": status}}, headers)
+
+    def do_HEAD(self):
+        # Pré-chauffage des connexions côté client
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.startswith("/_standin/"):
+            return self.handle_control()
+
+        _, _, rest = self.path.partition("/")
+        host, _, path = rest.partition("/")
+        path = "/" + path.split("?", 1)[0]
+        region = host.split(".", 1)[0]
+        endpoint, params = None, ()
+        for pattern, name in ROUTES:
+            match = pattern.match(path)
+            if match:
+                endpoint, params = name, tuple(unquote(param) for param in match.groups())
+                break
+        if endpoint is None:
+            return self.send_error_status(404, "Data not found - unknown path")
+
+        api_key = self.headers.get("X-Riot-Token")
+        if not api_key:
+            self.server.count(endpoint, 401)
+            return self.send_error_status(401, "Unauthorized")
+        if self.server.api_keys and api_key not in self.server.api_keys:
+            self.server.count(endpoint, 403)
+            return self.send_error_status(403, "Forbidden")
+
+        if self.server.latency or self.server.jitter:
+            time.sleep(self.server.latency + random.uniform(0, self.server.jitter))
+
+        limited, retry_after, headers = self.server.limits.check(api_key, host, endpoint)
+        if limited:
+            headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+            headers["X-Rate-Limit-Type"] = limited
+            self.server.count(endpoint, 429)
+            return self.send_error_status(429, "Rate limit exceeded", headers)
+
+        status, body = self.resolve(endpoint, params, region)
+        self.server.count(endpoint, status)
+        if status != 200:
+            return self.send_error_status(status, body, headers)
+        self.send_json(200, body, headers)
+
+    def resolve(self, endpoint: str, params: Tuple[str, ...], region: str) -> Tuple[int, Any]:
+        timeline = self.server.timeline
+        if endpoint == "account-v1.by-riot-id":
+            account = timeline.by_riot_id.get(f"{params[0]}#{params[1]}".lower())
+            if account is None:
+                return 404, "Data not found - No results found for player with riot id"
+            return 200, {"puuid": account["puuid"], "gameName": account["gameName"], "tagLine": account["tagLine"]}
+
+        if endpoint in ("summoner-v4.by-puuid", "summoner-v4.by-id", "summoner-v4.by-name"):
+            if endpoint == "summoner-v4.by-puuid":
+                account = timeline.by_puuid.get(params[0])
+            elif endpoint == "summoner-v4.by-id":
+                account = timeline.by_summoner_id.get(params[0])
+            else:
+                account = next((a for a in timeline.by_riot_id.values()
+                                if a["gameName"].lower() == params[0].lower() and a["region"] == region), None)
+            if account is None or account["region"] != region:
+                return 404, "Data not found - summoner not found"
+            return 200, timeline.summoner_payload(account)
+
+        if endpoint == "spectator-v5.active-games":
+            game = timeline.game_of(params[0], region)
+            if game is None:
+                return 404, "Data not found - spectator game info isn't found"
+            return 200, timeline.game_payload(game)
+
+        if endpoint == "spectator-v5.featured-games":
+            games = [timeline.game_payload(game) for game in timeline.active_games(region) if game["featured"]]
+            return 200, {"gameList": games, "clientRefreshInterval": FEATURED_REFRESH_INTERVAL}
+
+        if endpoint == "league-v4.entries":
+            account = timeline.by_summoner_id.get(params[0])
+            return 200, timeline.league_payload(account) if account else []
+
+        if endpoint == "champion-v3.rotations":
+            return 200, {"freeChampionIds": list(range(1, 21)), "freeChampionIdsForNewPlayers": [18, 81, 92],
+                         "maxNewPlayerLevel": 10}
+
+        return 404, "Data not found"
+
+    def handle_control(self):
+        """/_standin/stats and /_standin/games, outside of the rate limits"""
+        if self.path.startswith("/_standin/stats"):
+            with self.server.stats_lock:
+                stats = json.loads(json.dumps(self.server.stats))
+            return self.send_json(200, {"scenario_time": round(self.server.timeline.now(), 1), "endpoints": stats})
+        if self.path.startswith("/_standin/games"):
+            games = [{
+                "gameId": game["gameId"],
+                "region": game["region"],
+                "players": [player["riot_id"] for player in game["players"]],
+                "featured": game["featured"],
+                "ends_in": round(game["start"] + game["duration"] - self.server.timeline.now(), 1),
+            } for game in self.server.timeline.active_games()]
+            return self.send_json(200, games)
+        self.send_error_status(404, "Unknown control path")
+
+
+def start_server(timeline: Timeline, host: str = "127.0.0.1", port: int = 0,
+                 limits: Optional[RateLimits] = None, **options) -> RiotStandinServer:
+    """Start a stand-in server in a daemon thread (port 0 = any free port)"""
+    limits = limits or RateLimits(DEFAULT_APP_LIMITS, dict(DEFAULT_METHOD_LIMITS))
+    server = RiotStandinServer((host, port), timeline, limits, **options)
+    threading.Thread(target=server.serve_forever, name="riot-standin", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Riot API stand-in for League-Spectate")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenario", help="Scenario JSON file (accounts and scripted games)")
+    parser.add_argument("--roster", help="App settings.json whose players are added as accounts")
+    parser.add_argument("--generate", action="store_true", help="Generate a random schedule for all accounts")
+    parser.add_argument("--horizon", type=float, default=6 * 3600, help="Generated schedule length (scenario s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=1.0, help="Scenario seconds per wall-clock second")
+    parser.add_argument("--latency", type=float, default=0.05, help="Base latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Random extra latency (s)")
+    parser.add_argument("--app-limits", default=DEFAULT_APP_LIMITS, help='e.g. "20:1,100:120"')
+    parser.add_argument("--method-limit", action="append", default=[], metavar="ENDPOINT=SPEC",
+                        help='Override a method limit, e.g. "spectator-v5.active-games=5:1"')
+    parser.add_argument("--api-key", action="append", default=[], help="Accepted key (default: any)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    scenario: Dict[str, Any] = {"accounts": [], "games": []}
+    if args.scenario:
+        with open(args.scenario, "r", encoding="utf-8") as f:
+            scenario = json.load(f)
+        scenario.setdefault("accounts", [])
+        scenario.setdefault("games", [])
+    if args.roster:
+        known = {account["riot_id"].lower() for account in scenario["accounts"]}
+        scenario["accounts"] += [account for account in accounts_from_settings(args.roster)
+                                 if account["riot_id"].lower() not in known]
+    if args.generate:
+        scenario["games"] += generate_schedule(scenario["accounts"], args.horizon, args.seed)
+
+    method_limits = dict(DEFAULT_METHOD_LIMITS)
+    for override in args.method_limit:
+        endpoint, _, spec = override.partition("=")
+        method_limits[endpoint] = spec
+
+    timeline = Timeline(scenario, speed=args.speed)
+    server = RiotStandinServer((args.host, args.port), timeline, RateLimits(args.app_limits, method_limits),
+                               latency=args.latency, jitter=args.jitter, api_keys=args.api_key,
+                               verbose=args.verbose)
+    print(f"Riot API stand-in on {server.base_url} "
+          f"({len(timeline.by_riot_id)} accounts, {len(timeline.games)} games, speed x{args.speed})")
+    print(f'Set "riot_base_url": "{server.base_url}" in settings.json or RIOT_API_BASE_URL to use it')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()